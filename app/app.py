@@ -1,12 +1,16 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, jsonify,
+                   send_from_directory, stream_with_context)
 from flask_wtf import FlaskForm
 from wtforms import FileField, TextAreaField, SubmitField, StringField
 from wtforms.validators import DataRequired
-from werkzeug.utils import secure_filename
 from datetime import datetime
 import uuid
 import sys
+import json
+import time
+import shutil
+import tempfile
 
 # Add parent directory to path so imports work correctly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -17,10 +21,23 @@ app = Flask(__name__)
 app.config.from_object('config')
 
 # Import models
-from app.models.resume import Resume, JobDescription
+from app.models.resume import Resume, JobDescription, RESULT_SORTS
+from app.models.storage import recover_stores, NumpyJSONEncoder
 from app.utils.resume_parser import ResumeParser
-from app.utils.resume_analyzer import ResumeAnalyzer
-from app.utils.export import export_to_csv
+from app.utils.resume_analyzer import ResumeAnalyzer, DEFAULT_WEIGHTS
+from app.utils.job_profile import EDUCATION_LEVELS
+from app.utils.export import iter_csv, export_to_columnar, COLUMNAR_FORMATS
+from app.utils.model_registry import model_registry
+from app.utils.job_queue import job_queue
+from app.utils.processing import (process_resume_batch, process_matching, save_upload, parse_uploads,
+                                  score_stream)
+
+# Load the embedding model once at startup so requests only pay for inference
+if app.config.get('PRELOAD_MODELS'):
+    model_registry.preload([app.config['EMBEDDING_MODEL_NAME']])
+
+# Replay any storage write log left by a previous run
+recover_stores()
 
 # Ensure upload directories exist
 os.makedirs(app.config['UPLOAD_FOLDER_RESUMES'], exist_ok=True)
@@ -34,6 +51,10 @@ class UploadForm(FlaskForm):
     job_description = TextAreaField('Job Description', validators=[DataRequired()])
     submit = SubmitField('Analyze')
 
+class MatchForm(FlaskForm):
+    resume_files = FileField('Upload Resumes', validators=[DataRequired()])
+    submit = SubmitField('Match')
+
 class JobDescriptionForm(FlaskForm):
     title = StringField('Job Title', validators=[DataRequired()])
     description = TextAreaField('Job Description', validators=[DataRequired()])
@@ -68,51 +89,57 @@ def upload():
         )
         job_desc.save()
         
-        # Process resume files
+        # Save resume files
         resume_files = request.files.getlist('resume_files')
-        resume_ids = []
+        uploads = []
         
         for file in resume_files:
             if file:
-                # Save the resume file
-                resume_id = str(uuid.uuid4())
-                original_filename = secure_filename(file.filename)
-                file_extension = os.path.splitext(original_filename)[1]
-                resume_filename = f"resume_{resume_id}{file_extension}"
-                resume_path = os.path.join(app.config['UPLOAD_FOLDER_RESUMES'], resume_filename)
-                file.save(resume_path)
-                
-                # Parse and analyze the resume
-                parser = ResumeParser(resume_path)
-                parsed_data = parser.parse()
-                
-                analyzer = ResumeAnalyzer(parsed_data, job_description_text)
-                analysis = analyzer.calculate_score()
-                
-                # Save to JSON storage
-                resume = Resume(
-                    id=resume_id,
-                    original_filename=original_filename,
-                    filename=resume_filename,
-                    path=resume_path,
-                    job_description_id=job_desc_id,
-                    candidate_name=parsed_data.get('name', ''),
-                    email=parsed_data.get('email', ''),
-                    phone=parsed_data.get('phone', ''),
-                    skills=parsed_data.get('skills', []),
-                    education=parsed_data.get('education', ''),
-                    experience=parsed_data.get('experience', ''),
-                    score=analysis['overall_score'],
-                    detailed_analysis=analysis,
-                    created_at=datetime.now().isoformat()
-                )
-                resume.save()
-                resume_ids.append(resume_id)
+                # Identical files are stored once, under the hash of their contents
+                uploads.append(save_upload(file, app.config['UPLOAD_FOLDER_RESUMES']))
+        
+        # Parse and score in the background; the results page polls for progress
+        job_queue.submit(job_desc_id, len(uploads), process_resume_batch, job_desc, uploads)
+        flash(f"Processing {len(uploads)} resume(s). Results will appear as they are analyzed.", "info")
         
         return redirect(url_for('results', job_id=job_desc_id))
     
     return render_template('upload.html', form=form)
 
+@app.route('/match', methods=['GET', 'POST'])
+def match():
+    """Match one pool of resumes against several saved job descriptions"""
+    form = MatchForm()
+    job_descriptions = JobDescription.get_all()
+    job_descriptions.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    
+    if form.validate_on_submit():
+        job_ids = request.form.getlist('job_ids')
+        job_descs = []
+        for job_id in job_ids:
+            record = JobDescription.get_by_id(job_id)
+            if record:
+                job_descs.append(JobDescription(**record))
+        if not job_descs:
+            flash("Select at least one job description", "danger")
+            return render_template('match.html', form=form, job_descriptions=job_descriptions)
+        
+        uploads = [save_upload(file, app.config['UPLOAD_FOLDER_RESUMES'])
+                   for file in request.files.getlist('resume_files') if file]
+        
+        # One background batch fills every job's results; each results page
+        # polls its progress under its own job ID
+        batch_id = str(uuid.uuid4())
+        job_queue.submit(batch_id, len(uploads), process_matching, job_descs, uploads)
+        for job_desc in job_descs:
+            job_queue.alias(job_desc.id, batch_id)
+        flash(f"Matching {len(uploads)} resume(s) against {len(job_descs)} job description(s). "
+              f"Results will appear under each job as they are analyzed.", "info")
+        
+        return redirect(url_for('results', job_id=job_descs[0].id))
+    
+    return render_template('match.html', form=form, job_descriptions=job_descriptions)
+
 @app.route('/results/<job_id>')
 def results(job_id):
     """Display analysis results"""
@@ -120,14 +147,280 @@ def results(job_id):
     if not job_description:
         flash("Job description not found", "danger")
         return redirect(url_for('index'))
-        
-    resume_dicts = Resume.get_by_job_id(job_id)
-    resume_dicts.sort(key=lambda x: x.get('score', 0), reverse=True)
     
-    # Convert dictionaries to Resume objects without passing id twice
-    resumes = [Resume(**r) for r in resume_dicts]
+    # Resumes themselves are fetched page by page from results_page
+    resume_count = Resume.count_by_job_id(job_id)
+    
+    # Background batch still processing resumes for this job, if any
+    batch = job_queue.get(job_id)
+    batch_status = batch.to_dict() if batch and not batch.done else None
+    
+    return render_template('results.html', job_description=job_description, resume_count=resume_count,
+                           batch_status=batch_status, default_weights=DEFAULT_WEIGHTS,
+                           sort_keys=list(RESULT_SORTS), education_levels=list(EDUCATION_LEVELS),
+                           page_size=app.config['RESULTS_PAGE_SIZE'])
+
+def result_row(resume, sort_value):
+    """JSON summary of a resume for one row of the results page"""
+    analysis = resume.data.get('detailed_analysis') or {}
+    return {
+        'id': resume.id,
+        'candidate_name': resume.data.get('candidate_name'),
+        'email': resume.data.get('email'),
+        'phone': resume.data.get('phone'),
+        'skills': resume.get_skills_list(),
+        'score': resume.data.get('score', 0),
+        'sort_value': sort_value,
+        'component_scores': analysis.get('component_scores') or {},
+        'prefilter_only': (analysis.get('cascade') or {}).get('stage') == 'prefilter',
+        'view_url': url_for('view_resume', resume_id=resume.id),
+        'download_url': url_for('download_resume', resume_id=resume.id)
+    }
+
+@app.route('/results/<job_id>/page')
+def results_page(job_id):
+    """
+    One page of a job's results as JSON, sorted and filtered in storage.
+    Query parameters: sort (score or a component score, e.g. skills_match),
+    order (desc or asc), min_score, skill (repeatable; each must be listed),
+    min_education (e.g. masters), required_skills (1 to keep only resumes
+    with every required skill), weights (JSON object of custom weights to
+    rank by instead of sort), limit, and cursor (next_cursor of the
+    previous page). The first page also reports the number of matches.
+    """
+    if not JobDescription.get_by_id(job_id):
+        return jsonify({'error': 'Job description not found'}), 404
+    
+    args = request.args
+    start = time.perf_counter()
+    try:
+        limit = min(max(int(args.get('limit', app.config['RESULTS_PAGE_SIZE'])), 1),
+                    app.config['RESULTS_PAGE_MAX'])
+        min_score = float(args['min_score']) if args.get('min_score') else None
+        skills = [skill.strip() for value in args.getlist('skill') for skill in value.split(',') if skill.strip()]
+        weights = json.loads(args['weights']) if args.get('weights') else None
+        if weights is not None and not isinstance(weights, dict):
+            raise ValueError("weights must be a JSON object")
+        conditions = Resume.result_conditions(
+            min_score=min_score,
+            skills=skills,
+            min_education=args.get('min_education') or None,
+            required_skills=args.get('required_skills', '').lower() in ('1', 'true', 'yes', 'on')
+        )
+        cursor = args.get('cursor') or None
+        page = Resume.page_by_job_id(
+            job_id,
+            sort=args.get('sort', 'score'),
+            descending=args.get('order', 'desc').lower() != 'asc',
+            conditions=conditions,
+            cursor=cursor,
+            limit=limit,
+            weights=weights
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {
+        'job_id': job_id,
+        'next_cursor': page['next_cursor'],
+        'results': [result_row(resume, sort_value)
+                    for resume, sort_value in zip(page['resumes'], page['sort_values'])]
+    }
+    if weights is not None:
+        # Show the recombined score the page was ranked by
+        for row in response['results']:
+            row['stored_score'], row['score'] = row['score'], row['sort_value']
+    if not cursor:
+        response['count'] = Resume.count_by_job_id(job_id, conditions)
+    response['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return jsonify(response)
+
+@app.route('/results/<job_id>/rerank', methods=['GET', 'POST'])
+def rerank_results(job_id):
+    """
+    Rank a job's resumes under custom weights as JSON. Weights come from the
+    query string or a JSON body, e.g. {"skills_match": 0.5, "education_match": 0};
+    the stored component scores are recombined without re-running any analysis.
+    """
+    if not JobDescription.get_by_id(job_id):
+        return jsonify({'error': 'Job description not found'}), 404
+    
+    weights = request.get_json(silent=True) if request.is_json else None
+    if weights is None:
+        weights = request.args.to_dict()
     
-    return render_template('results.html', job_description=job_description, resumes=resumes)
+    start = time.perf_counter()
+    try:
+        normalized = ResumeAnalyzer.normalize_weights(weights)
+        ranking = Resume.rerank(job_id, normalized)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'job_id': job_id,
+        'weights': normalized,
+        'count': len(ranking),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        'results': ranking
+    })
+
+@app.route('/results/<job_id>/progress')
+def results_progress(job_id):
+    """Report the progress of the background batch for a job as JSON"""
+    batch = job_queue.get(job_id)
+    if not batch:
+        return jsonify({'id': job_id, 'status': 'unknown'}), 404
+    return jsonify(batch.to_dict())
+
+@app.route('/job_descriptions/<job_id>/candidates')
+def job_candidates(job_id):
+    """
+    Best fitting resumes from the whole corpus for a job description, as
+    JSON. Query parameters: k (candidates returned, default 20) and
+    shortlist (resumes retrieved from the index and fully scored).
+    """
+    job_data = JobDescription.get_by_id(job_id)
+    if not job_data:
+        return jsonify({'error': 'Job description not found'}), 404
+    
+    try:
+        top_k = int(request.args.get('k', 20))
+        shortlist = int(request.args.get('shortlist', app.config['VECTOR_INDEX_SHORTLIST']))
+    except ValueError:
+        return jsonify({'error': 'k and shortlist must be integers'}), 400
+    
+    start = time.perf_counter()
+    candidates = JobDescription(**job_data).find_candidates(top_k=max(top_k, 1), shortlist=max(shortlist, 1))
+    return jsonify({
+        'job_id': job_id,
+        'count': len(candidates),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        'candidates': candidates
+    })
+
+def _api_job(spec):
+    """
+    Job description text and profile for an API request, from either its
+    text ('job_description') or a stored job ('job_description_id').
+    
+    Raises:
+        ValueError: If neither is given or the stored job does not exist
+    """
+    if spec.get('job_description_id'):
+        job_data = JobDescription.get_by_id(spec['job_description_id'])
+        if not job_data:
+            raise ValueError("Job description not found")
+        job_desc = JobDescription(**job_data)
+        return job_desc.text, job_desc.get_profile(model_registry.get(app.config['EMBEDDING_MODEL_NAME']))
+    if spec.get('job_description'):
+        return spec['job_description'], None
+    raise ValueError("Send job_description (text) or job_description_id")
+
+def _api_text_resumes(items, start=0):
+    """(ref, parsed data) pairs for resume texts sent as {"id": ..., "text": ...} objects"""
+    for index, item in enumerate(items, start=start):
+        if isinstance(item, Exception):
+            yield {'index': index}, item
+        elif not isinstance(item, dict) or not isinstance(item.get('text'), str):
+            yield {'index': index}, ValueError("Each resume needs a text field")
+        else:
+            ref = {'index': index, 'id': item.get('id')}
+            yield ref, ResumeParser.parse_text(item['text'], name=str(item.get('id') or f'resume {index}'))
+
+def _ndjson_lines(stream):
+    """Decode the JSON objects of an NDJSON stream line by line, yielding errors in place of bad lines"""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON line: {str(e)}")
+
+@app.route('/api/score', methods=['POST'])
+def api_score():
+    """
+    Score resumes against a job description, for applicant tracking systems.
+    Results are streamed back as newline-delimited JSON (application/x-ndjson),
+    one line per resume as soon as it is scored, then a summary line; nothing
+    is saved. A resume that cannot be read or parsed gets an {"error": ...}
+    line instead of a score. The job description is given as job_description (text) or
+    job_description_id (a stored job). Accepted bodies:
+    
+    - multipart/form-data: resume files in 'resumes' and/or already extracted
+      texts in 'text' fields, plus the job description fields
+    - application/json: {"job_description": ..., "resumes": [{"id": ..., "text": ...}]}
+    - application/x-ndjson: a first line with the job description fields,
+      then one {"id": ..., "text": ...} line per resume. Lines are read as
+      they arrive, so scoring overlaps with the upload.
+    """
+    start_time = time.perf_counter()
+    tmp_dir = None
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            lines = _ndjson_lines(request.stream)
+            header = next(lines, None)
+            if not isinstance(header, dict):
+                raise ValueError("The first line must be a JSON object with the job description")
+            job_text, job_profile = _api_job(header)
+            resumes = _api_text_resumes(lines)
+        elif request.is_json:
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict) or not isinstance(body.get('resumes'), list):
+                raise ValueError("Send a JSON object with a resumes list")
+            job_text, job_profile = _api_job(body)
+            resumes = _api_text_resumes(body['resumes'])
+        else:
+            job_text, job_profile = _api_job(request.form)
+            files = [file for file in request.files.getlist('resumes') if file and file.filename]
+            texts = [{'id': f'text {i}', 'text': text} for i, text in enumerate(request.form.getlist('text'))]
+            if not files and not texts:
+                raise ValueError("Send resume files in 'resumes' or resume texts in 'text'")
+            
+            # The files have been received in full by now; save them so they
+            # can be parsed (or found in the parse cache) one after another
+            tmp_dir = tempfile.mkdtemp(prefix='api_score_')
+            refs = []
+            uploads = []
+            for index, file in enumerate(files):
+                ref = {'index': index, 'id': file.filename}
+                extension = os.path.splitext(file.filename)[1].lower().lstrip('.')
+                if extension not in app.config['ALLOWED_EXTENSIONS']:
+                    refs.append((ref, ValueError(f"Unsupported file type: {extension or file.filename}")))
+                else:
+                    refs.append((ref, None))
+                    uploads.append(save_upload(file, tmp_dir))
+            
+            def file_resumes():
+                parsed_stream = parse_uploads(uploads)
+                for ref, error in refs:
+                    yield ref, error if error else next(parsed_stream)
+                yield from _api_text_resumes(texts, start=len(files))
+            
+            resumes = file_resumes()
+    except ValueError as e:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        count = errors = 0
+        try:
+            for result in score_stream(job_text, resumes, job_profile):
+                count += 1
+                errors += 'error' in result
+                yield json.dumps(result, cls=NumpyJSONEncoder) + '\n'
+        finally:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        yield json.dumps({
+            'done': True,
+            'count': count,
+            'errors': errors,
+            'elapsed_ms': round((time.perf_counter() - start_time) * 1000, 2)
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @app.route('/resume/<resume_id>')
 def view_resume(resume_id):
@@ -157,27 +450,45 @@ def download_resume(resume_id):
 
 @app.route('/export/<job_id>')
 def export_results(job_id):
-    """Export analysis results to CSV"""
+    """
+    Export analysis results. Query parameters: format ('csv', the default,
+    streamed row by row; or 'parquet' / 'feather') and columns (comma-separated
+    column keys from app.utils.export.EXPORT_COLUMNS; all columns by default).
+    """
     job_description = JobDescription.get_by_id(job_id)
     if not job_description:
         flash("Job description not found", "danger")
         return redirect(url_for('index'))
-        
-    resume_dicts = Resume.get_by_job_id(job_id)
-    # Convert dictionaries to Resume objects
-    resumes = [Resume(**r) for r in resume_dicts]
     
-    # Format data for CSV
-    csv_data = export_to_csv(resumes)
+    export_format = request.args.get('format', 'csv').lower()
+    columns = [column.strip() for column in request.args.get('columns', '').split(',') if column.strip()]
+    filename = f"resume_analysis_{job_id}.{export_format}"
     
-    # Create response with CSV
-    from flask import Response
-    
-    return Response(
-        csv_data,
-        mimetype="text/csv",
-        headers={"Content-disposition": f"attachment; filename=resume_analysis_{job_id}.csv"}
-    )
+    try:
+        if export_format == 'csv':
+            rows = iter_csv(Resume.iter_by_job_id(job_id), columns)
+            next_row = next(rows)  # Check the columns before streaming starts
+            
+            def generate():
+                yield next_row
+                yield from rows
+            
+            return Response(
+                stream_with_context(generate()),
+                mimetype="text/csv",
+                headers={"Content-disposition": f"attachment; filename={filename}"}
+            )
+        if export_format in COLUMNAR_FORMATS:
+            data = export_to_columnar(Resume.iter_by_job_id(job_id), columns, export_format)
+            return Response(
+                data,
+                mimetype="application/octet-stream",
+                headers={"Content-disposition": f"attachment; filename={filename}"}
+            )
+        raise ValueError(f"Unknown export format: {export_format}")
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('results', job_id=job_id))
 
 @app.route('/job_descriptions', methods=['GET', 'POST'])
 def job_descriptions():
@@ -203,6 +514,7 @@ def job_descriptions():
             created_at=datetime.now().isoformat()
         )
         job_desc.save()
+        job_desc.get_profile(model_registry.get(app.config['EMBEDDING_MODEL_NAME']))
         
         flash("Job description saved successfully", "success")
         return redirect(url_for('job_descriptions'))
@@ -238,6 +550,11 @@ def page_not_found(e):
 def internal_server_error(e):
     return render_template('errors/500.html'), 500
 
+@app.route('/health/models')
+def model_stats():
+    """Report embedding model load time and memory use"""
+    return jsonify(model_registry.stats())
+
 # For running in development mode
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
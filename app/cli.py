@@ -0,0 +1,398 @@
+"""
+Offline batch scoring: parse and score directories of resumes against one or
+more job descriptions across a pool of worker processes, without the web
+server. Results go to the store (visible at /results/<job_id>) or to a CSV or
+NDJSON file.
+
+Usage:
+    python -m app.cli score RESUMES [RESUMES ...] --jd JD [JD ...]
+        [--output store|FILE.csv|FILE.ndjson] [--workers N] [--chunk-size N]
+        [--checkpoint FILE] [--restart]
+
+RESUMES are directories (searched recursively) or glob patterns. An
+interrupted run picks up where it stopped: finished resumes are recorded in
+the checkpoint file, which is removed once a run completes without failures.
+"""
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import uuid
+import argparse
+import logging
+import multiprocessing
+from datetime import datetime
+from app.models.resume import JobDescription, RESULT_SORTS
+from app.models.storage import NumpyJSONEncoder
+from app.utils.resume_parser import ResumeParser
+from app.utils.resume_analyzer import ResumeAnalyzer
+from app.utils.job_profile import get_job_profile, hash_text
+from app.utils.model_registry import get_embedding_model
+from app.utils.processing import parse_uploads, file_hash, save_matches
+from config import (ALLOWED_EXTENSIONS, CLI_WORKERS, CLI_CHUNK_SIZE, JSON_STORAGE_PATH,
+                    UPLOAD_FOLDER_JOB_DESCRIPTIONS)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPONENT_KEYS = [key for key in RESULT_SORTS if key != 'score']
+
+# Columns of CSV output, and the keys of each NDJSON result
+RESULT_COLUMNS = ['file', 'content_hash', 'job_file', 'job_description_id', 'candidate_name',
+                  'email', 'phone', 'skills', 'score'] + COMPONENT_KEYS + ['parse_error']
+
+
+def find_resumes(patterns):
+    """
+    Resume files matching directories or glob patterns.
+
+    Args:
+        patterns (list): Directories, searched recursively, or glob patterns
+            (** matches any number of subdirectories)
+
+    Returns:
+        list: Sorted absolute paths of files with an allowed extension
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = (os.path.join(root, name)
+                          for root, _, names in os.walk(pattern) for name in names)
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        for path in candidates:
+            extension = os.path.splitext(path)[1].lower().lstrip('.')
+            if extension in ALLOWED_EXTENSIONS and os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def read_job_file(path):
+    """Text of a job description file (TXT, PDF or DOCX)"""
+    if path.lower().endswith('.txt'):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    return ResumeParser(path).extract_text()
+
+
+def load_jobs(paths, store):
+    """
+    Read the job description files. When writing to the store, each one is
+    matched to the stored job description with the same text, or saved as a
+    new one, so results of later runs land on the same job.
+
+    Args:
+        paths (list): Job description files
+        store (bool): Whether results are written to the store
+
+    Returns:
+        list: Dicts with 'id', 'file' and 'text'
+    """
+    stored = {}
+    if store:
+        for record in JobDescription.get_all():
+            stored.setdefault(hash_text(record.get('text', '')), record['id'])
+
+    jobs = []
+    for path in paths:
+        text = read_job_file(path)
+        if not text.strip():
+            raise ValueError(f"Job description {path} is empty")
+        text_hash = hash_text(text)
+        job_id = stored.get(text_hash)
+        if job_id is None:
+            job_id = str(uuid.uuid4()) if store else text_hash[:16]
+            if store:
+                job_path = os.path.join(UPLOAD_FOLDER_JOB_DESCRIPTIONS, f"job_desc_{job_id}.txt")
+                os.makedirs(UPLOAD_FOLDER_JOB_DESCRIPTIONS, exist_ok=True)
+                with open(job_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                JobDescription(
+                    id=job_id,
+                    title=os.path.splitext(os.path.basename(path))[0],
+                    text=text,
+                    filename=os.path.basename(job_path),
+                    path=job_path,
+                    created_at=datetime.now().isoformat()
+                ).save()
+                stored[text_hash] = job_id
+        jobs.append({'id': job_id, 'file': os.path.abspath(path), 'text': text})
+    return jobs
+
+
+# Per-process state of a worker: the models and job profiles, loaded once
+_worker = {}
+
+
+def _init_worker(jobs, store):
+    """Load the embedding model and job profiles once per worker process"""
+    bert_model = get_embedding_model()
+    _worker.update(
+        jobs=jobs,
+        store=store,
+        bert_model=bert_model,
+        profiles=[get_job_profile(job['text'], bert_model)[0] for job in jobs]
+    )
+
+
+def _result_row(upload, parsed_data, analysis, job):
+    """
+    Flat result of one resume scored against one job. A resume that could
+    not be parsed has no analysis: its scores are empty and parse_error
+    says why.
+    """
+    analysis = analysis or {'overall_score': None}
+    scores = analysis.get('component_scores', {})
+    row = {
+        'file': upload['path'],
+        'content_hash': upload['content_hash'],
+        'job_file': job['file'],
+        'job_description_id': job['id'],
+        'candidate_name': parsed_data.get('name', ''),
+        'email': parsed_data.get('email', ''),
+        'phone': parsed_data.get('phone', ''),
+        'skills': parsed_data.get('skills', []),
+        'score': analysis['overall_score']
+    }
+    row.update((key, scores.get(key)) for key in COMPONENT_KEYS)
+    row['parse_error'] = parsed_data.get('parse_error', '')
+    return row
+
+
+def _score_chunk(paths):
+    """
+    Parse a chunk of resumes once and score it against every job; runs in
+    the worker processes. In store mode the records are saved here.
+
+    Resumes whose parse failed are not scored or stored; they get rows
+    with parse_error set.
+
+    Returns:
+        dict: 'paths', plus 'rows' (flat results) and 'parse_failed' (number
+            of resumes that could not be parsed), or 'error'
+    """
+    try:
+        uploads = []
+        for path in paths:
+            name = os.path.basename(path)
+            uploads.append({'original_filename': name, 'filename': name, 'path': path,
+                            'content_hash': file_hash(path)})
+        # Already in a worker process, so no nested parsing pool
+        parsed = list(parse_uploads(uploads, n_process=1))
+
+        bert_model = _worker['bert_model']
+        jobs = _worker['jobs']
+        ok = [i for i, parsed_data in enumerate(parsed) if not parsed_data.get('parse_error')]
+        matrix = None
+        if ok:
+            matrix = ResumeAnalyzer.score_matrix([parsed[i] for i in ok], [job['text'] for job in jobs],
+                                                 job_profiles=_worker['profiles'], bert_model=bert_model)
+        rows_of = {i: row for row, i in enumerate(ok)}
+        rows = [
+            _result_row(upload, parsed_data,
+                        ResumeAnalyzer.matrix_scores(matrix, rows_of[i], j) if i in rows_of else None, job)
+            for j, job in enumerate(jobs)
+            for i, (upload, parsed_data) in enumerate(zip(uploads, parsed))
+        ]
+        if _worker['store'] and ok:
+            save_matches([uploads[i] for i in ok], [parsed[i] for i in ok],
+                         [job['id'] for job in jobs], matrix, bert_model)
+        return {'paths': paths, 'rows': rows, 'parse_failed': len(paths) - len(ok)}
+    except Exception as e:
+        logger.error(f"Error scoring {len(paths)} resumes starting at {paths[0]}: {str(e)}")
+        return {'paths': paths, 'error': str(e)}
+
+
+class ResultFile:
+    """CSV or NDJSON results file, flushed to disk after every chunk"""
+
+    def __init__(self, path, append=False):
+        self.format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        if self.format == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, rows):
+        """Append rows and make them durable before they are checkpointed"""
+        for row in rows:
+            if self.format == 'csv':
+                self.writer.writerow(dict(row, skills=', '.join(row['skills'])))
+            else:
+                self.file.write(json.dumps(row, cls=NumpyJSONEncoder) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class Checkpoint:
+    """
+    Resumes already scored by an interrupted run. The first line records the
+    jobs and output the run was for; a checkpoint from a different run is
+    ignored. Then one finished resume path per line.
+    """
+
+    def __init__(self, path, signature, restart=False):
+        self.path = path
+        self.signature = signature
+        self.done = set()
+        if not restart:
+            self._load()
+        mode = 'a' if self.done else 'w'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, mode, encoding='utf-8')
+        if mode == 'w':
+            self.file.write(json.dumps(signature) + '\n')
+            self.file.flush()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                if json.loads(f.readline() or 'null') != self.signature:
+                    logger.info(f"Ignoring checkpoint {self.path} from a different run")
+                    return
+                # A line torn by a crash does not end in a newline and is left out
+                self.done = {line[:-1] for line in f if line.endswith('\n')}
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+
+    def add(self, paths):
+        """Record finished resumes"""
+        self.file.write(''.join(path + '\n' for path in paths))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.done.update(paths)
+
+    def close(self, remove=False):
+        self.file.close()
+        if remove:
+            os.remove(self.path)
+
+
+def score(resume_patterns, job_paths, output='store', workers=CLI_WORKERS, chunk_size=CLI_CHUNK_SIZE,
+          checkpoint_path=None, restart=False):
+    """
+    Parse and score resumes against job descriptions across a worker pool.
+    Each resume is parsed once, whatever the number of jobs.
+
+    Args:
+        resume_patterns (list): Directories or glob patterns of resumes
+        job_paths (list): Job description files
+        output (str): 'store', or a .csv or .ndjson file to write
+        workers (int): Worker processes; 1 to run in this process
+        chunk_size (int): Resumes per worker task, and per checkpoint step
+        checkpoint_path (str): Checkpoint file; defaults to next to the output
+        restart (bool): Ignore an existing checkpoint
+
+    Returns:
+        dict: Throughput summary
+    """
+    start = time.perf_counter()
+    store = output == 'store'
+    if not store and not output.lower().endswith(('.csv', '.ndjson', '.jsonl')):
+        raise ValueError(f"Output must be 'store' or a .csv or .ndjson file: {output}")
+    paths = find_resumes(resume_patterns)
+    jobs = load_jobs(job_paths, store)
+
+    if checkpoint_path is None:
+        checkpoint_path = (os.path.join(JSON_STORAGE_PATH, 'cli_score.checkpoint') if store
+                           else output + '.checkpoint')
+    signature = {'jobs': [job['id'] for job in jobs], 'output': output if store else os.path.abspath(output)}
+    checkpoint = Checkpoint(checkpoint_path, signature, restart)
+    pending = [path for path in paths if path not in checkpoint.done]
+    skipped = len(paths) - len(pending)
+    if skipped:
+        logger.info(f"Resuming from {checkpoint_path}: {skipped} resumes already scored")
+
+    results_file = None if store else ResultFile(output, append=bool(checkpoint.done))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    workers = max(1, min(workers, len(chunks)))
+
+    pool = None
+    if workers > 1:
+        # Spawned rather than forked, so workers load the models themselves
+        # instead of inheriting a model that may be mid-inference
+        pool = multiprocessing.get_context('spawn').Pool(workers, initializer=_init_worker,
+                                                         initargs=(jobs, store))
+        results = pool.imap_unordered(_score_chunk, chunks)
+    else:
+        _init_worker(jobs, store)
+        results = map(_score_chunk, chunks)
+
+    scored = failed = parse_failed = 0
+    try:
+        for result in results:
+            if 'error' in result:
+                failed += len(result['paths'])
+                continue
+            if results_file is not None:
+                results_file.write(result['rows'])
+            checkpoint.add(result['paths'])
+            scored += len(result['paths']) - result['parse_failed']
+            parse_failed += result['parse_failed']
+            elapsed = time.perf_counter() - start
+            logger.info(f"Scored {scored + failed + parse_failed}/{len(pending)} resumes "
+                        f"({scored / elapsed:.1f} resumes/s, {parse_failed} could not be parsed)")
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if results_file is not None:
+            results_file.close()
+        checkpoint.close(remove=(scored + failed + parse_failed == len(pending) and failed == 0))
+
+    elapsed = time.perf_counter() - start
+    return {
+        'resumes_found': len(paths),
+        'skipped_from_checkpoint': skipped,
+        'scored': scored,
+        'failed': failed,
+        'parse_failed': parse_failed,
+        'jobs': len(jobs),
+        'pairs_scored': scored * len(jobs),
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 2),
+        'resumes_per_second': round(scored / elapsed, 2) if elapsed else 0.0,
+        'pairs_per_second': round(scored * len(jobs) / elapsed, 2) if elapsed else 0.0,
+        'output': output,
+        'job_ids': [job['id'] for job in jobs]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = commands.add_parser('score', help='Score resumes against job descriptions')
+    score_parser.add_argument('resumes', nargs='+', help='Resume directories or glob patterns')
+    score_parser.add_argument('--jd', nargs='+', required=True, help='Job description files')
+    score_parser.add_argument('--output', default='store',
+                              help="'store' (default), or a .csv or .ndjson file")
+    score_parser.add_argument('--workers', type=int, default=CLI_WORKERS, help='Worker processes')
+    score_parser.add_argument('--chunk-size', type=int, default=CLI_CHUNK_SIZE, help='Resumes per worker task')
+    score_parser.add_argument('--checkpoint', help='Checkpoint file (default: next to the output)')
+    score_parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    args = parser.parse_args(argv)
+    try:
+        summary = score(args.resumes, args.jd, output=args.output, workers=args.workers,
+                        chunk_size=max(1, args.chunk_size), checkpoint_path=args.checkpoint,
+                        restart=args.restart)
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
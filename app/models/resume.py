@@ -1,47 +1,39 @@
 from datetime import datetime
-import json
 import os
+import json
+import heapq
+import base64
 import numpy as np
-from app.utils.resume_analyzer import ResumeAnalyzer
-from config import RESUMES_JSON, JOB_DESCRIPTIONS_JSON
+from app.utils.resume_analyzer import ResumeAnalyzer, WEIGHT_COMPONENTS
+from app.utils.job_profile import get_job_profile, EDUCATION_LEVELS
+from app.utils.model_registry import get_embedding_model
+from app.utils.vector_index import get_resume_index
+from config import VECTOR_INDEX_SHORTLIST, RESULTS_PAGE_SIZE
+from app.models.storage import get_store, SORT_PATHS
 
-class NumpyJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+# Keys results can be sorted by, and the path each is stored at
+RESULT_SORTS = {'score': 'score', **{path.rsplit('.', 1)[-1]: path for path in SORT_PATHS['resumes']}}
 
-def load_json_file(filepath):
-    """Load data from JSON file, create if doesn't exist or is corrupted"""
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                try:
-                    return json.load(f)
-                except json.JSONDecodeError:
-                    # If file is corrupted, backup the file and return empty list
-                    backup_path = filepath + '.bak'
-                    os.rename(filepath, backup_path)
-                    return []
-    except Exception as e:
-        print(f"Error loading JSON file {filepath}: {str(e)}")
-        return []
-        
-    # Create new file if doesn't exist
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w') as f:
-        json.dump([], f)
-    return []
 
-def save_json_file(filepath, data):
-    """Save data to JSON file using custom encoder for numpy types"""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, cls=NumpyJSONEncoder)
+def encode_cursor(sort_value, id):
+    """Opaque page cursor for the (sort value, id) of the last result on a page"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    (sort value, id) from a page cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        sort_value, id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {str(e)}")
+    if not isinstance(sort_value, (int, float)) or not isinstance(id, str):
+        raise ValueError("Invalid page cursor")
+    return sort_value, id
 
 class Resume:
     """Class for managing resume information and analysis results"""
@@ -49,19 +41,171 @@ class Resume:
     @staticmethod
     def get_all():
         """Get all resumes"""
-        return load_json_file(RESUMES_JSON)
+        return get_store('resumes').all()
     
     @staticmethod
     def get_by_id(id):
         """Get resume by ID"""
-        resumes = load_json_file(RESUMES_JSON)
-        return next((r for r in resumes if r['id'] == id), None)
+        return get_store('resumes').get(id)
     
     @staticmethod
     def get_by_job_id(job_id):
         """Get all resumes for a job description"""
-        resumes = load_json_file(RESUMES_JSON)
-        return [r for r in resumes if r['job_description_id'] == job_id]
+        return get_store('resumes').find('job_description_id', job_id)
+    
+    @staticmethod
+    def iter_by_job_id(job_id):
+        """Iterate over the resumes for a job description one at a time"""
+        for record in get_store('resumes').iter_find('job_description_id', job_id):
+            yield Resume(**record)
+    
+    @staticmethod
+    def rerank(job_id, weights=None):
+        """
+        Rank the resumes for a job under custom weights, from their stored
+        component scores. Only the scores are read from storage and they are
+        combined in a single vectorized pass; nothing is re-analyzed or saved.
+        
+        Args:
+            job_id (str): Job description ID
+            weights (dict): Custom weights, see ResumeAnalyzer.normalize_weights
+            
+        Returns:
+            list: Dicts with 'id', 'candidate_name', 'score', 'stored_score'
+                and 'rank', best first
+        """
+        paths = ['id', 'candidate_name', 'score'] + [
+            f'detailed_analysis.component_scores.{component}' for component in WEIGHT_COMPONENTS.values()
+        ]
+        rows = get_store('resumes').select('job_description_id', job_id, paths)
+        if not rows:
+            ResumeAnalyzer.normalize_weights(weights)  # Still report bad weights
+            return []
+        
+        components = np.array([row[3:] for row in rows], dtype=np.float64)
+        scores = ResumeAnalyzer.rescore(components, weights)
+        order = np.argsort(-scores, kind='stable')
+        return [
+            {
+                'id': rows[i][0],
+                'candidate_name': rows[i][1],
+                'score': float(scores[i]),
+                'stored_score': rows[i][2],
+                'rank': rank
+            }
+            for rank, i in enumerate(order, start=1)
+        ]
+    
+    @staticmethod
+    def result_conditions(min_score=None, skills=(), min_education=None, required_skills=False):
+        """
+        Storage conditions for filtering a job's results.
+        
+        Args:
+            min_score (float): Minimum overall score
+            skills (list): Skills each resume must list
+            min_education (str): Minimum education level, a key of EDUCATION_LEVELS
+            required_skills (bool): Only resumes with every required skill of the job
+            
+        Returns:
+            list: Conditions for the store's page, count and select
+            
+        Raises:
+            ValueError: If the education level is unknown
+        """
+        conditions = []
+        if min_score is not None:
+            conditions.append(('gte', 'score', float(min_score)))
+        for skill in skills:
+            conditions.append(('has', 'skills', skill))
+        if min_education:
+            level = min_education.lower()
+            if level not in EDUCATION_LEVELS:
+                raise ValueError(f"Unknown education level: {min_education}")
+            # Same substring test the analyzer uses to find a candidate's level
+            conditions.append(('contains_any', 'education', [
+                name for name, score in EDUCATION_LEVELS.items() if score >= EDUCATION_LEVELS[level]
+            ]))
+        if required_skills:
+            conditions.append(('gte', 'detailed_analysis.component_scores.required_skills_match', 100))
+        return conditions
+    
+    @staticmethod
+    def count_by_job_id(job_id, conditions=()):
+        """Number of resumes for a job description meeting the conditions"""
+        return get_store('resumes').count('job_description_id', job_id, conditions)
+    
+    @staticmethod
+    def page_by_job_id(job_id, sort='score', descending=True, conditions=(), cursor=None,
+                       limit=RESULTS_PAGE_SIZE, weights=None):
+        """
+        Get one page of a job's results, sorted and filtered in storage.
+        Pages are keyset based: the cursor returned with a page fetches the
+        next one, so each page costs the same however deep it is.
+        
+        Args:
+            job_id (str): Job description ID
+            sort (str): Key of RESULT_SORTS - the overall score or a component score
+            descending (bool): Best first
+            conditions (list): Filters, see result_conditions
+            cursor (str): next_cursor of the previous page; None for the first page
+            limit (int): Page size
+            weights (dict): Rank by the overall score recombined under these
+                weights (see rerank) instead of sort
+            
+        Returns:
+            dict: 'resumes' (Resume objects), 'sort_values' (the value each was
+                ranked by) and 'next_cursor' (None on the last page)
+            
+        Raises:
+            ValueError: If the sort key, cursor or weights are invalid
+        """
+        if sort not in RESULT_SORTS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        after = decode_cursor(cursor) if cursor else None
+        
+        # One extra row tells whether there is a next page
+        if weights is not None:
+            rows = Resume._reranked_page(job_id, weights, descending, conditions, after, limit + 1)
+        else:
+            rows = get_store('resumes').page('job_description_id', job_id, RESULT_SORTS[sort],
+                                             descending, conditions, after, limit + 1)
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(page[-1][1], page[-1][0]['id'])
+        return {
+            'resumes': [Resume(**record) for record, _ in page],
+            'sort_values': [sort_value for _, sort_value in page],
+            'next_cursor': next_cursor
+        }
+    
+    @staticmethod
+    def _reranked_page(job_id, weights, descending, conditions, after, limit):
+        """
+        One page of (record, score) pairs ranked under custom weights. There
+        is no index on a custom ranking, so every matching resume's component
+        scores are recombined, but only the page's records are loaded.
+        """
+        store = get_store('resumes')
+        paths = ['id'] + [f'detailed_analysis.component_scores.{component}' for component in WEIGHT_COMPONENTS.values()]
+        rows = store.select('job_description_id', job_id, paths, conditions)
+        if not rows:
+            ResumeAnalyzer.normalize_weights(weights)  # Still report bad weights
+            return []
+        
+        scores = ResumeAnalyzer.rescore(np.array([row[1:] for row in rows], dtype=np.float64), weights)
+        keyed = [(float(score), row[0]) for score, row in zip(scores, rows)]
+        if after is not None:
+            after = tuple(after)
+            keyed = [key for key in keyed if (key < after if descending else key > after)]
+        select = heapq.nlargest if descending else heapq.nsmallest
+        page = []
+        for score, id in select(limit, keyed):
+            record = store.get(id)
+            if record is not None:
+                page.append((record, score))
+        return page
     
     def __init__(self, id=None, **kwargs):
         if id is None and 'id' in kwargs:
@@ -90,40 +234,31 @@ class Resume:
         return super().__dir__() + list(self.data.keys())
         
     def save(self):
-        """Save resume to JSON storage"""
-        resumes = load_json_file(RESUMES_JSON)
-        
-        # Update existing or add new
+        """Save resume to storage, updating it if it already exists"""
         self.data['id'] = self.id
-        existing_idx = next((i for i, r in enumerate(resumes) if r['id'] == self.id), None)
-        
-        if existing_idx is not None:
-            resumes[existing_idx] = self.data
-        else:
-            resumes.append(self.data)
-        
-        save_json_file(RESUMES_JSON, resumes)
+        get_store('resumes').upsert(self.data)
+    
+    @staticmethod
+    def save_many(resumes):
+        """Save many resumes in a single storage write"""
+        for resume in resumes:
+            resume.data['id'] = resume.id
+        get_store('resumes').upsert_many([resume.data for resume in resumes])
     
     def get_analysis(self, reanalyze=False):
         """Get detailed analysis results for the resume"""
         if not reanalyze and self.data.get('detailed_analysis'):
             return self.data['detailed_analysis']
         
-        # Create resume data dict for analyzer
-        resume_data = {
-            'name': self.data.get('candidate_name'),
-            'email': self.data.get('email'),
-            'phone': self.data.get('phone'),
-            'skills': self.get_skills_list(),
-            'education': self.data.get('education'),
-            'experience': self.data.get('experience')
-        }
+        resume_data = self.to_resume_data()
         
-        # Get job description
-        job_desc = JobDescription.get_by_id(self.data['job_description_id'])
+        # Get job description and its precomputed profile
+        job_desc = JobDescription(**JobDescription.get_by_id(self.data['job_description_id']))
+        bert_model = get_embedding_model()
+        job_profile = job_desc.get_profile(bert_model)
         
         # Perform analysis
-        analyzer = ResumeAnalyzer(resume_data, job_desc['text'])
+        analyzer = ResumeAnalyzer(resume_data, job_desc.text, bert_model=bert_model, job_profile=job_profile)
         analysis_results = analyzer.calculate_score()
         
         # Store results
@@ -131,8 +266,24 @@ class Resume:
         self.data['score'] = analysis_results['overall_score']
         self.save()
         
+        # Keep the candidate search index up to date
+        if bert_model and job_profile.has_embeddings:
+            get_resume_index(job_profile.model_name).add(
+                [self.id], ResumeAnalyzer.embed_resumes([resume_data], bert_model, job_profile.model_name))
+        
         return analysis_results
     
+    def to_resume_data(self):
+        """Stored fields in the form ResumeAnalyzer expects from ResumeParser"""
+        return {
+            'name': self.data.get('candidate_name'),
+            'email': self.data.get('email'),
+            'phone': self.data.get('phone'),
+            'skills': self.get_skills_list(),
+            'education': self.data.get('education'),
+            'experience': self.data.get('experience')
+        }
+    
     def get_skills_list(self):
         """Convert skills string to list"""
         skills = self.data.get('skills', '')
@@ -146,13 +297,12 @@ class JobDescription:
     @staticmethod
     def get_all():
         """Get all job descriptions"""
-        return load_json_file(JOB_DESCRIPTIONS_JSON)
+        return get_store('job_descriptions').all()
     
     @staticmethod
     def get_by_id(id):
         """Get job description by ID"""
-        jobs = load_json_file(JOB_DESCRIPTIONS_JSON)
-        return next((j for j in jobs if j['id'] == id), None)
+        return get_store('job_descriptions').get(id)
     
     def __init__(self, id=None, **kwargs):
         if id is None and 'id' in kwargs:
@@ -169,18 +319,98 @@ class JobDescription:
     def __dir__(self):
         """List available attributes for autocompletion"""
         return super().__dir__() + list(self.data.keys())
+    
+    def get_profile(self, bert_model=None):
+        """
+        Get the precomputed analysis of this job description, building it on
+        first use. The profile is stored with the job description (keyed by a
+        hash of its text) and its embeddings are saved next to the job file.
+        """
+        embeddings_path = None
+        if self.data.get('path'):
+            embeddings_path = os.path.splitext(self.data['path'])[0] + '.profile.npz'
         
-    def save(self):
-        """Save job description to JSON storage"""
-        jobs = load_json_file(JOB_DESCRIPTIONS_JSON)
+        profile, stale = get_job_profile(
+            self.data.get('text', ''),
+            bert_model,
+            stored=self.data.get('profile'),
+            embeddings_path=embeddings_path
+        )
+        if stale:
+            self.data['profile'] = profile.to_dict()
+            self.save()
+        return profile
+    
+    def find_candidates(self, top_k=20, shortlist=VECTOR_INDEX_SHORTLIST, bert_model=None):
+        """
+        Find the best fitting resumes in the whole corpus, whatever job they
+        were uploaded for. The resume index returns the shortlist most
+        similar to this job description, and only the shortlist is fully
+        scored with ResumeAnalyzer. Nothing is saved.
         
-        # Update existing or add new
-        self.data['id'] = self.id
-        existing_idx = next((i for i, j in enumerate(jobs) if j['id'] == self.id), None)
+        Args:
+            top_k (int): Number of candidates to return
+            shortlist (int): Number of resumes retrieved and fully scored
+            bert_model: Embedding model; defaults to the shared model
+            
+        Returns:
+            list: Dicts with 'resume_id', 'candidate_name', 'original_filename',
+                'job_description_id', 'similarity', 'score' and
+                'component_scores', best first
+        """
+        if bert_model is None:
+            bert_model = get_embedding_model()
+        profile = self.get_profile(bert_model)
+        if not profile.has_embeddings:
+            return []
         
-        if existing_idx is not None:
-            jobs[existing_idx] = self.data
-        else:
-            jobs.append(self.data)
+        hits = get_resume_index(profile.model_name).search(profile.text_embedding, max(shortlist, top_k))
+        
+        # The same file uploaded for several jobs is only scored once
+        resumes = []
+        similarities = []
+        seen = set()
+        for resume_id, similarity in hits:
+            resume_data = Resume.get_by_id(resume_id)
+            if not resume_data:
+                continue
+            resume = Resume(**resume_data)
+            key = resume.data.get('content_hash') or resume.id
+            if key in seen:
+                continue
+            seen.add(key)
+            resumes.append(resume)
+            similarities.append(similarity)
         
-        save_json_file(JOB_DESCRIPTIONS_JSON, jobs)
\ No newline at end of file
+        analyses = ResumeAnalyzer.score_batch(
+            [resume.to_resume_data() for resume in resumes],
+            self.data.get('text', ''),
+            job_profile=profile,
+            bert_model=bert_model
+        )
+        candidates = [
+            {
+                'resume_id': resume.id,
+                'candidate_name': resume.data.get('candidate_name'),
+                'original_filename': resume.data.get('original_filename'),
+                'job_description_id': resume.data.get('job_description_id'),
+                'similarity': round(similarity, 4),
+                'score': analysis['overall_score'],
+                'component_scores': analysis['component_scores']
+            }
+            for resume, similarity, analysis in zip(resumes, similarities, analyses)
+        ]
+        candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+        return candidates[:top_k]
+        
+    def save(self):
+        """Save job description to storage, updating it if it already exists"""
+        self.data['id'] = self.id
+        get_store('job_descriptions').upsert(self.data)
+    
+    @staticmethod
+    def save_many(jobs):
+        """Save many job descriptions in a single storage write"""
+        for job in jobs:
+            job.data['id'] = job.id
+        get_store('job_descriptions').upsert_many([job.data for job in jobs])
\ No newline at end of file
@@ -0,0 +1,755 @@
+import os
+import re
+import json
+import heapq
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+import numpy as np
+from app.utils.file_lock import file_lock
+from config import (STORAGE_BACKEND, SQLITE_DB_PATH, RESUMES_JSON, JOB_DESCRIPTIONS_JSON,
+                    JSON_LOG_COMPACT_BYTES)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class NumpyJSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super().default(obj)
+
+def load_json_file(filepath):
+    """
+    Load the list of records in a JSON file. The file is never modified, so
+    this is safe under a shared lock.
+
+    Returns:
+        list: The records; empty if the file doesn't exist or is blank, as
+            the data files are shipped
+
+    Raises:
+        ValueError: If the file exists but cannot be read or decoded
+    """
+    try:
+        with open(filepath, 'r') as f:
+            content = f.read()
+        return json.loads(content) if content.strip() else []
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read JSON file {filepath}: {str(e)}")
+
+def save_json_file(filepath, data):
+    """Save data to JSON file using custom encoder for numpy types"""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w') as f:
+        json.dump(data, f, indent=2, cls=NumpyJSONEncoder)
+
+
+def _dig(record, path):
+    """Value at a dotted path in a record, or None if any part is missing"""
+    value = record
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+# Record queries filter with conditions of the form (op, path, value):
+#   ('gte', path, number)         - the value at path is at least number
+#   ('has', path, item)           - the list at path holds item (ignoring case)
+#   ('contains_any', path, words) - the text at path contains one of the words
+#                                   (ignoring case)
+CONDITION_OPS = ('gte', 'has', 'contains_any')
+
+PATH_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def _check_conditions(conditions):
+    """Validate query conditions, raising ValueError for bad ones"""
+    for op, path, _ in conditions:
+        if op not in CONDITION_OPS:
+            raise ValueError(f"Unknown condition: {op}")
+        if not PATH_PATTERN.match(path):
+            raise ValueError(f"Invalid record path: {path}")
+
+
+def _matches(record, conditions):
+    """Whether a record meets every condition"""
+    for op, path, value in conditions:
+        found = _dig(record, path)
+        if op == 'gte':
+            if not isinstance(found, (int, float)) or found < value:
+                return False
+        elif op == 'has':
+            items = found if isinstance(found, list) else [found]
+            if not any(isinstance(item, str) and item.strip().lower() == value.lower() for item in items):
+                return False
+        elif op == 'contains_any':
+            text = found.lower() if isinstance(found, str) else ''
+            if not any(word.lower() in text for word in value):
+                return False
+    return True
+
+
+def _sort_value(record, path):
+    """Sort key value of a record; missing values sort as 0"""
+    value = _dig(record, path)
+    return value if isinstance(value, (int, float)) else 0
+
+
+class JSONStore:
+    """
+    Record store backed by a JSON snapshot file plus an append-only log.
+
+    The snapshot (the original JSON file holding a list of records) is only
+    ever replaced atomically. Each save appends one line to ``<file>.log``,
+    so saving a record costs the size of that record rather than a rewrite
+    of every record. Writers hold an exclusive lock on ``<file>.lock``, so
+    concurrent processes never lose each other's updates. Reading replays
+    the log over the snapshot; a line torn by a crash is ignored. Once the
+    log outgrows the snapshot it is compacted into a new snapshot written to
+    a temporary file and renamed into place.
+
+    Parsed records are cached per process together with the mtime and size
+    of both files, with indexes by ID and by job_description_id. The files
+    are re-read only when they change: if only the log grew, just the new
+    lines are read. Writes update the cache directly so it never serves
+    stale data.
+    """
+
+    INDEXED_FIELDS = ('job_description_id',)
+
+    def __init__(self, path, compact_bytes=JSON_LOG_COMPACT_BYTES):
+        self.path = path
+        self.log_path = path + '.log'
+        self.lock_path = path + '.lock'
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._snapshot_signature = None
+        self._log_offset = 0
+        self._records = []
+        self._by_id = {}
+        self._positions = {}
+        self._by_field = {}
+        self._snapshot_readable = True
+
+    @staticmethod
+    def _signature(path):
+        """(inode, mtime, size) of a file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _set_records(self, records):
+        """Replace the cached records and rebuild the indexes"""
+        self._records = []
+        self._by_id = {}
+        self._positions = {}
+        self._by_field = {field: {} for field in self.INDEXED_FIELDS}
+        for record in records:
+            self._apply(record)
+
+    def _apply(self, record):
+        """Insert or replace one record in the cache"""
+        id = record['id']
+        old = self._by_id.get(id)
+        if old is not None:
+            self._records[self._positions[id]] = record
+            for field, index in self._by_field.items():
+                index[old.get(field)] = [r for r in index.get(old.get(field), []) if r['id'] != id]
+        else:
+            self._positions[id] = len(self._records)
+            self._records.append(record)
+        self._by_id[id] = record
+        for field, index in self._by_field.items():
+            index.setdefault(record.get(field), []).append(record)
+
+    def _replay_log(self, offset):
+        """
+        Apply log lines written since offset. A trailing line without a
+        newline is a write torn by a crash and is left unread.
+
+        Returns:
+            int: Offset just after the last complete line
+        """
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return 0
+
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.error(f"Skipping unreadable entry in {self.log_path}")
+                continue
+            if entry.get('op') == 'upsert':
+                self._apply(entry['record'])
+        return offset + end
+
+    def _refresh(self):
+        """Bring the cache up to date with the snapshot and the log"""
+        snapshot_signature = self._signature(self.path)
+        log_signature = self._signature(self.log_path)
+        log_size = log_signature[2] if log_signature else 0
+
+        if snapshot_signature is None or snapshot_signature != self._snapshot_signature or \
+                log_size < self._log_offset:
+            # Snapshot replaced (compaction by any process): reload everything
+            try:
+                records = load_json_file(self.path)
+                self._snapshot_readable = True
+            except ValueError as e:
+                # Leave the file in place for repair; writes still go to the log
+                logger.error(f"{str(e)}. Serving logged records only; compaction is disabled "
+                             f"until the snapshot is repaired")
+                records = []
+                self._snapshot_readable = False
+            self._set_records(records)
+            self._snapshot_signature = self._signature(self.path)
+            self._log_offset = self._replay_log(0)
+        elif log_size > self._log_offset:
+            # Only the log grew: apply the new entries
+            self._log_offset = self._replay_log(self._log_offset)
+
+    def _read(self):
+        """Refresh the cache under a shared lock"""
+        with file_lock(self.lock_path, shared=True):
+            self._refresh()
+
+    def all(self):
+        """Get all records"""
+        with self._lock:
+            self._read()
+            return [dict(r) for r in self._records]
+
+    def get(self, id):
+        """Get a record by ID, or None"""
+        with self._lock:
+            self._read()
+            record = self._by_id.get(id)
+            return dict(record) if record is not None else None
+
+    def find(self, field, value):
+        """Get all records whose field equals value"""
+        with self._lock:
+            self._read()
+            if field in self._by_field:
+                return [dict(r) for r in self._by_field[field].get(value, [])]
+            return [dict(r) for r in self._records if r.get(field) == value]
+
+    def iter_find(self, field, value):
+        """Iterate over the records whose field equals value"""
+        with self._lock:
+            self._read()
+            if field in self._by_field:
+                records = list(self._by_field[field].get(value, []))
+            else:
+                records = [r for r in self._records if r.get(field) == value]
+        for record in records:
+            yield dict(record)
+
+    def _lookup(self, field, value, conditions=()):
+        """Cached records whose field equals value and that meet the conditions"""
+        _check_conditions(conditions)
+        self._read()
+        if field in self._by_field:
+            records = self._by_field[field].get(value, [])
+        else:
+            records = [r for r in self._records if r.get(field) == value]
+        if conditions:
+            records = [r for r in records if _matches(r, conditions)]
+        return records
+
+    def select(self, field, value, paths, conditions=()):
+        """
+        Get a few values from each record whose field equals value, without
+        copying whole records.
+
+        Args:
+            field (str): Field to look records up by
+            value: Value of that field
+            paths (list): Dotted paths into each record, e.g.
+                'detailed_analysis.component_scores.skills_match'
+            conditions (list): Only records meeting these, see CONDITION_OPS
+
+        Returns:
+            list: One tuple of values per record, None where a path is missing
+        """
+        with self._lock:
+            records = self._lookup(field, value, conditions)
+            return [tuple(_dig(r, path) for path in paths) for r in records]
+
+    def count(self, field, value, conditions=()):
+        """Number of records whose field equals value and that meet the conditions"""
+        with self._lock:
+            return len(self._lookup(field, value, conditions))
+
+    def page(self, field, value, sort='score', descending=True, conditions=(), after=None, limit=50):
+        """
+        Get one page of the records whose field equals value, ordered by
+        the value at a sort path and then by ID. Pages are keyset based:
+        pass the (sort value, id) of the last record of a page as after to
+        get the next one. Missing sort values sort as 0.
+
+        Args:
+            field (str): Field to look records up by
+            value: Value of that field
+            sort (str): Dotted path to order by
+            descending (bool): Largest first
+            conditions (list): Only records meeting these, see CONDITION_OPS
+            after (tuple): (sort value, id) of the last record already seen
+            limit (int): Maximum number of records
+
+        Returns:
+            list: (record, sort value) pairs
+        """
+        with self._lock:
+            records = self._lookup(field, value, conditions)
+            keyed = (((_sort_value(r, sort), r['id']), r) for r in records)
+            if after is not None:
+                after = tuple(after)
+                keyed = (item for item in keyed if (item[0] < after if descending else item[0] > after))
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return [(dict(r), key[0]) for key, r in select(limit, keyed, key=lambda item: item[0])]
+
+    def upsert(self, record):
+        """Insert a record, or replace the record with the same ID"""
+        self.upsert_many([record])
+
+    def upsert_many(self, records):
+        """
+        Insert or replace many records with a single append to the log.
+        If the batch has several records with the same ID, the last one wins.
+        """
+        batch = {}
+        for record in records:
+            batch[record['id']] = json.loads(json.dumps(record, cls=NumpyJSONEncoder))
+        if not batch:
+            return
+        data = ''.join(
+            json.dumps({'op': 'upsert', 'record': record}) + '\n' for record in batch.values()
+        ).encode('utf-8')
+
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            with open(self.log_path, 'ab') as f:
+                # Drop a torn line left by a writer that crashed mid-append
+                if f.tell() > self._log_offset:
+                    f.truncate(self._log_offset)
+                f.seek(self._log_offset)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                self._log_offset = f.tell()
+            for record in batch.values():
+                self._apply(record)
+
+            if self._log_offset > max(self.compact_bytes, self._snapshot_size()):
+                self._compact()
+
+    def _snapshot_size(self):
+        """Size of the snapshot file in bytes"""
+        signature = self._signature(self.path)
+        return signature[2] if signature else 0
+
+    def _compact(self):
+        """
+        Fold the log into a new snapshot. Called with the exclusive lock held.
+        The snapshot is written to a temporary file and renamed into place,
+        so a crash leaves either the old snapshot and log or the new snapshot.
+        Refused while the snapshot is unreadable, as the new snapshot would
+        hold only the logged records.
+        """
+        if not self._snapshot_readable:
+            logger.error(f"Not compacting {self.path}: the snapshot is unreadable")
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._records, f, cls=NumpyJSONEncoder)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Replaying the old log over the new snapshot would be harmless, so
+        # truncating it after the rename needs no extra care
+        with open(self.log_path, 'wb') as f:
+            os.fsync(f.fileno())
+        self._snapshot_signature = self._signature(self.path)
+        self._log_offset = 0
+        logger.info(f"Compacted {self.path}: {len(self._records)} records")
+
+    def recover(self):
+        """Replay the log after a restart and fold it into the snapshot"""
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            if self._signature(self.log_path):
+                self._compact()
+
+
+class SQLiteStore:
+    """
+    Record store backed by an SQLite table.
+
+    Each record is kept as JSON in a data column, with id as primary key and
+    indexed columns for job_description_id, score and created_at, so lookups
+    by ID or job are index reads and saving a record is a single upsert
+    instead of rewriting every record.
+
+    Pages of a job's records sorted by score or by one of the sort paths are
+    served from (job_description_id, sort value, id) indexes, the sort paths
+    through expression indexes on the JSON data.
+    """
+
+    INDEXED_FIELDS = ('job_description_id', 'score', 'created_at')
+
+    def __init__(self, db_path, table, sort_paths=()):
+        """
+        Args:
+            db_path (str): SQLite database file
+            table (str): Table holding the records
+            sort_paths (list): Dotted paths into the records that pages can
+                be sorted by, besides score
+        """
+        self.db_path = db_path
+        self.table = table
+        self.sort_paths = list(sort_paths)
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connection(self):
+        """Get this thread's connection, reconnecting after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        """Create the table and its indexes if needed"""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            with conn:
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        id TEXT PRIMARY KEY,
+                        job_description_id TEXT,
+                        score REAL,
+                        created_at TEXT,
+                        data TEXT NOT NULL
+                    )
+                ''')
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_job '
+                             f'ON {self.table} (job_description_id, score DESC)')
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_score ON {self.table} (score)')
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_created ON {self.table} (created_at)')
+                for path in ['score'] + self.sort_paths:
+                    name = path.rsplit('.', 1)[-1]
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_sort_{name} '
+                                 f'ON {self.table} (job_description_id, {self._sort_expression(path)}, id)')
+            self._schema_ready = True
+
+    def _expression(self, path):
+        """SQL expression for the value at a dotted path: a column or a JSON extract"""
+        if not PATH_PATTERN.match(path):
+            raise ValueError(f"Invalid record path: {path}")
+        if path == 'id' or path in self.INDEXED_FIELDS:
+            return path
+        # The path is inlined rather than bound so the expression matches
+        # the one the sort indexes were created on
+        return f"json_extract(data, '$.{path}')"
+
+    def _sort_expression(self, path):
+        """SQL expression records are ordered by; missing values sort as 0"""
+        return f'COALESCE({self._expression(path)}, 0)'
+
+    def _where(self, field, value, conditions):
+        """WHERE clause and parameters for a lookup by an indexed field plus conditions"""
+        if field not in self.INDEXED_FIELDS:
+            raise ValueError(f"Cannot look up {self.table} by unindexed field: {field}")
+        _check_conditions(conditions)
+        clauses = [f'{field} = ?']
+        params = [value]
+        for op, path, operand in conditions:
+            if op == 'gte':
+                clauses.append(f'{self._expression(path)} >= ?')
+                params.append(operand)
+            elif op == 'has':
+                clauses.append(f"EXISTS (SELECT 1 FROM json_each(data, '$.{path}') "
+                               f"WHERE lower(trim(json_each.value)) = ?)")
+                params.append(operand.strip().lower())
+            elif op == 'contains_any':
+                if not operand:
+                    clauses.append('0')
+                    continue
+                text = f'lower({self._expression(path)})'
+                clauses.append('(' + ' OR '.join(f'instr({text}, ?) > 0' for _ in operand) + ')')
+                params.extend(word.lower() for word in operand)
+        return ' AND '.join(clauses), params
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one transaction"""
+        conn = self._connection()
+        with conn:
+            yield conn
+
+    def is_empty(self):
+        """Whether the table holds no records"""
+        return self._connection().execute(f'SELECT 1 FROM {self.table} LIMIT 1').fetchone() is None
+
+    def all(self):
+        """Get all records"""
+        rows = self._connection().execute(f'SELECT data FROM {self.table} ORDER BY rowid')
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, id):
+        """Get a record by ID, or None"""
+        row = self._connection().execute(
+            f'SELECT data FROM {self.table} WHERE id = ?', (id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, field, value):
+        """Get all records whose indexed field equals value"""
+        if field not in self.INDEXED_FIELDS:
+            raise ValueError(f"Cannot look up {self.table} by unindexed field: {field}")
+        rows = self._connection().execute(
+            f'SELECT data FROM {self.table} WHERE {field} = ? ORDER BY rowid', (value,))
+        return [json.loads(data) for (data,) in rows]
+
+    def iter_find(self, field, value):
+        """
+        Iterate over the records whose indexed field equals value, decoding
+        one row at a time so memory use does not grow with the result.
+        """
+        if field not in self.INDEXED_FIELDS:
+            raise ValueError(f"Cannot look up {self.table} by unindexed field: {field}")
+        rows = self._connection().execute(
+            f'SELECT data FROM {self.table} WHERE {field} = ? ORDER BY rowid', (value,))
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def select(self, field, value, paths, conditions=()):
+        """
+        Get a few values from each record whose indexed field equals value.
+        The values are extracted by SQLite, so the records' JSON is never
+        decoded in Python.
+
+        Args:
+            field (str): Indexed field to look records up by
+            value: Value of that field
+            paths (list): Dotted paths into each record, e.g.
+                'detailed_analysis.component_scores.skills_match'
+            conditions (list): Only records meeting these, see CONDITION_OPS
+
+        Returns:
+            list: One tuple of values per record, None where a path is missing
+        """
+        where, params = self._where(field, value, conditions)
+        columns = ', '.join('json_extract(data, ?)' for _ in paths)
+        rows = self._connection().execute(
+            f'SELECT {columns} FROM {self.table} WHERE {where} ORDER BY rowid',
+            ['$.' + path for path in paths] + params)
+        return [tuple(row) for row in rows]
+
+    def count(self, field, value, conditions=()):
+        """Number of records whose indexed field equals value and that meet the conditions"""
+        where, params = self._where(field, value, conditions)
+        return self._connection().execute(
+            f'SELECT COUNT(*) FROM {self.table} WHERE {where}', params).fetchone()[0]
+
+    def page(self, field, value, sort='score', descending=True, conditions=(), after=None, limit=50):
+        """
+        Get one page of the records whose indexed field equals value,
+        ordered by the value at a sort path and then by ID. Pages are keyset
+        based: pass the (sort value, id) of the last record of a page as
+        after to get the next one, which SQLite finds by seeking in the
+        sort index instead of skipping the earlier pages.
+
+        Args:
+            field (str): Indexed field to look records up by
+            value: Value of that field
+            sort (str): 'score' or one of the store's sort paths
+            descending (bool): Largest first
+            conditions (list): Only records meeting these, see CONDITION_OPS
+            after (tuple): (sort value, id) of the last record already seen
+            limit (int): Maximum number of records
+
+        Returns:
+            list: (record, sort value) pairs
+        """
+        if sort != 'score' and sort not in self.sort_paths:
+            raise ValueError(f"Cannot sort {self.table} by {sort}")
+        where, params = self._where(field, value, conditions)
+        order = self._sort_expression(sort)
+        if after is not None:
+            # Equivalent to (order, id) < after, written so SQLite can seek
+            # to the bound in the index rather than filter every row before it
+            op = '<' if descending else '>'
+            where += f' AND {order} {op}= ? AND ({order} {op} ? OR id {op} ?)'
+            params.extend([after[0], after[0], after[1]])
+        direction = 'DESC' if descending else 'ASC'
+        rows = self._connection().execute(
+            f'SELECT data, {order} FROM {self.table} WHERE {where} '
+            f'ORDER BY {order} {direction}, id {direction} LIMIT ?',
+            params + [limit])
+        return [(json.loads(data), sort_value) for data, sort_value in rows]
+
+    def upsert(self, record):
+        """Insert a record, or replace the record with the same ID"""
+        self.upsert_many([record])
+
+    def upsert_many(self, records):
+        """
+        Insert or replace many records in one transaction. If the batch has
+        several records with the same ID, the last one wins.
+        """
+        batch = {}
+        for record in records:
+            batch[record['id']] = record
+        if not batch:
+            return
+        with self.transaction() as conn:
+            conn.executemany(f'''
+                INSERT INTO {self.table} (id, job_description_id, score, created_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    job_description_id = excluded.job_description_id,
+                    score = excluded.score,
+                    created_at = excluded.created_at,
+                    data = excluded.data
+            ''', [self._row(record) for record in batch.values()])
+
+    def _row(self, record):
+        """Column values for a record"""
+        score = record.get('score')
+        return (
+            record['id'],
+            record.get('job_description_id'),
+            float(score) if score is not None else None,
+            record.get('created_at'),
+            json.dumps(record, cls=NumpyJSONEncoder)
+        )
+
+
+# Record collections and the JSON files they used to live in
+COLLECTIONS = {
+    'resumes': RESUMES_JSON,
+    'job_descriptions': JOB_DESCRIPTIONS_JSON
+}
+
+# Paths into each collection's records that pages can be sorted by, besides score
+SORT_PATHS = {
+    'resumes': [
+        f'detailed_analysis.component_scores.{component}'
+        for component in ('skills_match', 'required_skills_match', 'experience_match',
+                          'education_match', 'semantic_similarity', 'lexical_similarity')
+    ],
+    'job_descriptions': []
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(name, backend=STORAGE_BACKEND):
+    """
+    Get the shared store for a collection ('resumes' or 'job_descriptions').
+
+    Args:
+        name (str): Collection name
+        backend (str): 'sqlite' or 'json'
+    """
+    key = (name, backend)
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                if backend == 'sqlite':
+                    _stores[key] = SQLiteStore(SQLITE_DB_PATH, name, SORT_PATHS[name])
+                elif backend == 'json':
+                    _stores[key] = JSONStore(COLLECTIONS[name])
+                else:
+                    raise ValueError(f"Unknown storage backend: {backend}")
+    return _stores[key]
+
+
+def recover_stores(backend=STORAGE_BACKEND):
+    """
+    Prepare the stores at startup. JSON logs are replayed and compacted.
+    SQLite recovers by itself, but on first start it is filled from the
+    JSON files, so switching backends does not hide existing records.
+    """
+    if backend == 'sqlite':
+        migrate_json_to_sqlite(only_empty=True)
+        return
+    if backend != 'json':
+        return
+    for name in COLLECTIONS:
+        get_store(name, backend).recover()
+
+
+def migrate_json_to_sqlite(only_empty=False):
+    """
+    Copy every record from the JSON files into the SQLite store, in one
+    transaction per collection. Safe to run more than once.
+
+    Args:
+        only_empty (bool): Only migrate collections whose SQLite table is
+            still empty, as on first start; collections without JSON
+            records are skipped quietly
+
+    Returns:
+        dict: Collection name -> number of records migrated
+    """
+    counts = {}
+    for name, json_path in COLLECTIONS.items():
+        if only_empty:
+            has_json = os.path.exists(json_path) or os.path.exists(json_path + '.log')
+            if not has_json or not get_store(name, backend='sqlite').is_empty():
+                continue
+        json_store = get_store(name, backend='json')
+        records = json_store.all()
+        if not json_store._snapshot_readable:
+            # A partial copy would count as migrated; leave it to be fixed and rerun
+            logger.error(f"Not migrating {name}: {json_path} is unreadable")
+            continue
+        if only_empty and not records:
+            continue  # Nothing to copy, e.g. the blank files of a fresh clone
+        get_store(name, backend='sqlite').upsert_many(records)
+        counts[name] = len(records)
+        logger.info(f"Migrated {len(records)} {name} from {json_path} to {SQLITE_DB_PATH}")
+    return counts
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] == ['migrate']:
+        print(migrate_json_to_sqlite())
+    else:
+        print("Usage: python -m app.models.storage migrate")
@@ -0,0 +1,138 @@
+import re
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+import numpy as np
+from app.utils.vector_index import VectorFile, safe_model_dir
+from config import (EMBEDDING_MODEL_NAME, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MEMORY_ITEMS,
+                    EMBEDDING_CACHE_DISK_ITEMS)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Collapse whitespace so formatting differences share one embedding"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def text_key(text):
+    """Hash of a normalized text, used as its cache key"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache of text embeddings keyed by (model name, hash of the normalized
+    text), so the same job description lines and resume texts are encoded
+    once. Recently used vectors are kept in an in-memory LRU; vectors are
+    also stored on disk, so re-scoring after a restart or a weight change
+    needs no model inference.
+
+    Once a model's disk tier holds more than disk_items vectors it is
+    compacted to 90% of that, keeping the vectors in this process's memory
+    tier (recently used) and then the most recently written ones.
+    """
+
+    def __init__(self, directory=EMBEDDING_CACHE_DIR, memory_items=EMBEDDING_CACHE_MEMORY_ITEMS,
+                 disk_items=EMBEDDING_CACHE_DISK_ITEMS):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._disk = {}
+        self._lock = threading.Lock()
+
+    def _disk_tier(self, model_name):
+        """Get the on-disk tier for a model"""
+        tier = self._disk.get(model_name)
+        if tier is None:
+            tier = self._disk[model_name] = VectorFile(safe_model_dir(self.directory, model_name))
+        return tier
+
+    def _remember(self, model_name, key, vector):
+        """Add a vector to the memory tier, evicting the least recently used"""
+        self._memory[(model_name, key)] = vector
+        self._memory.move_to_end((model_name, key))
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def encode(self, bert_model, texts, model_name=EMBEDDING_MODEL_NAME):
+        """
+        Embed texts, encoding only those not cached yet.
+
+        Args:
+            bert_model: SentenceTransformer-style model with encode()
+            texts (list): Texts to embed
+            model_name (str): Name of the model, part of the cache key
+
+        Returns:
+            np.ndarray: Normalized float32 embeddings, one row per text
+        """
+        normalized = [normalize_text(text) for text in texts]
+        keys = [text_key(text) for text in normalized]
+        vectors = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get((model_name, key))
+                if vector is not None:
+                    self._memory.move_to_end((model_name, key))
+                    vectors[key] = vector
+
+            missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+            if missing:
+                tier = self._disk_tier(model_name)
+                tier.refresh()
+                try:
+                    for key, vector in tier.get(missing).items():
+                        vectors[key] = vector
+                        self._remember(model_name, key, vector)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error reading embedding cache {tier.directory}: {str(e)}")
+
+        # Encode what is left, each distinct text once
+        to_encode = {}
+        for key, text in zip(keys, normalized):
+            if key not in vectors:
+                to_encode.setdefault(key, text)
+        if to_encode:
+            encoded = np.asarray(
+                bert_model.encode(list(to_encode.values()), normalize_embeddings=True),
+                dtype=np.float32
+            )
+            new_items = list(zip(to_encode, encoded))
+            with self._lock:
+                for key, vector in new_items:
+                    vectors[key] = vector
+                    self._remember(model_name, key, vector)
+                tier = self._disk_tier(model_name)
+                tier.put(new_items)
+                if len(tier.rows) > self.disk_items:
+                    self._evict(model_name, tier)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+
+    def _evict(self, model_name, tier):
+        """Compact a disk tier down to 90% of disk_items, least recently used out first"""
+        target = int(self.disk_items * 0.9)
+        recent = [key for name, key in reversed(self._memory) if name == model_name]
+
+        def keep(keys_by_age):
+            kept = dict.fromkeys(recent[:target])
+            for key in reversed(keys_by_age):
+                if len(kept) >= target:
+                    break
+                kept.setdefault(key, None)
+            return list(kept)
+
+        tier.compact(keep)
+
+
+# Shared cache for the whole process
+embedding_cache = EmbeddingCache()
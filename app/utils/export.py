@@ -1,189 +1,260 @@
 import csv
 import io
-import json
 import logging
+from app.utils.skills import taxonomy
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def export_to_csv(resumes):
+
+def format_list(data):
+    """Format list data as a comma-separated string"""
+    if isinstance(data, list):
+        return ", ".join(str(item) for item in data)
+    elif isinstance(data, str):
+        return data
+    return ""
+
+
+def _field(name, default=''):
+    """Column getter for a stored resume field"""
+    return lambda data, context: data.get(name, default)
+
+
+def _list_field(name):
+    """Column getter for a stored list field, formatted as a string"""
+    return lambda data, context: format_list(data.get(name, []))
+
+
+def _score(name):
+    """Column getter for a component score"""
+    return lambda data, context: float(context['scores'].get(name, 0) or 0)
+
+
+# Export columns as (key, CSV header, getter, CSV number format). Getters take
+# the stored resume data and a per-row context of values derived from it.
+EXPORT_COLUMNS = [
+    # Basic Information
+    ('candidate_name', 'Candidate Name', _field('candidate_name'), None),
+    ('email', 'Email', _field('email'), None),
+    ('phone', 'Phone', _field('phone'), None),
+    ('location', 'Location', _field('location'), None),
+
+    # Online Presence
+    ('linkedin_url', 'LinkedIn URL', _field('linkedin_url'), None),
+    ('github_url', 'GitHub URL', _field('github_url'), None),
+    ('portfolio_url', 'Portfolio URL', _field('portfolio_url'), None),
+    ('other_urls', 'Other URLs', _list_field('other_urls'), None),
+
+    # Analysis Scores
+    ('overall_score', 'Overall Score (%)', lambda data, context: float(data.get('score', 0) or 0), '.1f'),
+    ('skills_match', 'Skills Match Score (%)', _score('skills_match'), '.1f'),
+    ('required_skills_match', 'Required Skills Match (%)', _score('required_skills_match'), '.1f'),
+    ('experience_match', 'Experience Match Score (%)', _score('experience_match'), '.1f'),
+    ('education_match', 'Education Match Score (%)', _score('education_match'), '.1f'),
+    ('semantic_similarity', 'Semantic Similarity Score (%)', _score('semantic_similarity'), '.1f'),
+
+    # Skills and Expertise, split by taxonomy category
+    ('technical_skills', 'Technical Skills',
+     lambda data, context: format_list(context['skills_by_category'].get('technical', [])), None),
+    ('soft_skills', 'Soft Skills',
+     lambda data, context: format_list(context['skills_by_category'].get('soft', []) or data.get('soft_skills', [])),
+     None),
+    ('languages', 'Languages', _list_field('languages'), None),
+    ('certifications', 'Certifications', _list_field('certifications'), None),
+    ('missing_required_skills', 'Missing Required Skills',
+     lambda data, context: format_list(context['skills_analysis'].get('missing_skills', [])), None),
+
+    # Education
+    ('education_level', 'Education Level', _field('education_level'), None),
+    ('field_of_study', 'Field of Study', _field('field_of_study'), None),
+    ('universities', 'Universities/Institutions', _field('universities'), None),
+    ('gpa', 'GPA', _field('gpa'), None),
+    ('academic_awards', 'Academic Awards', _list_field('academic_awards'), None),
+    ('graduation_years', 'Graduation Years', _field('graduation_years'), None),
+
+    # Work Experience
+    ('total_years_experience', 'Years of Experience', _field('total_years_experience'), None),
+    ('current_position', 'Current Position', _field('current_position'), None),
+    ('current_company', 'Current Company', _field('current_company'), None),
+    ('previous_positions', 'Previous Positions', _list_field('previous_positions'), None),
+    ('companies', 'Companies Worked For', _list_field('companies'), None),
+
+    # Research and Publications
+    ('research_papers', 'Research Papers', _list_field('research_papers'), None),
+    ('publications', 'Publications', _list_field('publications'), None),
+    ('patents', 'Patents', _list_field('patents'), None),
+    ('research_areas', 'Research Areas', _list_field('research_areas'), None),
+
+    # Projects
+    ('projects', 'Notable Projects', _list_field('projects'), None),
+    ('project_technologies', 'Project Technologies', _list_field('project_technologies'), None),
+    ('project_links', 'Project Links', _list_field('project_links'), None),
+
+    # Leadership and Activities
+    ('leadership_roles', 'Leadership Roles', _list_field('leadership_roles'), None),
+    ('volunteer_work', 'Volunteer Work', _list_field('volunteer_work'), None),
+    ('extracurricular', 'Extracurricular Activities', _list_field('extracurricular'), None),
+
+    # Personal
+    ('interests', 'Interests/Hobbies', _list_field('interests'), None),
+    ('achievements', 'Achievements', _list_field('achievements'), None),
+
+    # Metadata
+    ('original_filename', 'Original Filename', _field('original_filename'), None),
+    ('created_at', 'Upload Date', _field('created_at'), None),
+    ('updated_at', 'Last Updated', _field('updated_at'), None)
+]
+
+EXPORT_COLUMN_KEYS = [key for key, _, _, _ in EXPORT_COLUMNS]
+
+# Columnar formats and the pandas writer for each
+COLUMNAR_FORMATS = {
+    'parquet': 'to_parquet',
+    'feather': 'to_feather'
+}
+
+
+def select_columns(columns=None):
+    """
+    Get the export column specs to write.
+
+    Args:
+        columns (list): Column keys from EXPORT_COLUMN_KEYS, in output order;
+            all columns if None or empty
+
+    Raises:
+        ValueError: If a column key is unknown
+    """
+    if not columns:
+        return EXPORT_COLUMNS
+    specs = {spec[0]: spec for spec in EXPORT_COLUMNS}
+    unknown = [key for key in columns if key not in specs]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return [specs[key] for key in columns]
+
+
+def _row_values(resume, specs):
+    """Raw values of the selected columns for one resume"""
+    data = resume.data
+    analysis = data.get('detailed_analysis') or {}
+    context = {
+        'scores': analysis.get('component_scores') or {},
+        'skills_analysis': analysis.get('skills_analysis') or {},
+        'skills_by_category': taxonomy.split_by_category(resume.get_skills_list())
+    }
+    return [getter(data, context) for _, _, getter, _ in specs]
+
+
+def _fallback_values(resume, specs):
+    """
+    Basic info for a resume whose row could not be built. Numeric columns
+    are left empty (None) so they keep their type in columnar exports.
+    """
+    fallback = {
+        'candidate_name': resume.data.get('candidate_name', 'Unknown'),
+        'email': resume.data.get('email', ''),
+        'phone': resume.data.get('phone', '')
+    }
+    return [None if number_format else fallback.get(key, '')
+            for key, _, _, number_format in specs]
+
+
+def iter_csv(resumes, columns=None):
+    """
+    Export resume analysis results as CSV, one row at a time, so a response
+    can be streamed with constant memory however many resumes a job has.
+
+    Args:
+        resumes: Iterable of Resume objects
+        columns (list): Column keys to export; all columns if None
+
+    Yields:
+        str: The header line, then one CSV line per resume
+    """
+    specs = select_columns(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow([header for _, header, _, _ in specs])
+    yield flush()
+
+    for resume in resumes:
+        try:
+            values = _row_values(resume, specs)
+            writer.writerow([
+                format(value, number_format) if number_format else value
+                for value, (_, _, _, number_format) in zip(values, specs)
+            ])
+        except Exception as e:
+            logger.error(f"Error processing resume in CSV export: {str(e)}")
+            writer.writerow(_fallback_values(resume, specs))
+        yield flush()
+
+
+def export_to_csv(resumes, columns=None):
     """
     Export resume analysis results to CSV format with detailed breakdowns
     """
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header row with all fields
-        writer.writerow([
-            # Basic Information
-            'Candidate Name',
-            'Email',
-            'Phone',
-            'Location',
-            
-            # Online Presence
-            'LinkedIn URL',
-            'GitHub URL',
-            'Portfolio URL',
-            'Other URLs',
-            
-            # Analysis Scores
-            'Overall Score (%)',
-            'Skills Match Score (%)',
-            'Required Skills Match (%)',
-            'Experience Match Score (%)',
-            'Education Match Score (%)',
-            'Semantic Similarity Score (%)',
-            
-            # Skills and Expertise
-            'Technical Skills',
-            'Soft Skills',
-            'Languages',
-            'Certifications',
-            'Missing Required Skills',
-            
-            # Education
-            'Education Level',
-            'Field of Study',
-            'Universities/Institutions',
-            'GPA',
-            'Academic Awards',
-            'Graduation Years',
-            
-            # Work Experience
-            'Years of Experience',
-            'Current Position',
-            'Current Company',
-            'Previous Positions',
-            'Companies Worked For',
-            
-            # Research and Publications
-            'Research Papers',
-            'Publications',
-            'Patents',
-            'Research Areas',
-            
-            # Projects
-            'Notable Projects',
-            'Project Technologies',
-            'Project Links',
-            
-            # Leadership and Activities
-            'Leadership Roles',
-            'Volunteer Work',
-            'Extracurricular Activities',
-            
-            # Personal
-            'Interests/Hobbies',
-            'Achievements',
-            
-            # Metadata
-            'Original Filename',
-            'Upload Date',
-            'Last Updated'
-        ])
-        
-        # Write data rows
-        for resume in resumes:
-            try:
-                # Get data from resume object
-                data = resume.data
-                # Get detailed analysis
-                analysis = data.get('detailed_analysis', {})
-                scores = analysis.get('component_scores', {})
-                skills_analysis = analysis.get('skills_analysis', {})
-                
-                # Helper function to format list data
-                def format_list(data):
-                    if isinstance(data, list):
-                        return ", ".join(str(item) for item in data)
-                    elif isinstance(data, str):
-                        return data
-                    return ""
-                
-                # Write the row with all fields
-                writer.writerow([
-                    # Basic Information
-                    data.get('candidate_name', ''),
-                    data.get('email', ''),
-                    data.get('phone', ''),
-                    data.get('location', ''),
-                    
-                    # Online Presence
-                    data.get('linkedin_url', ''),
-                    data.get('github_url', ''),
-                    data.get('portfolio_url', ''),
-                    format_list(data.get('other_urls', [])),
-                    
-                    # Analysis Scores
-                    f"{data.get('score', 0):.1f}",
-                    f"{scores.get('skills_match', 0):.1f}",
-                    f"{scores.get('required_skills_match', 0):.1f}",
-                    f"{scores.get('experience_match', 0):.1f}",
-                    f"{scores.get('education_match', 0):.1f}",
-                    f"{scores.get('semantic_similarity', 0):.1f}",
-                    
-                    # Skills and Expertise
-                    format_list(resume.get_skills_list()),  # Use get_skills_list() method
-                    format_list(data.get('soft_skills', [])),
-                    format_list(data.get('languages', [])),
-                    format_list(data.get('certifications', [])),
-                    format_list(skills_analysis.get('missing_skills', [])),
-                    
-                    # Education
-                    data.get('education_level', ''),
-                    data.get('field_of_study', ''),
-                    data.get('universities', ''),
-                    data.get('gpa', ''),
-                    format_list(data.get('academic_awards', [])),
-                    data.get('graduation_years', ''),
-                    
-                    # Work Experience
-                    data.get('total_years_experience', ''),
-                    data.get('current_position', ''),
-                    data.get('current_company', ''),
-                    format_list(data.get('previous_positions', [])),
-                    format_list(data.get('companies', [])),
-                    
-                    # Research and Publications
-                    format_list(data.get('research_papers', [])),
-                    format_list(data.get('publications', [])),
-                    format_list(data.get('patents', [])),
-                    format_list(data.get('research_areas', [])),
-                    
-                    # Projects
-                    format_list(data.get('projects', [])),
-                    format_list(data.get('project_technologies', [])),
-                    format_list(data.get('project_links', [])),
-                    
-                    # Leadership and Activities
-                    format_list(data.get('leadership_roles', [])),
-                    format_list(data.get('volunteer_work', [])),
-                    format_list(data.get('extracurricular', [])),
-                    
-                    # Personal
-                    format_list(data.get('interests', [])),
-                    format_list(data.get('achievements', [])),
-                    
-                    # Metadata
-                    data.get('original_filename', ''),
-                    data.get('created_at', ''),
-                    data.get('updated_at', '')
-                ])
-                
-            except Exception as e:
-                logger.error(f"Error processing resume in CSV export: {str(e)}")
-                # Write basic info if processing fails
-                writer.writerow([
-                    resume.data.get('candidate_name', 'Unknown'), 
-                    resume.data.get('email', ''), 
-                    resume.data.get('phone', '')
-                ] + [""] * 40)
-        
-        return output.getvalue()
-        
+        return ''.join(iter_csv(resumes, columns))
     except Exception as e:
         logger.error(f"Error exporting to CSV: {str(e)}")
-        return "Error generating CSV export"
\ No newline at end of file
+        return "Error generating CSV export"
+
+
+def export_to_columnar(resumes, columns=None, format='parquet'):
+    """
+    Export resume analysis results in a columnar format for analytics tools.
+    Scores are kept as numbers and columns are named by their keys.
+    Requires pandas with pyarrow.
+
+    Args:
+        resumes: Iterable of Resume objects
+        columns (list): Column keys to export; all columns if None
+        format (str): 'parquet' or 'feather'
+
+    Returns:
+        bytes: The exported file
+
+    Raises:
+        ValueError: If the format or a column is unknown, or pyarrow is
+            not installed
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    specs = select_columns(columns)
+
+    import pandas as pd
+
+    rows = []
+    for resume in resumes:
+        try:
+            rows.append(_row_values(resume, specs))
+        except Exception as e:
+            logger.error(f"Error processing resume in {format} export: {str(e)}")
+            rows.append(_fallback_values(resume, specs))
+
+    frame = pd.DataFrame(rows, columns=[key for key, _, _, _ in specs])
+    # Mixed-type columns (e.g. numbers stored as text) are written as strings;
+    # scores stay floats, with missing ones as nulls
+    for key, _, _, number_format in specs:
+        if number_format is None:
+            frame[key] = frame[key].map(lambda value: '' if value is None else str(value))
+        else:
+            frame[key] = frame[key].astype('float64')
+
+    output = io.BytesIO()
+    try:
+        getattr(frame, COLUMNAR_FORMATS[format])(output)
+    except ImportError as e:
+        raise ValueError(f"{format} export needs pyarrow: {str(e)}")
+    return output.getvalue()
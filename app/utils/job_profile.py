@@ -0,0 +1,266 @@
+import os
+import hashlib
+import threading
+import logging
+import numpy as np
+from collections import OrderedDict
+from app.utils.skills import extract_skills_from_text
+from app.utils.embedding_cache import embedding_cache
+from app.utils.patterns import REQUIREMENT_PATTERNS, EXPERIENCE_REQUIREMENT_PATTERNS
+from config import EMBEDDING_MODEL_NAME, JOB_PROFILE_CACHE_SIZE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when the way a profile is derived from the job text changes
+PROFILE_VERSION = 1
+
+# Words marking a line as a requirement
+REQUIREMENT_KEYWORDS = ['required', 'must have', 'essential', 'necessary']
+
+# Education level hierarchy
+EDUCATION_LEVELS = {
+    'phd': 5,
+    'doctorate': 5,
+    'masters': 4,
+    'bachelors': 3,
+    'associate': 2,
+    'high school': 1
+}
+
+# Fields of study recognized in job descriptions and resumes
+FIELDS_OF_STUDY = [
+    'computer science', 'software engineering', 'information technology',
+    'engineering', 'mathematics', 'physics', 'business', 'data science',
+    'artificial intelligence', 'machine learning', 'cybersecurity'
+]
+
+
+def hash_text(text):
+    """Return a stable hash of a job description text"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+class JobProfile:
+    """
+    Everything the analyzer needs to know about a job description, computed
+    once per job instead of once per resume: skills, required skills, years
+    and education requirements, and the embeddings of the text and its lines.
+    """
+
+    def __init__(self, text_hash, job_skills, required_skills, required_years,
+                 required_level, required_level_score, required_fields, chunks,
+                 model_name=None, text_embedding=None, chunk_embeddings=None,
+                 version=PROFILE_VERSION):
+        self.text_hash = text_hash
+        self.job_skills = job_skills
+        self.required_skills = required_skills
+        self.required_years = required_years
+        self.required_level = required_level
+        self.required_level_score = required_level_score
+        self.required_fields = required_fields
+        self.chunks = chunks
+        self.model_name = model_name
+        self.text_embedding = text_embedding
+        self.chunk_embeddings = chunk_embeddings
+        self.version = version
+
+    @property
+    def has_embeddings(self):
+        """Whether the profile carries job description embeddings"""
+        return self.text_embedding is not None and self.chunk_embeddings is not None
+
+    @classmethod
+    def build(cls, text, bert_model=None, model_name=EMBEDDING_MODEL_NAME):
+        """
+        Analyze a job description.
+
+        Args:
+            text (str): Job description text
+            bert_model: Embedding model; embeddings are skipped if None
+            model_name (str): Name of the embedding model, stored with the profile
+
+        Returns:
+            JobProfile: The computed profile
+        """
+        text = text or ''
+        text_lower = text.lower()
+
+        job_skills = extract_skills_from_text(text)
+
+        # Required skills from requirement sections and requirement lines
+        required_skills = set()
+        for pattern in REQUIREMENT_PATTERNS:
+            for match in pattern.finditer(text_lower):
+                required_skills.update(extract_skills_from_text(match.group(1)))
+        for line in text_lower.split('\n'):
+            if any(keyword in line for keyword in REQUIREMENT_KEYWORDS):
+                required_skills.update(extract_skills_from_text(line))
+
+        # Required years of experience
+        required_years = 0
+        for pattern in EXPERIENCE_REQUIREMENT_PATTERNS:
+            for match in pattern.finditer(text_lower):
+                years = int(match.group(1))
+                if years > required_years:
+                    required_years = years
+
+        # Required education level
+        required_level = None
+        required_level_score = 0
+        for level, score in EDUCATION_LEVELS.items():
+            if level in text_lower and score > required_level_score:
+                required_level = level
+                required_level_score = score
+
+        required_fields = [field for field in FIELDS_OF_STUDY if field in text_lower]
+
+        # Split into lines for experience matching
+        chunks = [s.strip() for s in text.split('\n') if s.strip()]
+
+        profile = cls(
+            text_hash=hash_text(text),
+            job_skills=job_skills,
+            required_skills=list(required_skills),
+            required_years=required_years,
+            required_level=required_level,
+            required_level_score=required_level_score,
+            required_fields=required_fields,
+            chunks=chunks
+        )
+
+        if bert_model is not None and chunks:
+            try:
+                embeddings = embedding_cache.encode(bert_model, [text] + chunks, model_name)
+                profile.text_embedding = embeddings[0]
+                profile.chunk_embeddings = embeddings[1:]
+                profile.model_name = model_name
+            except Exception as e:
+                logger.error(f"Error embedding job description: {str(e)}")
+
+        return profile
+
+    def to_dict(self):
+        """Serialize the profile for storage, without the embeddings"""
+        return {
+            'version': self.version,
+            'text_hash': self.text_hash,
+            'job_skills': self.job_skills,
+            'required_skills': self.required_skills,
+            'required_years': self.required_years,
+            'required_level': self.required_level,
+            'required_level_score': self.required_level_score,
+            'required_fields': self.required_fields,
+            'chunks': self.chunks,
+            'model_name': self.model_name
+        }
+
+    @classmethod
+    def from_dict(cls, data, embeddings_path=None):
+        """Restore a profile stored with to_dict, and its embeddings if saved"""
+        profile = cls(
+            text_hash=data['text_hash'],
+            job_skills=data['job_skills'],
+            required_skills=data['required_skills'],
+            required_years=data['required_years'],
+            required_level=data['required_level'],
+            required_level_score=data['required_level_score'],
+            required_fields=data['required_fields'],
+            chunks=data['chunks'],
+            model_name=data.get('model_name'),
+            version=data.get('version', 0)
+        )
+        if profile.model_name and embeddings_path and os.path.exists(embeddings_path):
+            try:
+                with np.load(embeddings_path) as arrays:
+                    profile.text_embedding = arrays['text_embedding']
+                    profile.chunk_embeddings = arrays['chunk_embeddings']
+            except Exception as e:
+                logger.error(f"Error loading job profile embeddings {embeddings_path}: {str(e)}")
+        return profile
+
+    def save_embeddings(self, embeddings_path):
+        """Save the embeddings next to the job description file"""
+        if not self.has_embeddings or not embeddings_path:
+            return
+        try:
+            np.savez(embeddings_path,
+                     text_embedding=self.text_embedding,
+                     chunk_embeddings=self.chunk_embeddings)
+        except Exception as e:
+            logger.error(f"Error saving job profile embeddings {embeddings_path}: {str(e)}")
+
+    def is_valid_for(self, text_hash, model_name):
+        """Check whether the profile matches the text and embedding model"""
+        return (self.version == PROFILE_VERSION and
+                self.text_hash == text_hash and
+                (model_name is None or self.model_name == model_name))
+
+
+# In-process profiles keyed by (text hash, model name), least recently used first
+_profile_cache = OrderedDict()
+_profile_cache_lock = threading.Lock()
+
+
+def _stored_is_current(stored, text_hash, expected_model, embeddings_path):
+    """Whether a stored profile matches the text and model, with its embeddings saved"""
+    if not stored:
+        return False
+    try:
+        profile = JobProfile.from_dict(stored)
+    except (KeyError, TypeError):
+        return False
+    if not profile.is_valid_for(text_hash, expected_model):
+        return False
+    # Without a path the embeddings are never persisted, so only the fields count
+    return not expected_model or not embeddings_path or os.path.exists(embeddings_path)
+
+
+def get_job_profile(text, bert_model=None, model_name=EMBEDDING_MODEL_NAME,
+                    stored=None, embeddings_path=None, cache_size=JOB_PROFILE_CACHE_SIZE):
+    """
+    Get the profile for a job description, computing it only if needed.
+
+    Args:
+        text (str): Job description text
+        bert_model: Embedding model, or None if unavailable
+        model_name (str): Name of the embedding model
+        stored (dict): Profile previously saved with to_dict, if any
+        embeddings_path (str): Where the profile embeddings are persisted
+        cache_size (int): Profiles kept in memory per process
+
+    Returns:
+        tuple: (JobProfile, bool) - the profile, and whether the stored
+            profile was missing or stale, so the caller should save it
+    """
+    text_hash = hash_text(text)
+    expected_model = model_name if bert_model is not None else None
+    key = (text_hash, expected_model)
+    stored_current = _stored_is_current(stored, text_hash, expected_model, embeddings_path)
+
+    with _profile_cache_lock:
+        profile = _profile_cache.get(key)
+        if profile is not None:
+            _profile_cache.move_to_end(key)
+
+    if profile is None:
+        if stored_current:
+            profile = JobProfile.from_dict(stored, embeddings_path)
+            if expected_model and not profile.has_embeddings:
+                profile = None
+                stored_current = False
+        if profile is None:
+            profile = JobProfile.build(text, bert_model, model_name)
+
+        # A profile whose embedding failed is not cached, so the next call retries
+        if not expected_model or profile.has_embeddings or not profile.chunks:
+            with _profile_cache_lock:
+                _profile_cache[key] = profile
+                _profile_cache.move_to_end(key)
+                while len(_profile_cache) > cache_size:
+                    _profile_cache.popitem(last=False)
+
+    if not stored_current:
+        profile.save_embeddings(embeddings_path)
+    return profile, not stored_current
@@ -0,0 +1,153 @@
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import UPLOAD_WORKERS, UPLOAD_JOB_HISTORY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchJob:
+    """Status of a background batch of resumes being processed"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, id, total):
+        self.id = id
+        self.total = total
+        self.processed = 0
+        self.status = self.QUEUED
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def advance(self, count=1):
+        """Record that more resumes have been processed"""
+        with self._lock:
+            self.processed = min(self.processed + count, self.total)
+
+    @property
+    def done(self):
+        """Whether the job has finished, successfully or not"""
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def to_dict(self):
+        """Job status for the progress endpoint"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'total': self.total,
+                'processed': self.processed,
+                'progress': round(self.processed / self.total * 100, 1) if self.total else 100.0,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobQueue:
+    """
+    In-process background queue for batch jobs.
+
+    Jobs run on a thread pool, so uploads can return immediately while the
+    resumes are parsed and scored. The status of recent jobs is kept in memory
+    for progress polling; no external broker is needed.
+    """
+
+    def __init__(self, max_workers=UPLOAD_WORKERS, history=UPLOAD_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-job')
+        self._jobs = OrderedDict()
+        self._aliases = {}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, total, func, *args, **kwargs):
+        """
+        Queue a job.
+
+        Args:
+            job_id (str): Identifier to poll the job by
+            total (int): Number of items the job will process
+            func: Callable run as func(*args, progress=job.advance, **kwargs)
+
+        Returns:
+            BatchJob: The queued job
+        """
+        job = BatchJob(job_id, total)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            # Forget the oldest finished jobs, and aliases pointing at them
+            forgotten = False
+            while len(self._jobs) > self._history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.done:
+                    break
+                del self._jobs[oldest_id]
+                forgotten = True
+            if forgotten:
+                for alias_id, job_ids in list(self._aliases.items()):
+                    job_ids = [id for id in job_ids if id in self._jobs]
+                    if job_ids:
+                        self._aliases[alias_id] = job_ids
+                    else:
+                        del self._aliases[alias_id]
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def alias(self, alias_id, job_id):
+        """
+        Make a job pollable under another ID too, e.g. a batch that fills
+        the results of several job descriptions. A job already submitted
+        under that ID, or aliased to it, stays pollable.
+
+        Args:
+            alias_id (str): Additional identifier
+            job_id (str): ID the job was submitted under
+        """
+        with self._lock:
+            if job_id in self._jobs:
+                self._aliases.setdefault(alias_id, []).append(job_id)
+
+    def get(self, job_id):
+        """
+        Get a job by ID, or None if it is unknown. When several jobs are
+        known under the ID, one still running is preferred, then the most
+        recent.
+        """
+        with self._lock:
+            jobs = [self._jobs.get(job_id)] + [self._jobs.get(id) for id in self._aliases.get(job_id, [])]
+        jobs = [job for job in jobs if job is not None]
+        running = [job for job in jobs if not job.done]
+        if running:
+            return running[0]
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def _run(self, job, func, args, kwargs):
+        """Run a job and record its outcome"""
+        job.status = BatchJob.RUNNING
+        job.started_at = datetime.now().isoformat()
+        try:
+            func(*args, progress=job.advance, **kwargs)
+            job.status = BatchJob.COMPLETED
+        except Exception as e:
+            logger.error(f"Batch job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = BatchJob.FAILED
+        finally:
+            job.finished_at = datetime.now().isoformat()
+
+
+# Shared queue for the whole process
+job_queue = JobQueue()
@@ -0,0 +1,329 @@
+import os
+import sys
+import time
+import threading
+import logging
+from datetime import datetime
+from functools import lru_cache
+import joblib
+import numpy as np
+import nltk
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from config import (TFIDF_VECTORIZER_PATH, TFIDF_MIN_CORPUS_DOCS, TFIDF_FIT_CHECK_INTERVAL, TFIDF_REFIT_AGE,
+                    LEMMA_CACHE_SIZE)
+
+# Download necessary NLTK data
+nltk.download('punkt', quiet=True)
+nltk.download('punkt_tab', quiet=True)
+nltk.download('stopwords', quiet=True)
+nltk.download('wordnet', quiet=True)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared NLP resources, loaded once per process
+STOP_WORDS = set(stopwords.words('english'))
+LEMMATIZER = WordNetLemmatizer()
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token):
+    """Lemmatize a token, memoized since the same words recur in every resume"""
+    return LEMMATIZER.lemmatize(token)
+
+
+def preprocess_text(text):
+    """
+    Preprocess text for lexical matching:
+    - Tokenize
+    - Remove stopwords
+    - Lemmatize
+
+    Args:
+        text (str): Text to preprocess
+
+    Returns:
+        str: Preprocessed text
+    """
+    # Tokenize
+    tokens = word_tokenize((text or '').lower())
+
+    # Remove stopwords and non-alphabetic tokens
+    filtered_tokens = [token for token in tokens if token.isalpha() and token not in STOP_WORDS]
+
+    # Lemmatize
+    lemmatized_tokens = [lemmatize(token) for token in filtered_tokens]
+
+    return ' '.join(lemmatized_tokens)
+
+
+def fit_corpus_vectorizer(texts, path=TFIDF_VECTORIZER_PATH):
+    """
+    Fit the TF-IDF vocabulary and IDF weights on a corpus and persist them.
+
+    Args:
+        texts (list): Corpus documents (resume and job description texts)
+        path (str): Where to save the fitted vectorizer
+
+    Returns:
+        TfidfVectorizer: The fitted vectorizer, or None if the corpus has no terms
+    """
+    vectorizer = TfidfVectorizer(sublinear_tf=True, min_df=2 if len(texts) >= 100 else 1)
+    try:
+        vectorizer.fit([preprocess_text(text) for text in texts])
+    except ValueError:
+        logger.error("Cannot fit TF-IDF vectorizer: the corpus has no terms")
+        return None
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        joblib.dump({
+            'vectorizer': vectorizer,
+            'documents': len(texts),
+            'fitted_at': datetime.now().isoformat()
+        }, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"Fitted TF-IDF vectorizer on {len(texts)} documents, "
+                    f"{len(vectorizer.vocabulary_)} terms")
+    except OSError as e:
+        logger.error(f"Error saving TF-IDF vectorizer: {str(e)}")
+
+    with _vectorizer_lock:
+        _vectorizer_cache.clear()
+    return vectorizer
+
+
+def corpus_texts():
+    """Texts of every stored resume and job description"""
+    from app.models.resume import Resume, JobDescription
+    from app.utils.resume_analyzer import resume_text
+
+    texts = [resume_text(Resume(**record).to_resume_data()) for record in Resume.get_all()]
+    texts.extend(record.get('text', '') for record in JobDescription.get_all())
+    return texts
+
+
+# Loaded vectorizer, the mtime of the file it came from, and its corpus size and fit time
+_vectorizer_cache = {}
+_vectorizer_lock = threading.Lock()
+
+# Background fit: whether one is running and when the corpus was last counted
+_fit_state = {'running': False, 'checked': None}
+
+
+def get_corpus_vectorizer(path=TFIDF_VECTORIZER_PATH, schedule_fit=True):
+    """
+    Get the TF-IDF vectorizer fitted on the stored corpus. It is loaded once
+    per process and reloaded when the file changes. This call never fits:
+    a background thread fits one once the corpus has TFIDF_MIN_CORPUS_DOCS
+    documents, and refits it as the corpus grows (see schedule_corpus_fit).
+
+    Returns:
+        TfidfVectorizer: The fitted vectorizer, or None if there is none
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    vectorizer = None
+    with _vectorizer_lock:
+        if mtime is not None and _vectorizer_cache.get('mtime') == mtime:
+            vectorizer = _vectorizer_cache['vectorizer']
+        elif mtime is not None:
+            try:
+                payload = joblib.load(path)
+                vectorizer = payload['vectorizer']
+                _vectorizer_cache.clear()
+                _vectorizer_cache.update(mtime=mtime, vectorizer=vectorizer,
+                                         documents=payload.get('documents', 0),
+                                         fitted_at=payload.get('fitted_at'))
+            except Exception as e:
+                logger.error(f"Error loading TF-IDF vectorizer {path}: {str(e)}")
+
+    if schedule_fit:
+        schedule_corpus_fit(path)
+    return vectorizer
+
+
+def schedule_corpus_fit(path=TFIDF_VECTORIZER_PATH, check_interval=TFIDF_FIT_CHECK_INTERVAL):
+    """
+    Check in a background thread whether the corpus vectorizer needs a
+    (re)fit, and fit it if so; see _needs_fit. Nothing is started while a
+    check is running or if the last one began less than check_interval
+    seconds ago.
+
+    Returns:
+        bool: Whether a check was started
+    """
+    with _vectorizer_lock:
+        now = time.monotonic()
+        checked = _fit_state['checked']
+        if _fit_state['running'] or (checked is not None and now - checked < check_interval):
+            return False
+        _fit_state.update(running=True, checked=now)
+
+    threading.Thread(target=_fit_in_background, args=(path,), name='tfidf-fit', daemon=True).start()
+    return True
+
+
+def _needs_fit(documents, fitted_documents=None, fitted_at=None, refit_age=TFIDF_REFIT_AGE):
+    """
+    Whether a corpus of documents should be fitted: once it reaches
+    TFIDF_MIN_CORPUS_DOCS, again whenever it has doubled since the last
+    fit, and when the last fit is older than refit_age seconds and the
+    corpus changed since.
+    """
+    if documents < TFIDF_MIN_CORPUS_DOCS:
+        return False
+    if not fitted_documents:
+        return True
+    if documents >= 2 * fitted_documents:
+        return True
+    try:
+        age = (datetime.now() - datetime.fromisoformat(fitted_at)).total_seconds()
+    except (TypeError, ValueError):
+        return True
+    return age > refit_age and documents != fitted_documents
+
+
+def _fit_in_background(path):
+    """Fit and save the corpus vectorizer if there is none yet or the corpus grew"""
+    try:
+        with _vectorizer_lock:
+            fitted = (_vectorizer_cache.get('documents'), _vectorizer_cache.get('fitted_at'))
+        if os.path.exists(path) and fitted[0] is None:
+            return  # Fitted by another process meanwhile; checked again once loaded
+        texts = corpus_texts()
+        if _needs_fit(len(texts), *fitted):
+            fit_corpus_vectorizer(texts, path)
+    except Exception as e:
+        logger.error(f"Error fitting TF-IDF vectorizer: {str(e)}")
+    finally:
+        with _vectorizer_lock:
+            _fit_state['running'] = False
+
+
+def tfidf_similarities(texts, job_text, vectorizer=None):
+    """
+    TF-IDF cosine similarity of each text to a job description, computed as
+    one sparse matrix product.
+
+    Args:
+        texts (list): Resume texts
+        job_text (str): Job description text
+        vectorizer (TfidfVectorizer): Vectorizer fitted on the corpus; if None
+            the IDF weights of each pair are fitted on that resume and the
+            job description alone (see tfidf_similarity_matrix)
+
+    Returns:
+        np.ndarray: Similarity of each text, between 0 and 1
+    """
+    return tfidf_similarity_matrix(texts, [job_text], vectorizer)[:, 0]
+
+
+def tfidf_similarity_matrix(texts, job_texts, vectorizer=None):
+    """
+    TF-IDF cosine similarity of every text to every job description, as
+    sparse matrix products.
+
+    Without a corpus vectorizer, each (resume, job) pair is weighted as if a
+    TfidfVectorizer(sublinear_tf=True) were fitted on those two documents
+    alone, so a score never depends on the other resumes or jobs it is
+    computed with. With two documents the smoothed IDF takes two values:
+    1 for terms in both, and ln(3/2) + 1 for terms in only one.
+
+    Args:
+        texts (list): Resume texts
+        job_texts (list): Job description texts
+        vectorizer (TfidfVectorizer): Vectorizer fitted on the corpus
+
+    Returns:
+        np.ndarray: Texts x job descriptions similarities, between 0 and 1
+    """
+    shape = (len(texts), len(job_texts))
+    if not texts or not job_texts:
+        return np.zeros(shape)
+    documents = [preprocess_text(text) for text in texts] + [preprocess_text(text) for text in job_texts]
+    try:
+        if vectorizer is not None:
+            matrix = vectorizer.transform(documents)
+            # Rows are L2-normalized, so cosine similarity is a sparse dot product
+            return np.asarray((matrix[:len(texts)] @ matrix[len(texts):].T).toarray())
+        counts = CountVectorizer().fit_transform(documents).astype(np.float64)
+    except ValueError:
+        # Every document is empty after preprocessing
+        return np.zeros(shape)
+
+    # Sublinear term frequencies, as TfidfVectorizer(sublinear_tf=True)
+    counts.data = np.log(counts.data) + 1
+    resume_tf = counts[:len(texts)].tocsr()
+    job_tf = counts[len(texts):].tocsr()
+    resume_present = (resume_tf > 0).astype(np.float64)
+    job_present = (job_tf > 0).astype(np.float64)
+    resume_squares = resume_tf.multiply(resume_tf).tocsr()
+    job_squares = job_tf.multiply(job_tf).tocsr()
+
+    # Shared terms weigh 1, so the dot product is unweighted; the norms
+    # weigh terms the other document lacks by the higher IDF
+    unshared = (np.log(1.5) + 1) ** 2
+    dots = (resume_tf @ job_tf.T).toarray()
+    resume_norms = unshared * np.asarray(resume_squares.sum(axis=1)) - \
+        (unshared - 1) * (resume_squares @ job_present.T).toarray()
+    job_norms = unshared * np.asarray(job_squares.sum(axis=1)).T - \
+        (unshared - 1) * (resume_present @ job_squares.T).toarray()
+    norms = np.sqrt(np.maximum(resume_norms, 0) * np.maximum(job_norms, 0))
+    return np.divide(dots, norms, out=np.zeros(shape), where=norms > 0)
+
+
+def skill_overlap(skill_lists, skills):
+    """
+    Fraction of skills found in each resume's skill list, as one sparse
+    matrix product over the whole batch.
+
+    Args:
+        skill_lists (list): Skills of each resume
+        skills (list): Skills to look for
+
+    Returns:
+        np.ndarray: Fraction of skills matched by each resume, 0 if skills is empty
+    """
+    return skill_overlap_matrix(skill_lists, [skills])[:, 0]
+
+
+def skill_overlap_matrix(skill_lists, job_skill_lists, empty=0.0):
+    """
+    Fraction of each job's skills found in each resume's skill list, as one
+    sparse product of the resume and job skill indicator matrices.
+
+    Args:
+        skill_lists (list): Skills of each resume
+        job_skill_lists (list): Skills to look for, per job
+        empty (float): Value for jobs with no skills to look for
+
+    Returns:
+        np.ndarray: Resumes x jobs fractions of skills matched
+    """
+    shape = (len(skill_lists), len(job_skill_lists))
+    vocabulary = sorted(set(skill for skills in job_skill_lists for skill in (skills or [])))
+    if not vocabulary or not skill_lists:
+        return np.full(shape, float(empty))
+    vectorizer = CountVectorizer(analyzer=lambda items: items, vocabulary=vocabulary, binary=True)
+    resume_matrix = vectorizer.transform([list(set(items or [])) for items in skill_lists])
+    job_matrix = vectorizer.transform([list(set(items or [])) for items in job_skill_lists])
+    counts = np.asarray((resume_matrix @ job_matrix.T).toarray(), dtype=np.float64)
+    sizes = np.asarray(job_matrix.sum(axis=1)).ravel()
+    return np.where(sizes > 0, counts / np.maximum(sizes, 1), float(empty))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['fit']:
+        fit_corpus_vectorizer(corpus_texts())
+    else:
+        print("Usage: python -m app.utils.lexical fit")
+        sys.exit(1)
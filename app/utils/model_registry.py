@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+import logging
+from sentence_transformers import SentenceTransformer
+from config import EMBEDDING_MODEL_NAME
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes():
+    """Return the resident memory of this process in bytes, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _parameter_bytes(model):
+    """Return the size of a torch model's parameters in bytes, or None"""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of embedding models.
+
+    Each model is loaded at most once per process, on first use (or at startup
+    through preload), and the same instance is shared by every ResumeAnalyzer.
+    Loading is thread-safe: concurrent requests for a model that is still
+    loading wait for that single load instead of starting their own.
+    """
+
+    def __init__(self, loader=SentenceTransformer):
+        """Initialize with the callable used to load a model by name"""
+        self._loader = loader
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._model_locks = {}
+
+    def get(self, name=EMBEDDING_MODEL_NAME):
+        """
+        Get a model by name, loading it on first use.
+
+        Returns:
+            The loaded model, or None if it failed to load. Failures are
+            remembered so a broken model is not reloaded for every resume.
+        """
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock:
+            model_lock = self._model_locks.setdefault(name, threading.Lock())
+
+        with model_lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+        return self._models[name]
+
+    def preload(self, names=None):
+        """Load the given models (default: the configured embedding model) now"""
+        for name in names or [EMBEDDING_MODEL_NAME]:
+            self.get(name)
+
+    def is_loaded(self, name=EMBEDDING_MODEL_NAME):
+        """Check whether a model has been loaded successfully"""
+        return self._models.get(name) is not None
+
+    def stats(self):
+        """
+        Report load statistics for every model requested so far.
+
+        Returns:
+            dict: model name -> {'loaded', 'load_seconds', 'rss_delta_bytes',
+            'parameter_bytes', 'error'}
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _load(self, name):
+        """Load a model and record how long it took and how much memory it uses"""
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = self._loader(name)
+            error = None
+        except Exception as e:
+            logger.error(f"Error loading embedding model {name}: {str(e)}")
+            model = None
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+
+        stats = {
+            'loaded': model is not None,
+            'load_seconds': round(elapsed, 3),
+            'rss_delta_bytes': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            'parameter_bytes': _parameter_bytes(model) if model is not None else None,
+            'error': error
+        }
+        with self._lock:
+            self._stats[name] = stats
+
+        if model is not None:
+            logger.info(f"Loaded embedding model {name} in {elapsed:.2f}s")
+        return model
+
+
+# Shared registry for the whole process
+model_registry = ModelRegistry()
+
+
+def get_embedding_model(name=EMBEDDING_MODEL_NAME):
+    """Get the shared embedding model from the process-wide registry"""
+    return model_registry.get(name)
@@ -0,0 +1,58 @@
+import sys
+import threading
+import logging
+import spacy
+from config import SPACY_MODEL, SPACY_PIPELINE_PROFILE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pipeline components to disable for each profile. The parser only needs
+# named entities, so the default 'ner' profile skips tagging, dependency
+# parsing and lemmatization.
+PIPELINE_PROFILES = {
+    'full': [],
+    'ner': ['tagger', 'parser', 'attribute_ruler', 'lemmatizer'],
+}
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def _load_model(model_name):
+    """Load a spaCy model, downloading it on first use"""
+    try:
+        return spacy.load(model_name)
+    except OSError:
+        import subprocess
+        subprocess.run([sys.executable, '-m', 'spacy', 'download', model_name])
+        return spacy.load(model_name)
+
+
+def get_nlp(profile=SPACY_PIPELINE_PROFILE, model_name=SPACY_MODEL):
+    """
+    Get the shared spaCy pipeline for a profile, loading it once per process.
+
+    Args:
+        profile (str): Name of a PIPELINE_PROFILES entry
+        model_name (str): spaCy model to load
+
+    Returns:
+        spacy.Language: Pipeline with the profile's components disabled
+    """
+    key = (model_name, profile)
+    if key in _pipelines:
+        return _pipelines[key]
+
+    with _pipelines_lock:
+        if key not in _pipelines:
+            if profile not in PIPELINE_PROFILES:
+                raise ValueError(f"Unknown spaCy pipeline profile: {profile}")
+            nlp = _load_model(model_name)
+            for name in PIPELINE_PROFILES[profile]:
+                if name in nlp.pipe_names:
+                    nlp.disable_pipe(name)
+            logger.info(f"Loaded spaCy model {model_name} with pipeline {nlp.pipe_names}")
+            _pipelines[key] = nlp
+    return _pipelines[key]
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from config import PARSE_CACHE_PATH, PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_TOUCH_INTERVAL
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed resume data keyed by the SHA-256 of the file
+    contents and the parser version, so the same bytes are parsed once no
+    matter how many jobs they are uploaded against. Entries are evicted
+    least recently used first once the cache holds more than max_entries.
+
+    Reads only refresh an entry's access time when it is older than
+    touch_interval seconds, so hits rarely write. Eviction runs only when
+    the row count passes max_entries, and then trims to 90% of it.
+    Failed parses are never stored, so a file is parsed again next time.
+    """
+
+    def __init__(self, db_path=PARSE_CACHE_PATH, max_entries=PARSE_CACHE_MAX_ENTRIES,
+                 touch_interval=PARSE_CACHE_TOUCH_INTERVAL):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rows = None  # Rows in the cache as last counted, plus puts since
+
+    def _connection(self):
+        """Get this thread's connection, reconnecting after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS parsed (
+                        content_hash TEXT NOT NULL,
+                        parser_version TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        last_access REAL NOT NULL,
+                        PRIMARY KEY (content_hash, parser_version)
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_parsed_access ON parsed (last_access)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, content_hash, parser_version):
+        """Get cached parsed data, or None on a miss"""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT data, last_access FROM parsed WHERE content_hash = ? AND parser_version = ?',
+                (content_hash, parser_version)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > self.touch_interval:
+                with conn:
+                    conn.execute(
+                        'UPDATE parsed SET last_access = ? WHERE content_hash = ? AND parser_version = ?',
+                        (now, content_hash, parser_version))
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.error(f"Error reading parse cache: {str(e)}")
+            return None
+
+    def put(self, content_hash, parser_version, data):
+        """Store parsed data, unless parsing failed, and evict if the cache is full"""
+        if data.get('parse_error'):
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO parsed (content_hash, parser_version, data, last_access) '
+                    'VALUES (?, ?, ?, ?)',
+                    (content_hash, parser_version, json.dumps(data), time.time()))
+            with self._lock:
+                if self._rows is None:
+                    self._rows = conn.execute('SELECT COUNT(*) FROM parsed').fetchone()[0]
+                else:
+                    self._rows += 1
+                if self._rows > self.max_entries:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing parse cache: {str(e)}")
+
+    def _evict(self, conn):
+        """Trim the cache to 90% of max_entries, least recently used first"""
+        # Other processes write too, so count again before deleting
+        rows = conn.execute('SELECT COUNT(*) FROM parsed').fetchone()[0]
+        if rows > self.max_entries:
+            keep = int(self.max_entries * 0.9)
+            with conn:
+                conn.execute('''
+                    DELETE FROM parsed WHERE rowid IN (
+                        SELECT rowid FROM parsed ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (keep,))
+            rows = min(rows, keep)
+        self._rows = rows
+
+
+# Shared cache for the whole process
+parse_cache = ParseCache()
@@ -0,0 +1,141 @@
+import re
+
+# Precompiled regular expressions shared by the parser, analyzer and job
+# profile. Everything here is compiled once at import instead of on every
+# line or every match.
+
+# Section headers, in priority order: a line is a header when, after leading
+# whitespace, it starts with one of these words
+SECTION_HEADERS = {
+    'education': r'education|academic|qualifications|academic background',
+    'experience': r'experience|work|employment|job history|professional background',
+    'skills': r'skills|technical skills|core competencies|expertise',
+    'projects': r'projects|personal projects|academic projects',
+    'certifications': r'certifications|certificates|accreditations',
+    'awards': r'awards|achievements|honors',
+    'publications': r'publications|research|papers',
+}
+
+# Every header as one named-group alternation, matched against line starts
+SECTION_HEADER_PATTERN = re.compile(
+    r'^[^\S\n]*(?:' + '|'.join(f'(?P<{name}>{alternatives})' for name, alternatives in SECTION_HEADERS.items()) + ')',
+    re.IGNORECASE | re.MULTILINE
+)
+
+EMAIL = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+
+# International with or without formatting, then US/Canada (which covers
+# plain 10-digit numbers and numbers with separators)
+PHONE = (r'\+\d{10,}'
+         r'|\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+         r'|\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+
+# Emails and phone numbers in one pass; trying emails first at each position
+# keeps digits inside an address from being read as a phone number
+CONTACT_PATTERN = re.compile(f'(?P<email>{EMAIL})|(?P<phone>{PHONE})')
+
+PHONE_NOISE_PATTERN = re.compile(r'[^\d+]')
+
+# Experience in resumes
+YEARS_OF_EXPERIENCE_PATTERN = re.compile(r'(\d+)[+\s]*(?:years?|yrs?)(?:\s+of)?\s+(?:experience|exp)')
+DATE_RANGE_PATTERN = re.compile(r'(?:19|20)\d{2}\s*-\s*(?:present|current|now|(?:19|20)\d{2})')
+MONTH_YEAR_PATTERN = re.compile(r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+(?:19|20)\d{2}')
+RESUME_YEAR_PATTERNS = [YEARS_OF_EXPERIENCE_PATTERN, DATE_RANGE_PATTERN, MONTH_YEAR_PATTERN]
+YEAR_PATTERN = re.compile(r'(?:19|20)\d{2}')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Experience paragraphs in resumes
+EXPERIENCE_KEYWORDS = [
+    'experience', 'work history', 'employment', 'job history',
+    'professional experience', 'work experience', 'career'
+]
+EXPERIENCE_PARAGRAPH_PATTERN = re.compile(
+    r'(?i)(' + '|'.join(EXPERIENCE_KEYWORDS) + r').*?(?:\n\n|\Z)', re.DOTALL)
+
+# Sections that list requirements in a job description
+REQUIREMENT_PATTERNS = [
+    re.compile(r'required skills?:?(.*?)(?:\n\n|\Z)', re.DOTALL),
+    re.compile(r'requirements?:?(.*?)(?:\n\n|\Z)', re.DOTALL),
+    re.compile(r'must have:?(.*?)(?:\n\n|\Z)', re.DOTALL),
+    re.compile(r'essential skills?:?(.*?)(?:\n\n|\Z)', re.DOTALL),
+    re.compile(r'key skills?:?(.*?)(?:\n\n|\Z)', re.DOTALL)
+]
+
+# Years of experience asked for in a job description
+EXPERIENCE_REQUIREMENT_PATTERNS = [
+    YEARS_OF_EXPERIENCE_PATTERN,
+    re.compile(r'experience:\s*(\d+)[+\s]*(?:years?|yrs?)'),
+    re.compile(r'(?:minimum|min)\s+(\d+)\s+(?:years?|yrs?)')
+]
+
+
+def split_sections(text):
+    """
+    Split a resume into sections in a single pass over the header pattern.
+
+    Lines before the first header are ignored. Section content is the
+    stripped, non-empty lines up to the next header; a repeated header
+    replaces the earlier section, and a trailing header with no content is
+    dropped.
+
+    Args:
+        text (str): Resume text
+
+    Returns:
+        tuple: (sections, spans) - section name to content, and section
+            name to (start, end) character offsets of the content in text
+    """
+    sections = {}
+    spans = {}
+    headers = list(SECTION_HEADER_PATTERN.finditer(text))
+
+    for i, header in enumerate(headers):
+        line_end = text.find('\n', header.end())
+        start = len(text) + 1 if line_end == -1 else line_end + 1
+        limit = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+
+        lines = []
+        end = start
+        offset = start
+        for raw_line in text[start:limit].split('\n'):
+            if raw_line.strip():
+                lines.append(raw_line.strip())
+                end = offset + len(raw_line)
+            offset += len(raw_line) + 1
+
+        if lines or i + 1 < len(headers):
+            sections[header.lastgroup] = '\n'.join(lines)
+            spans[header.lastgroup] = (start, end)
+
+    return sections, spans
+
+
+def find_contacts(text):
+    """
+    Find the first valid email address and phone number in one pass.
+
+    Args:
+        text (str): Resume text
+
+    Returns:
+        tuple: (email, phone) - the email lowercased and the phone number
+            as digits (formatted as (XXX) XXX-XXXX for 10 digits); empty
+            strings when not found
+    """
+    email = ''
+    phone = ''
+    for match in CONTACT_PATTERN.finditer(text):
+        if match.lastgroup == 'email':
+            if not email:
+                candidate = match.group()
+                if (candidate.count('@') == 1 and
+                        len(candidate) > 5 and
+                        '.' in candidate.split('@')[1]):
+                    email = candidate.lower()
+        elif not phone:
+            cleaned = PHONE_NOISE_PATTERN.sub('', match.group())
+            if len(cleaned) >= 10:  # Must have at least 10 digits
+                phone = f"({cleaned[:3]}) {cleaned[3:6]}-{cleaned[6:]}" if len(cleaned) == 10 else cleaned
+        if email and phone:
+            break
+    return email, phone
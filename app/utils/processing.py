@@ -0,0 +1,406 @@
+import os
+import uuid
+import queue
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from itertools import islice
+from werkzeug.utils import secure_filename
+from app.models.resume import Resume
+from app.utils.resume_parser import ResumeParser, parser_cache_version
+from app.utils.parse_cache import parse_cache
+from app.utils.resume_analyzer import ResumeAnalyzer
+from app.utils.model_registry import get_embedding_model
+from app.utils.job_profile import get_job_profile
+from app.utils.vector_index import get_resume_index
+from config import (UPLOAD_CHUNK_SIZE, UPLOAD_FOLDER_RESUMES, CASCADE_SCORING, SCORE_STREAM_MAX_BATCH,
+                    PARSER_N_PROCESS)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _chunks(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def save_upload(file, folder=UPLOAD_FOLDER_RESUMES):
+    """
+    Save an uploaded resume under the hash of its contents, so identical
+    files are stored once no matter how often they are uploaded.
+
+    Args:
+        file: Uploaded file (werkzeug FileStorage)
+        folder (str): Directory to store resumes in
+
+    Returns:
+        dict: Upload info with 'id', 'original_filename', 'filename', 'path'
+            and 'content_hash'
+    """
+    original_filename = secure_filename(file.filename)
+    file_extension = os.path.splitext(original_filename)[1].lower()
+    os.makedirs(folder, exist_ok=True)
+
+    # Hash while writing to a temporary file, then move it into place
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(folder, f".upload_{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'wb') as out:
+        for block in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(block)
+            out.write(block)
+    content_hash = digest.hexdigest()
+
+    resume_filename = f"resume_{content_hash}{file_extension}"
+    resume_path = os.path.join(folder, resume_filename)
+    if os.path.exists(resume_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, resume_path)
+
+    return {
+        'id': str(uuid.uuid4()),
+        'original_filename': original_filename,
+        'filename': resume_filename,
+        'path': resume_path,
+        'content_hash': content_hash
+    }
+
+
+def stable_resume_id(job_desc_id, content_hash):
+    """
+    Resume ID derived from the job and the file contents, so scoring the same
+    file against the same job again updates its record instead of adding one.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"resume:{job_desc_id}:{content_hash}"))
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_uploads(uploads, n_process=PARSER_N_PROCESS):
+    """
+    Parse uploaded resumes, reusing cached results for files whose contents
+    were parsed before. Only cache misses go through ResumeParser.parse_many,
+    and identical files within the batch are parsed once.
+
+    Args:
+        uploads (list): Upload info dicts; 'content_hash' is computed from
+            the file if missing
+        n_process (int): Processes ResumeParser.parse_many may use; the
+            CLI, whose workers are processes already, passes 1
+
+    Yields:
+        dict: Parsed data for each upload, in order
+    """
+    version = parser_cache_version()
+    hashes = [upload.get('content_hash') or file_hash(upload['path']) for upload in uploads]
+
+    cached = {}
+    misses = {}
+    for upload, content_hash in zip(uploads, hashes):
+        if content_hash in cached or content_hash in misses:
+            continue
+        data = parse_cache.get(content_hash, version)
+        if data is not None:
+            cached[content_hash] = data
+        else:
+            misses[content_hash] = upload['path']
+
+    if misses:
+        logger.info(f"Parse cache: {len(cached)} hits, {len(misses)} misses")
+    miss_stream = zip(misses, ResumeParser.parse_many(list(misses.values()), n_process=n_process))
+
+    for content_hash in hashes:
+        while content_hash not in cached:
+            parsed_hash, data = next(miss_stream)
+            parse_cache.put(parsed_hash, version, data)
+            cached[parsed_hash] = data
+        yield cached[content_hash]
+
+
+def build_resume(upload, parsed_data, analysis, job_desc_id):
+    """
+    Create the Resume record for a parsed and scored upload.
+
+    Args:
+        upload (dict): Saved file info with 'id', 'original_filename',
+            'filename' and 'path'
+        parsed_data (dict): Output of ResumeParser
+        analysis (dict): Output of ResumeAnalyzer.calculate_score
+        job_desc_id (str): Job description the resume was scored against
+
+    Returns:
+        Resume: The unsaved resume record
+    """
+    return Resume(
+        id=upload['id'],
+        original_filename=upload['original_filename'],
+        filename=upload['filename'],
+        path=upload['path'],
+        content_hash=upload.get('content_hash'),
+        job_description_id=job_desc_id,
+        candidate_name=parsed_data.get('name', ''),
+        email=parsed_data.get('email', ''),
+        phone=parsed_data.get('phone', ''),
+        skills=parsed_data.get('skills', []),
+        education=parsed_data.get('education', ''),
+        experience=parsed_data.get('experience', ''),
+        score=analysis['overall_score'],
+        detailed_analysis=analysis,
+        created_at=datetime.now().isoformat()
+    )
+
+
+def process_resume_batch(job_desc, uploads, progress=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Parse, score and store a batch of uploaded resumes for a job description.
+
+    Resumes are parsed as one stream (files parsed before come from the
+    parse cache) and scored and saved chunk by chunk, with
+    one storage write per chunk, so results become visible while the rest of
+    the batch is still running.
+
+    Args:
+        job_desc (JobDescription): Job description to score against
+        uploads (list): Saved file info dicts, see build_resume
+        progress: Optional callable called with the number of resumes done
+        chunk_size (int): Number of resumes scored and saved together; use
+            len(uploads) to store the whole batch in a single write
+    """
+    bert_model = get_embedding_model()
+    job_profile = job_desc.get_profile(bert_model)
+
+    parsed_stream = parse_uploads(uploads)
+    for chunk in _chunks(zip(uploads, parsed_stream), chunk_size):
+        analyses = ResumeAnalyzer.score_batch(
+            [parsed_data for _, parsed_data in chunk],
+            job_desc.text,
+            job_profile=job_profile,
+            bert_model=bert_model,
+            cascade=CASCADE_SCORING
+        )
+        Resume.save_many([
+            build_resume(upload, parsed_data, analysis, job_desc.id)
+            for (upload, parsed_data), analysis in zip(chunk, analyses)
+        ])
+        
+        # Add the resumes that reached the embedding stage to the candidate
+        # search index; their embeddings were cached while scoring, so this
+        # needs no inference. Resumes the cascade prefilter stopped are not
+        # embedded here; `python -m app.utils.vector_index rebuild` adds them.
+        embedded = [
+            (upload, parsed_data) for (upload, parsed_data), analysis in zip(chunk, analyses)
+            if (analysis.get('cascade') or {}).get('stage') != 'prefilter'
+        ]
+        if embedded and bert_model and job_profile.has_embeddings:
+            get_resume_index(job_profile.model_name).add(
+                [upload['id'] for upload, _ in embedded],
+                ResumeAnalyzer.embed_resumes([parsed_data for _, parsed_data in embedded],
+                                             bert_model, job_profile.model_name)
+            )
+
+        if progress:
+            progress(len(chunk))
+
+    logger.info(f"Processed {len(uploads)} resumes for job description {job_desc.id}")
+
+
+def save_matches(uploads, parsed_resumes, job_ids, matrix, bert_model=None):
+    """
+    Store the results of a chunk of resumes scored against several job
+    descriptions with ResumeAnalyzer.score_matrix: one Resume record per
+    resume and job, with one storage write for the whole chunk.
+
+    Args:
+        uploads (list): Saved file info dicts, see build_resume; each needs
+            'content_hash'
+        parsed_resumes (list): Parsed data of each upload
+        job_ids (list): ID of each job description, in score_matrix order
+        matrix (dict): score_matrix result for the chunk
+        bert_model: Embedding model, to add the resumes to the search index
+
+    Returns:
+        list: The saved Resume records, job by job
+    """
+    records = [
+        build_resume(dict(upload, id=stable_resume_id(job_id, upload['content_hash'])),
+                     parsed_data, ResumeAnalyzer.matrix_analysis(matrix, i, j), job_id)
+        for j, job_id in enumerate(job_ids)
+        for i, (upload, parsed_data) in enumerate(zip(uploads, parsed_resumes))
+    ]
+    Resume.save_many(records)
+
+    # One embedding per resume, cached while scoring, indexed once under the
+    # first job's record so candidate search does not return a copy per job
+    profiles = [profile for profile in matrix['features']['job_profiles'] if profile.has_embeddings]
+    if bert_model and profiles and records:
+        model_name = profiles[0].model_name
+        get_resume_index(model_name).add(
+            [record.id for record in records[:len(uploads)]],
+            ResumeAnalyzer.embed_resumes(parsed_resumes, bert_model, model_name)
+        )
+    return records
+
+
+def process_matching(job_descs, uploads, progress=None, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Match a pool of uploaded resumes against several job descriptions. Every
+    resume is parsed and embedded once, each chunk is scored against all the
+    jobs with one ResumeAnalyzer.score_matrix call, and the results are
+    stored under every job, so /results/<job_id> works for each of them.
+
+    Args:
+        job_descs (list): JobDescription objects to score against
+        uploads (list): Saved file info dicts, see build_resume
+        progress: Optional callable called with the number of resumes done
+        chunk_size (int): Number of resumes scored and saved together
+    """
+    bert_model = get_embedding_model()
+    job_profiles = [job_desc.get_profile(bert_model) for job_desc in job_descs]
+    job_ids = [job_desc.id for job_desc in job_descs]
+    job_texts = [job_desc.text for job_desc in job_descs]
+
+    parsed_stream = parse_uploads(uploads)
+    for chunk in _chunks(zip(uploads, parsed_stream), chunk_size):
+        chunk_uploads = [upload for upload, _ in chunk]
+        parsed = [parsed_data for _, parsed_data in chunk]
+        matrix = ResumeAnalyzer.score_matrix(parsed, job_texts, job_profiles=job_profiles, bert_model=bert_model)
+        save_matches(chunk_uploads, parsed, job_ids, matrix, bert_model)
+
+        if progress:
+            progress(len(chunk))
+
+    logger.info(f"Matched {len(uploads)} resumes against {len(job_descs)} job descriptions")
+
+
+def _ready_batches(iterable, max_size):
+    """
+    Yield lists of the items of an iterable that are ready: wait for the
+    first, then take along whatever else has arrived, up to max_size items.
+    The iterable is consumed in a background thread, so items keep arriving
+    (e.g. being read from a request and parsed) while a batch is processed.
+    An exception raised by the iterable is raised after the items before it.
+    """
+    ready = queue.Queue(maxsize=max_size * 2)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                ready.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((_END, e))
+            return
+        put((_END, None))
+
+    threading.Thread(target=produce, name='score-stream-reader', daemon=True).start()
+    try:
+        while True:
+            batch = []
+            item, error = ready.get()
+            while item is not _END:
+                batch.append(item)
+                if len(batch) >= max_size:
+                    break
+                try:
+                    item, error = ready.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                yield batch
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+    finally:
+        stop.set()  # The consumer is gone, e.g. the client disconnected
+
+
+# Marks the end of the items in _ready_batches
+_END = object()
+
+
+def score_stream(job_text, resumes, job_profile=None, max_batch=SCORE_STREAM_MAX_BATCH):
+    """
+    Score resumes as they arrive, so a streaming response can send results
+    while later resumes are still being received or parsed. Resumes that
+    have arrived by the time the previous batch is scored are scored
+    together in one score_batch call. Nothing is saved.
+
+    Args:
+        job_text (str): Job description text
+        resumes: Iterable of (ref, parsed_data) pairs. ref is a dict copied
+            into the result (e.g. the resume's index and client ID);
+            parsed_data is a ResumeParser result, or an exception if the
+            resume could not be read
+        job_profile (JobProfile): Precomputed profile of the job description;
+            built from job_text if None
+        max_batch (int): Most resumes scored in one call
+
+    Yields:
+        dict: ref plus 'candidate_name', 'email', 'phone', 'skills', 'score'
+            and 'component_scores', or ref plus 'error' for a resume that
+            could not be read, parsed or scored, in input order
+    """
+    bert_model = get_embedding_model()
+    if job_profile is None:
+        job_profile, _ = get_job_profile(job_text, bert_model)
+
+    for batch in _ready_batches(resumes, max_batch):
+        errors = {}
+        for position, (ref, parsed_data) in enumerate(batch):
+            if isinstance(parsed_data, Exception):
+                errors[position] = str(parsed_data)
+            elif parsed_data.get('parse_error'):
+                errors[position] = f"Parsing failed: {parsed_data['parse_error']}"
+
+        scorable = [position for position in range(len(batch)) if position not in errors]
+        analyses = {}
+        if scorable:
+            try:
+                results = ResumeAnalyzer.score_batch(
+                    [batch[position][1] for position in scorable], job_text,
+                    job_profile=job_profile, bert_model=bert_model)
+                analyses = dict(zip(scorable, results))
+            except Exception as e:
+                logger.error(f"Error scoring {len(scorable)} resumes: {str(e)}")
+                errors.update((position, f"Scoring failed: {str(e)}") for position in scorable)
+
+        for position, (ref, parsed_data) in enumerate(batch):
+            if position in errors:
+                yield {**ref, 'error': errors[position]}
+                continue
+            analysis = analyses[position]
+            yield {
+                **ref,
+                'candidate_name': parsed_data.get('name', ''),
+                'email': parsed_data.get('email', ''),
+                'phone': parsed_data.get('phone', ''),
+                'skills': parsed_data.get('skills', []),
+                'score': analysis['overall_score'],
+                'component_scores': analysis.get('component_scores', {})
+            }
@@ -1,63 +1,170 @@
-import re
+import math
 import nltk
-import spacy
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
-from sentence_transformers import SentenceTransformer
+from datetime import datetime
 import numpy as np
-
-# Download necessary NLTK data
-nltk.download('stopwords', quiet=True)
-nltk.download('wordnet', quiet=True)
-
-# Load spaCy and BERT models
-try:
-    nlp = spacy.load('en_core_web_sm')
-except OSError:
-    import subprocess
-    subprocess.run(['python', '-m', 'spacy', 'download', 'en_core_web_sm'])
-    nlp = spacy.load('en_core_web_sm')
+from app.utils.model_registry import get_embedding_model
+from app.utils.embedding_cache import embedding_cache
+from app.utils.skills import extract_skills_from_text
+from app.utils.job_profile import get_job_profile, EDUCATION_LEVELS, FIELDS_OF_STUDY
+from app.utils.patterns import RESUME_YEAR_PATTERNS, YEAR_PATTERN, NUMBER_PATTERN
+from app.utils.lexical import (STOP_WORDS, LEMMATIZER, preprocess_text, tfidf_similarities,
+                               tfidf_similarity_matrix, skill_overlap, skill_overlap_matrix,
+                               get_corpus_vectorizer)
+from config import EMBEDDING_MODEL_NAME, CASCADE_TOP_FRACTION, CASCADE_MIN_SCORE, MATCH_BLOCK_SIZE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default weight of each score component in the overall score
+DEFAULT_WEIGHTS = {
+    'skills_match': 0.35,
+    'required_skills': 0.25,
+    'experience_match': 0.20,
+    'education_match': 0.10,
+    'overall_similarity': 0.10
+}
+
+# Key in the stored component_scores of the component each weight applies to
+WEIGHT_COMPONENTS = {
+    'skills_match': 'skills_match',
+    'required_skills': 'required_skills_match',
+    'experience_match': 'experience_match',
+    'education_match': 'education_match',
+    'overall_similarity': 'semantic_similarity'
+}
+
+def resume_text(resume_data):
+    """Combine the parsed resume fields into one text for semantic similarity"""
+    return ' '.join([
+        resume_data.get('name') or '',
+        resume_data.get('email') or '',
+        resume_data.get('phone') or '',
+        ' '.join(resume_data.get('skills') or []),
+        resume_data.get('education') or '',
+        resume_data.get('experience') or ''
+    ])
+
+def experience_years(experience):
+    """
+    Years of experience in a resume's experience section: the largest number
+    of years stated, plus the length of every date range.
+    """
+    resume_years = 0
+    experience_lower = (experience or '').lower()
+    current_year = datetime.now().year
+    
+    for pattern in RESUME_YEAR_PATTERNS:
+        for match in pattern.finditer(experience_lower):
+            if '-' in match.group():
+                # Handle date ranges
+                start, end = match.group().split('-')
+                if 'present' in end or 'current' in end or 'now' in end:
+                    end_year = current_year
+                else:
+                    end_year = int(YEAR_PATTERN.search(end).group())
+                start_year = int(YEAR_PATTERN.search(start).group())
+                resume_years += end_year - start_year
+            else:
+                # Direct year mention
+                years = int(NUMBER_PATTERN.search(match.group()).group())
+                if years > resume_years:
+                    resume_years = years
+    return resume_years
+
+def education_level(education):
+    """Highest education level mentioned, as (level, score); (None, 0) if none"""
+    candidate_level = None
+    candidate_level_score = 0
+    education_lower = (education or '').lower()
+    for level, score in EDUCATION_LEVELS.items():
+        if level in education_lower and score > candidate_level_score:
+            candidate_level = level
+            candidate_level_score = score
+    return candidate_level, candidate_level_score
+
+def education_fields(education):
+    """Fields of study mentioned in an education section"""
+    education_lower = (education or '').lower()
+    return [field for field in FIELDS_OF_STUDY if field in education_lower]
+
+def find_skill_contexts(resume_data, skills):
+    """
+    Find where each skill is mentioned in a resume. The sections are split
+    into sentences once for all the skills.
+    
+    Args:
+        resume_data (dict): Parsed resume data
+        skills: Skills to look for
+        
+    Returns:
+        dict: Skill to a list of (section, sentence) pairs, for skills found
+    """
+    # Experience and education first, then the other sections
+    sentences = []
+    for section in ('experience', 'education'):
+        if resume_data.get(section):
+            sentences.extend((section, sentence) for sentence in nltk.sent_tokenize(resume_data[section]))
+    for section, content in (resume_data.get('sections') or {}).items():
+        if section not in ['experience', 'education']:
+            sentences.extend((section, sentence) for sentence in nltk.sent_tokenize(content))
+    sentences = [(section, sentence, sentence.lower()) for section, sentence in sentences]
+    
+    contexts = {}
+    for skill in skills:
+        skill_lower = skill.lower()
+        found = [(section, sentence.strip()) for section, sentence, lower in sentences if skill_lower in lower]
+        if found:
+            contexts[skill] = found
+    return contexts
+
 class ResumeAnalyzer:
     """
     Analyze resumes against job descriptions using advanced NLP techniques
     including semantic similarity and detailed scoring.
     """
     
-    def __init__(self, resume_data, job_description_text):
+    def __init__(self, resume_data, job_description_text, bert_model=None, job_profile=None):
         """
         Initialize the analyzer with parsed resume data and job description text
+
+        Args:
+            resume_data (dict): Parsed resume data from ResumeParser
+            job_description_text (str): Job description to score against
+            bert_model: Embedding model to use; defaults to the shared model
+                from the process-wide model registry
+            job_profile (JobProfile): Precomputed job description analysis;
+                looked up or built from job_description_text if not given
         """
         self.resume_data = resume_data
         self.job_description = job_description_text
-        self.job_skills = self._extract_skills_from_text(job_description_text)
-        self.required_skills = self._identify_required_skills()
         
-        # Load BERT model for semantic similarity
-        try:
-            self.bert_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        except Exception as e:
-            logger.error(f"Error loading BERT model: {str(e)}")
-            self.bert_model = None
+        # Use the injected BERT model, or the one shared across the process
+        self.bert_model = bert_model if bert_model is not None else get_embedding_model()
+        
+        # Job description analysis is shared by every resume scored against it
+        if job_profile is None:
+            job_profile, _ = get_job_profile(job_description_text, self.bert_model)
+        self.job_profile = job_profile
+        self.model_name = job_profile.model_name or EMBEDDING_MODEL_NAME
+        self.job_skills = job_profile.job_skills
+        self.required_skills = job_profile.required_skills
         
         # Initialize NLP tools
-        self.stop_words = set(stopwords.words('english'))
-        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = STOP_WORDS
+        self.lemmatizer = LEMMATIZER
         
-    def calculate_score(self, weights=None):
+    def calculate_score(self, weights=None, precomputed=None):
         """
         Calculate an overall relevance score with detailed breakdown
         
         Args:
             weights (dict): Custom weights for different score components
+            precomputed (dict): Similarities already computed by score_batch:
+                'semantic_similarity' (float), 'lexical_similarity' (float)
+                and 'experience_similarities' (matrix of resume experience
+                lines x job description lines)
         
         Returns:
             dict: Detailed scoring information including:
@@ -69,21 +176,19 @@ class ResumeAnalyzer:
                 - experience_matches: list of relevant experience matches
                 - education_matches: list of education matches
         """
-        if weights is None:
-            weights = {
-                'skills_match': 0.35,
-                'required_skills': 0.25,
-                'experience_match': 0.20,
-                'education_match': 0.10,
-                'overall_similarity': 0.10
-            }
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
             
         try:
             # Calculate individual scores with detailed information
             skills_analysis = self._analyze_skills_match()
-            experience_analysis = self._analyze_experience_match()
+            precomputed = precomputed or {}
+            experience_analysis = self._analyze_experience_match(precomputed.get('experience_similarities'))
             education_analysis = self._analyze_education_match()
-            similarity_analysis = self._calculate_semantic_similarity()
+            lexical_similarity = precomputed.get('lexical_similarity')
+            if lexical_similarity is None:
+                lexical_similarity = self._calculate_lexical_similarity()
+            similarity_analysis = self._calculate_semantic_similarity(
+                precomputed.get('semantic_similarity'), lexical_similarity)
             
             # Calculate weighted score
             weighted_score = (
@@ -102,7 +207,8 @@ class ResumeAnalyzer:
                     'required_skills_match': round(skills_analysis['required_score'] * 100, 2),
                     'experience_match': round(experience_analysis['score'] * 100, 2),
                     'education_match': round(education_analysis['score'] * 100, 2),
-                    'semantic_similarity': round(similarity_analysis['score'] * 100, 2)
+                    'semantic_similarity': round(similarity_analysis['score'] * 100, 2),
+                    'lexical_similarity': round(lexical_similarity * 100, 2)
                 },
                 'skills_analysis': {
                     'matched_skills': skills_analysis['matched_skills'],
@@ -129,40 +235,547 @@ class ResumeAnalyzer:
                 'similarity_analysis': {}
             }
     
-    def _identify_required_skills(self):
+    @classmethod
+    def score_batch(cls, parsed_resumes, job_description_text, job_profile=None, bert_model=None, weights=None,
+                    cascade=False, cascade_fraction=CASCADE_TOP_FRACTION, cascade_min_score=CASCADE_MIN_SCORE):
         """
-        Identify required skills from job description using keyword analysis
-        """
-        required_skills = set()
-        text_lower = self.job_description.lower()
+        Score many resumes against one job description.
+        
+        All resume texts and experience lines are embedded in a single batched
+        encode call (skipping those already in the embedding cache), and every
+        similarity is computed with one matrix product over normalized
+        embeddings, instead of encoding each resume separately.
+        
+        In cascade mode the batch is first ranked by prefilter_scores, and
+        only the top cascade_fraction of resumes, plus any scoring at least
+        cascade_min_score, are embedded. The rest are scored without
+        embeddings. Each result then records its stage under 'cascade'.
         
-        # Look for requirement indicators
-        requirement_patterns = [
-            r'required skills?:?(.*?)(?:\n\n|\Z)',
-            r'requirements?:?(.*?)(?:\n\n|\Z)',
-            r'must have:?(.*?)(?:\n\n|\Z)',
-            r'essential skills?:?(.*?)(?:\n\n|\Z)',
-            r'key skills?:?(.*?)(?:\n\n|\Z)'
+        Args:
+            parsed_resumes (list): Parsed resume data dicts from ResumeParser
+            job_description_text (str): Job description to score against
+            job_profile (JobProfile): Precomputed job description analysis
+            bert_model: Embedding model; defaults to the shared model
+            weights (dict): Custom weights for different score components
+            cascade (bool): Prefilter the batch lexically before embedding
+            cascade_fraction (float): Share of the batch always passed on
+            cascade_min_score (float): Prefilter score (0-1) from which a
+                resume is passed on regardless of rank; None to rank only
+            
+        Returns:
+            list: calculate_score results, one per resume, in input order
+        """
+        if bert_model is None:
+            bert_model = get_embedding_model()
+        if job_profile is None:
+            job_profile, _ = get_job_profile(job_description_text, bert_model)
+        
+        analyzers = [
+            cls(resume_data, job_description_text, bert_model=bert_model, job_profile=job_profile)
+            for resume_data in parsed_resumes
         ]
+        precomputed = [{} for _ in analyzers]
+        
+        # TF-IDF similarity of the whole batch in one sparse matrix product
+        lexical = cls.lexical_similarities(parsed_resumes, job_description_text)
+        for values, similarity in zip(precomputed, lexical):
+            values['lexical_similarity'] = float(similarity)
+        
+        # Resumes that get embedding-based scoring
+        selected = list(range(len(analyzers)))
+        prefilter = None
+        if cascade and analyzers:
+            prefilter = cls.prefilter_scores(parsed_resumes, job_description_text, job_profile, weights,
+                                             text_scores=lexical)
+            selected = cls._cascade_selection(prefilter, cascade_fraction, cascade_min_score)
+            passed = set(selected)
+            for i, analyzer in enumerate(analyzers):
+                if i not in passed:
+                    analyzer.bert_model = None  # Scored without embeddings
+            logger.info(f"Cascade passed {len(selected)} of {len(analyzers)} resumes to embedding scoring")
+        
+        if selected and bert_model and job_profile.has_embeddings:
+            try:
+                texts = [analyzers[i]._resume_text() for i in selected]
+                chunk_lists = [
+                    analyzers[i]._experience_chunks() if analyzers[i].resume_data.get('experience') else []
+                    for i in selected
+                ]
+                all_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+                
+                # One encode call for every resume text and experience line not cached yet
+                embeddings = embedding_cache.encode(bert_model, texts + all_chunks, job_profile.model_name)
+                text_embeddings = embeddings[:len(texts)]
+                chunk_embeddings = embeddings[len(texts):]
+                
+                # Cosine similarities as matrix products of normalized vectors
+                semantic_scores = text_embeddings @ job_profile.text_embedding
+                chunk_similarities = chunk_embeddings @ job_profile.chunk_embeddings.T
+                
+                offset = 0
+                for j, (i, chunks) in enumerate(zip(selected, chunk_lists)):
+                    precomputed[i]['semantic_similarity'] = float(semantic_scores[j])
+                    if chunks:
+                        precomputed[i]['experience_similarities'] = chunk_similarities[offset:offset + len(chunks)]
+                    offset += len(chunks)
+            except Exception as e:
+                logger.error(f"Error in batched embedding: {str(e)}")
+                for values in precomputed:
+                    values.pop('semantic_similarity', None)
+                    values.pop('experience_similarities', None)
+        
+        results = [
+            analyzer.calculate_score(weights, precomputed=values)
+            for analyzer, values in zip(analyzers, precomputed)
+        ]
+        if prefilter is not None:
+            passed = set(selected)
+            for i, result in enumerate(results):
+                result['cascade'] = {
+                    'stage': 'full' if i in passed else 'prefilter',
+                    'prefilter_score': round(float(prefilter[i]) * 100, 2)
+                }
+        return results
+    
+    @classmethod
+    def score_matrix(cls, parsed_resumes, job_texts, job_profiles=None, bert_model=None, weights=None,
+                     block_size=MATCH_BLOCK_SIZE):
+        """
+        Score many resumes against several job descriptions in one pass.
+        
+        Each resume is embedded once for all the jobs, and every component is
+        computed for the whole resumes x jobs grid with matrix operations:
+        skill overlaps as sparse products of skill indicator matrices,
+        semantic and TF-IDF similarities as products of normalized vectors,
+        and experience line matching as one product of all resume lines with
+        all job lines, reduced per job and per resume. Resumes are embedded
+        and matched in blocks of block_size to bound memory. Scores equal
+        those of calculate_score; the details for one pair are assembled by
+        matrix_analysis.
         
-        # Look for requirement keywords
-        requirement_keywords = ['required', 'must have', 'essential', 'necessary']
+        Args:
+            parsed_resumes (list): Parsed resume data dicts from ResumeParser
+            job_texts (list): Job description texts
+            job_profiles (list): Precomputed profile of each job description
+            bert_model: Embedding model; defaults to the shared model
+            weights (dict): Custom weights for different score components
+            block_size (int): Resumes embedded and matched together
+            
+        Returns:
+            dict: 'overall_score' (resumes x jobs array of 0-100 scores),
+                'component_scores' (component name to resumes x jobs array
+                of 0-100 scores) and 'features' for matrix_analysis
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        if bert_model is None:
+            bert_model = get_embedding_model()
+        if job_profiles is None:
+            job_profiles = [get_job_profile(text, bert_model)[0] for text in job_texts]
+        shape = (len(parsed_resumes), len(job_texts))
+        
+        # Skills: resume skill indicators times job skill indicators
+        skill_lists = [data.get('skills') or [] for data in parsed_resumes]
+        skills_score = skill_overlap_matrix(skill_lists, [profile.job_skills for profile in job_profiles])
+        required_score = skill_overlap_matrix(skill_lists, [profile.required_skills for profile in job_profiles],
+                                              empty=1.0)
+        
+        # TF-IDF similarity of every resume to every job
+        try:
+            lexical = tfidf_similarity_matrix([resume_text(data) for data in parsed_resumes], list(job_texts),
+                                              get_corpus_vectorizer())
+        except Exception as e:
+            logger.error(f"Error in lexical similarity calculation: {str(e)}")
+            lexical = np.zeros(shape)
+        
+        # Experience: years term plus semantic line matching term
+        has_experience = np.array([bool(data.get('experience')) for data in parsed_resumes], dtype=bool)
+        has_job_text = np.array([bool(text) for text in job_texts], dtype=bool)
+        years = np.array([experience_years(data.get('experience')) for data in parsed_resumes], dtype=np.float64)
+        required_years = np.array([profile.required_years for profile in job_profiles], dtype=np.float64)
+        years_term = np.minimum(np.divide(years[:, None], required_years[None, :],
+                                          out=np.zeros(shape), where=required_years[None, :] > 0), 1.0)
+        
+        embedded, semantic, experience_semantic, experience_matches = cls._matrix_embeddings(
+            parsed_resumes, job_profiles, bert_model, block_size)
+        has_chunks = np.array([bool(cls._chunks_of(data)) for data in parsed_resumes], dtype=bool)
+        experience_score = np.where(has_experience[:, None] & has_job_text[None, :],
+                                    years_term * 0.5 + experience_semantic * 0.5, 0.0)
+        
+        # Education: level and field of study terms
+        has_education = np.array([bool(data.get('education')) for data in parsed_resumes], dtype=bool)
+        level_scores = np.array([education_level(data.get('education'))[1] for data in parsed_resumes],
+                                dtype=np.float64)
+        required_levels = np.array([profile.required_level_score if profile.required_level else 0
+                                    for profile in job_profiles], dtype=np.float64)
+        level_term = np.minimum(np.divide(level_scores[:, None], required_levels[None, :],
+                                          out=np.zeros(shape), where=required_levels[None, :] > 0), 1.0)
+        field_lists = [education_fields(data.get('education')) for data in parsed_resumes]
+        has_required_fields = np.array([bool(profile.required_fields) for profile in job_profiles], dtype=bool)
+        has_fields = np.array([bool(fields) for fields in field_lists], dtype=bool)
+        field_term = np.where(has_required_fields[None, :],
+                              skill_overlap_matrix(field_lists, [profile.required_fields for profile in job_profiles]),
+                              np.where(has_fields[:, None], 0.5, 0.0))
+        education_score = np.where(has_education[:, None], level_term * 0.6 + field_term * 0.4, 0.0)
+        
+        # Semantic similarity, or TF-IDF similarity for jobs without embeddings
+        similarity_score = np.minimum(np.where(embedded[None, :], semantic, lexical), 1.0)
+        
+        weighted_score = (
+            (skills_score * weights['skills_match']) +
+            (required_score * weights['required_skills']) +
+            (experience_score * weights['experience_match']) +
+            (education_score * weights['education_match']) +
+            (similarity_score * weights['overall_similarity'])
+        ) * 100
+        
+        logger.info(f"Scored {shape[0]} resumes against {shape[1]} job descriptions")
+        return {
+            'overall_score': np.round(weighted_score, 2),
+            'component_scores': {
+                'skills_match': np.round(skills_score * 100, 2),
+                'required_skills_match': np.round(required_score * 100, 2),
+                'experience_match': np.round(experience_score * 100, 2),
+                'education_match': np.round(education_score * 100, 2),
+                'semantic_similarity': np.round(similarity_score * 100, 2),
+                'lexical_similarity': np.round(lexical * 100, 2)
+            },
+            'features': {
+                'parsed_resumes': parsed_resumes,
+                'job_texts': list(job_texts),
+                'job_profiles': job_profiles,
+                'years': years,
+                'years_term': years_term,
+                'has_chunks': has_chunks,
+                'embedded': embedded,
+                'semantic': semantic,
+                'lexical': lexical,
+                'experience_semantic': experience_semantic,
+                'experience_matches': experience_matches,
+                'level_term': level_term,
+                'field_lists': field_lists,
+                'field_term': field_term,
+                'skill_contexts': {}
+            }
+        }
+    
+    @staticmethod
+    def _chunks_of(resume_data):
+        """Split a resume's experience section into lines for semantic matching"""
+        experience = resume_data.get('experience') or ''
+        return [s.strip() for s in experience.split('\n') if s.strip()]
+    
+    @classmethod
+    def _matrix_embeddings(cls, parsed_resumes, job_profiles, bert_model, block_size):
+        """
+        Embedding-based parts of score_matrix, block by block of resumes.
         
-        # Extract skills from requirement sections
-        for pattern in requirement_patterns:
-            matches = re.finditer(pattern, text_lower, re.DOTALL)
-            for match in matches:
-                skills = self._extract_skills_from_text(match.group(1))
-                required_skills.update(skills)
+        Returns:
+            tuple: (embedded, semantic, experience_semantic, experience_matches)
+                - which jobs have embeddings, resumes x jobs text similarities,
+                resumes x jobs mean best line similarities, and the strong
+                line matches of each (resume, job) pair
+        """
+        shape = (len(parsed_resumes), len(job_profiles))
+        embedded = np.array([bool(bert_model) and profile.has_embeddings and len(profile.chunk_embeddings) > 0
+                             for profile in job_profiles], dtype=bool)
+        semantic = np.zeros(shape)
+        experience_semantic = np.zeros(shape)
+        experience_matches = {}
+        columns = np.flatnonzero(embedded)
+        if not len(columns) or not parsed_resumes:
+            return embedded, semantic, experience_semantic, experience_matches
+        
+        model_name = job_profiles[columns[0]].model_name
+        job_embeddings = np.stack([job_profiles[j].text_embedding for j in columns])
+        job_chunk_embeddings = np.concatenate([job_profiles[j].chunk_embeddings for j in columns])
+        # Column where each job's lines start in job_chunk_embeddings
+        job_offsets = np.cumsum([0] + [len(job_profiles[j].chunk_embeddings) for j in columns[:-1]])
         
-        # Look for skills with requirement keywords
-        lines = text_lower.split('\n')
-        for line in lines:
-            if any(keyword in line for keyword in requirement_keywords):
-                skills = self._extract_skills_from_text(line)
-                required_skills.update(skills)
+        try:
+            for start in range(0, len(parsed_resumes), block_size):
+                block = parsed_resumes[start:start + block_size]
+                texts = [resume_text(data) for data in block]
+                chunk_lists = [cls._chunks_of(data) for data in block]
+                all_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+                
+                # One encode call for the block's resume texts and experience lines
+                embeddings = embedding_cache.encode(bert_model, texts + all_chunks, model_name)
+                semantic[start:start + len(block), columns] = embeddings[:len(texts)] @ job_embeddings.T
+                if not all_chunks:
+                    continue
+                
+                # Best matching line of each job for every resume line, then
+                # the mean over each resume's lines
+                similarities = embeddings[len(texts):] @ job_chunk_embeddings.T
+                best = np.maximum.reduceat(similarities, job_offsets, axis=1)
+                rows = [i for i, chunks in enumerate(chunk_lists) if chunks]
+                counts = np.array([len(chunk_lists[i]) for i in rows])
+                chunk_offsets = np.cumsum(np.concatenate([[0], counts[:-1]]))
+                means = np.add.reduceat(best, chunk_offsets, axis=0) / counts[:, None]
+                experience_semantic[np.ix_(np.array(rows) + start, columns)] = means
+                
+                # Strong matches (similarity above 0.7) for the analysis details
+                owners = np.repeat(rows, counts)
+                for line, column in zip(*np.nonzero(best > 0.7)):
+                    job = columns[column]
+                    offset = job_offsets[column]
+                    job_line = int(np.argmax(similarities[line, offset:offset + len(job_profiles[job].chunks)]))
+                    experience_matches.setdefault((start + int(owners[line]), int(job)), []).append({
+                        'resume_text': all_chunks[line],
+                        'job_text': job_profiles[job].chunks[job_line],
+                        'similarity': float(best[line, column])
+                    })
+        except Exception as e:
+            logger.error(f"Error in batched embedding: {str(e)}")
+            embedded[:] = False
+            return embedded, np.zeros(shape), np.zeros(shape), {}
         
-        return list(required_skills)
+        return embedded, semantic, experience_semantic, experience_matches
+    
+    @staticmethod
+    def matrix_scores(matrix, i, j):
+        """Overall and component scores of resume i against job j in a score_matrix result"""
+        return {
+            'overall_score': float(matrix['overall_score'][i, j]),
+            'component_scores': {name: float(scores[i, j]) for name, scores in matrix['component_scores'].items()}
+        }
+    
+    @classmethod
+    def matrix_analysis(cls, matrix, i, j):
+        """
+        Detailed analysis of resume i against job j from a score_matrix
+        result, in the format of calculate_score.
+        
+        Args:
+            matrix (dict): score_matrix result
+            i (int): Resume index
+            j (int): Job description index
+            
+        Returns:
+            dict: Scores and analysis details, see calculate_score
+        """
+        features = matrix['features']
+        resume_data = features['parsed_resumes'][i]
+        job_profile = features['job_profiles'][j]
+        
+        resume_skills = set(resume_data.get('skills') or [])
+        job_skills = set(job_profile.job_skills)
+        matched_skills = resume_skills.intersection(job_skills)
+        
+        # Contexts of all of a resume's skills are found once for every job
+        contexts = features['skill_contexts'].get(i)
+        if contexts is None:
+            contexts = features['skill_contexts'][i] = find_skill_contexts(resume_data, sorted(resume_skills))
+        
+        experience_details = []
+        if resume_data.get('experience') and features['job_texts'][j]:
+            if job_profile.required_years > 0:
+                experience_details.append({
+                    'type': 'years',
+                    'required': job_profile.required_years,
+                    'found': int(features['years'][i]),
+                    'score': float(features['years_term'][i, j])
+                })
+            if features['has_chunks'][i] and features['embedded'][j]:
+                experience_details.append({
+                    'type': 'semantic',
+                    'score': float(features['experience_semantic'][i, j]),
+                    'matches': features['experience_matches'].get((i, j), [])
+                })
+        
+        education_details = []
+        if resume_data.get('education'):
+            if job_profile.required_level:
+                education_details.append({
+                    'type': 'level',
+                    'required': job_profile.required_level,
+                    'found': education_level(resume_data.get('education'))[0],
+                    'score': float(features['level_term'][i, j])
+                })
+            candidate_fields = features['field_lists'][i]
+            if job_profile.required_fields:
+                education_details.append({
+                    'type': 'field',
+                    'required': job_profile.required_fields,
+                    'found': candidate_fields,
+                    'matches': list(set(job_profile.required_fields).intersection(candidate_fields)),
+                    'score': float(features['field_term'][i, j])
+                })
+            elif candidate_fields:
+                education_details.append({
+                    'type': 'field',
+                    'found': candidate_fields,
+                    'score': 0.5
+                })
+        
+        if features['embedded'][j]:
+            similarity_details = {
+                'similarity_score': float(features['semantic'][i, j]),
+                'method': 'BERT semantic similarity'
+            }
+        else:
+            similarity_details = {
+                'similarity_score': float(features['lexical'][i, j]),
+                'method': 'TF-IDF lexical similarity'
+            }
+        
+        return {
+            **cls.matrix_scores(matrix, i, j),
+            'skills_analysis': {
+                'matched_skills': list(matched_skills),
+                'missing_skills': list(job_skills - resume_skills),
+                'skill_contexts': {skill: contexts[skill] for skill in matched_skills if skill in contexts},
+                'required_skills': job_profile.required_skills
+            },
+            'experience_analysis': experience_details,
+            'education_analysis': education_details,
+            'similarity_analysis': similarity_details
+        }
+    
+    @staticmethod
+    def lexical_similarities(parsed_resumes, job_description_text):
+        """
+        TF-IDF cosine similarity of each resume to a job description, using
+        the vocabulary and IDF fitted on the stored corpus when available.
+        
+        Args:
+            parsed_resumes (list): Parsed resume data dicts
+            job_description_text (str): Job description text
+            
+        Returns:
+            np.ndarray: Similarity of each resume, between 0 and 1
+        """
+        try:
+            return tfidf_similarities([resume_text(data) for data in parsed_resumes],
+                                      job_description_text, get_corpus_vectorizer())
+        except Exception as e:
+            logger.error(f"Error in lexical similarity calculation: {str(e)}")
+            return np.zeros(len(parsed_resumes))
+    
+    @staticmethod
+    def prefilter_scores(parsed_resumes, job_description_text, job_profile, weights=None, text_scores=None):
+        """
+        Cheap lexical score of each resume for the first cascade stage: skill
+        overlap plus TF-IDF cosine similarity, computed for the whole batch
+        with sparse matrix operations. TF-IDF similarity stands in for the
+        experience, education and semantic components under their weights.
+        
+        Args:
+            parsed_resumes (list): Parsed resume data dicts
+            job_description_text (str): Job description text
+            job_profile (JobProfile): Job description analysis
+            weights (dict): Custom weights for different score components
+            text_scores (np.ndarray): TF-IDF similarities, if already computed
+            
+        Returns:
+            np.ndarray: Score of each resume, between 0 and 1
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        skill_lists = [data.get('skills') or [] for data in parsed_resumes]
+        
+        skills_score = skill_overlap(skill_lists, job_profile.job_skills)
+        if job_profile.required_skills:
+            required_score = skill_overlap(skill_lists, job_profile.required_skills)
+        else:
+            required_score = np.ones(len(parsed_resumes))
+        text_score = text_scores if text_scores is not None else \
+            ResumeAnalyzer.lexical_similarities(parsed_resumes, job_description_text)
+        
+        text_weight = weights['experience_match'] + weights['education_match'] + weights['overall_similarity']
+        total = weights['skills_match'] + weights['required_skills'] + text_weight
+        if total <= 0:
+            return np.zeros(len(parsed_resumes))
+        return (weights['skills_match'] * skills_score +
+                weights['required_skills'] * required_score +
+                text_weight * text_score) / total
+    
+    @staticmethod
+    def _cascade_selection(scores, fraction, min_score):
+        """Indexes of the top fraction of scores plus those at least min_score"""
+        top_count = max(1, math.ceil(len(scores) * fraction))
+        selected = set(np.argsort(-scores, kind='stable')[:top_count].tolist())
+        if min_score is not None:
+            selected.update(np.flatnonzero(scores >= min_score).tolist())
+        return sorted(selected)
+    
+    @staticmethod
+    def normalize_weights(weights=None):
+        """
+        Check custom weights and scale them to sum to 1. Missing components
+        keep their default weight.
+        
+        Args:
+            weights (dict): Weight per component, see DEFAULT_WEIGHTS
+            
+        Returns:
+            dict: Weight of every component
+            
+        Raises:
+            ValueError: If a component is unknown or a weight is not a
+                non-negative number, or all weights are zero
+        """
+        weights = weights or {}
+        unknown = set(weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown score components: {', '.join(sorted(unknown))}")
+        
+        combined = {}
+        for name, default in DEFAULT_WEIGHTS.items():
+            try:
+                combined[name] = float(weights.get(name, default))
+            except (TypeError, ValueError):
+                raise ValueError(f"Weight for {name} must be a number")
+            if not np.isfinite(combined[name]) or combined[name] < 0:
+                raise ValueError(f"Weight for {name} must be a non-negative number")
+        
+        total = sum(combined.values())
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+        return {name: weight / total for name, weight in combined.items()}
+    
+    @classmethod
+    def rescore(cls, component_scores, weights=None):
+        """
+        Recombine stored component scores under new weights in one matrix
+        product, without re-running any analysis.
+        
+        Args:
+            component_scores (np.ndarray): Resumes x components matrix of the
+                stored 0-100 component scores, columns in WEIGHT_COMPONENTS
+                order; NaN where a score is missing
+            weights (dict): Custom weights, see normalize_weights
+            
+        Returns:
+            np.ndarray: Overall score of each resume, between 0 and 100
+        """
+        weights = cls.normalize_weights(weights)
+        weight_vector = np.array([weights[name] for name in WEIGHT_COMPONENTS], dtype=np.float64)
+        scores = np.nan_to_num(np.asarray(component_scores, dtype=np.float64))
+        return np.round(scores @ weight_vector, 2)
+    
+    @staticmethod
+    def embed_resumes(parsed_resumes, bert_model, model_name=EMBEDDING_MODEL_NAME):
+        """
+        Embed the combined text of each resume, as used for semantic
+        similarity and the candidate search index.
+        
+        Args:
+            parsed_resumes (list): Parsed resume data dicts
+            bert_model: Embedding model
+            model_name (str): Name of the embedding model
+            
+        Returns:
+            np.ndarray: Normalized float32 embeddings, one row per resume
+        """
+        return embedding_cache.encode(bert_model, [resume_text(data) for data in parsed_resumes], model_name)
+    
+    def _resume_text(self):
+        """Combine the parsed resume fields into one text for semantic similarity"""
+        return resume_text(self.resume_data)
+    
+    def _experience_chunks(self):
+        """Split the experience section into lines for semantic matching"""
+        return self._chunks_of(self.resume_data)
     
     def _analyze_skills_match(self):
         """
@@ -198,36 +811,15 @@ class ResumeAnalyzer:
     
     def _find_skill_context(self, skill):
         """Find where a skill is mentioned in the resume"""
-        contexts = []
-        
-        # Look in experience section
-        if self.resume_data.get('experience'):
-            sentences = nltk.sent_tokenize(self.resume_data['experience'])
-            for sentence in sentences:
-                if skill.lower() in sentence.lower():
-                    contexts.append(('experience', sentence.strip()))
-        
-        # Look in education section
-        if self.resume_data.get('education'):
-            sentences = nltk.sent_tokenize(self.resume_data['education'])
-            for sentence in sentences:
-                if skill.lower() in sentence.lower():
-                    contexts.append(('education', sentence.strip()))
-        
-        # Look in other sections
-        if self.resume_data.get('sections'):
-            for section, content in self.resume_data['sections'].items():
-                if section not in ['experience', 'education']:
-                    sentences = nltk.sent_tokenize(content)
-                    for sentence in sentences:
-                        if skill.lower() in sentence.lower():
-                            contexts.append((section, sentence.strip()))
-        
-        return contexts
+        return find_skill_contexts(self.resume_data, [skill]).get(skill, [])
     
-    def _analyze_experience_match(self):
+    def _analyze_experience_match(self, similarities=None):
         """
         Analyze experience match using semantic similarity and pattern matching
+        
+        Args:
+            similarities (np.ndarray): Precomputed similarities of resume
+                experience lines to job description lines, if available
         """
         resume_experience = self.resume_data.get('experience', '')
         if not resume_experience or not self.job_description:
@@ -236,47 +828,11 @@ class ResumeAnalyzer:
         details = []
         total_score = 0.0
         
-        # Extract experience requirements from job description
-        experience_patterns = [
-            r'(\d+)[+\s]*(?:years?|yrs?)(?:\s+of)?\s+(?:experience|exp)',
-            r'experience:\s*(\d+)[+\s]*(?:years?|yrs?)',
-            r'(?:minimum|min)\s+(\d+)\s+(?:years?|yrs?)'
-        ]
-        
-        required_years = 0
-        for pattern in experience_patterns:
-            matches = re.finditer(pattern, self.job_description.lower())
-            for match in matches:
-                years = int(match.group(1))
-                if years > required_years:
-                    required_years = years
+        # Experience requirement from the job profile
+        required_years = self.job_profile.required_years
         
         # Extract years from resume experience
-        resume_years = 0
-        year_patterns = [
-            r'(\d+)[+\s]*(?:years?|yrs?)(?:\s+of)?\s+(?:experience|exp)',
-            r'(?:19|20)\d{2}\s*-\s*(?:present|current|now|(?:19|20)\d{2})',
-            r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\s+(?:19|20)\d{2}'
-        ]
-        
-        for pattern in year_patterns:
-            matches = re.finditer(pattern, resume_experience.lower())
-            for match in matches:
-                if '-' in match.group():
-                    # Handle date ranges
-                    start, end = match.group().split('-')
-                    if 'present' in end.lower() or 'current' in end.lower() or 'now' in end.lower():
-                        from datetime import datetime
-                        end_year = datetime.now().year
-                    else:
-                        end_year = int(re.search(r'(?:19|20)\d{2}', end).group())
-                    start_year = int(re.search(r'(?:19|20)\d{2}', start).group())
-                    resume_years += end_year - start_year
-                else:
-                    # Direct year mention
-                    years = int(re.search(r'\d+', match.group()).group())
-                    if years > resume_years:
-                        resume_years = years
+        resume_years = experience_years(resume_experience)
         
         # Score based on years of experience
         if required_years > 0:
@@ -290,18 +846,17 @@ class ResumeAnalyzer:
             total_score += years_score * 0.5  # Weight: 50%
         
         # Calculate semantic similarity of experience descriptions
-        if self.bert_model:
+        # Split into chunks to handle long text
+        resume_chunks = self._experience_chunks()
+        if resume_chunks and self.bert_model and self.job_profile.has_embeddings:
             try:
-                # Split into chunks to handle long text
-                resume_chunks = [s.strip() for s in resume_experience.split('\n') if s.strip()]
-                job_chunks = [s.strip() for s in self.job_description.split('\n') if s.strip()]
+                job_chunks = self.job_profile.chunks
                 
-                # Get embeddings
-                resume_embeddings = self.bert_model.encode(resume_chunks)
-                job_embeddings = self.bert_model.encode(job_chunks)
+                if similarities is None:
+                    # Job description lines are embedded once in the job profile
+                    resume_embeddings = embedding_cache.encode(self.bert_model, resume_chunks, self.model_name)
+                    similarities = resume_embeddings @ self.job_profile.chunk_embeddings.T
                 
-                # Calculate similarity
-                similarities = cosine_similarity(resume_embeddings, job_embeddings)
                 max_similarities = np.max(similarities, axis=1)
                 semantic_score = np.mean(max_similarities)
                 
@@ -338,33 +893,12 @@ class ResumeAnalyzer:
         details = []
         total_score = 0.0
         
-        # Education level hierarchy
-        education_levels = {
-            'phd': 5,
-            'doctorate': 5,
-            'masters': 4,
-            'bachelors': 3,
-            'associate': 2,
-            'high school': 1
-        }
-        
-        # Find required education level in job description
-        required_level = None
-        required_level_score = 0
-        for level, score in education_levels.items():
-            if level in self.job_description.lower():
-                if score > required_level_score:
-                    required_level = level
-                    required_level_score = score
+        # Required education level from the job profile
+        required_level = self.job_profile.required_level
+        required_level_score = self.job_profile.required_level_score
         
         # Find candidate's education level
-        candidate_level = None
-        candidate_level_score = 0
-        for level, score in education_levels.items():
-            if level in resume_education.lower():
-                if score > candidate_level_score:
-                    candidate_level = level
-                    candidate_level_score = score
+        candidate_level, candidate_level_score = education_level(resume_education)
         
         # Score based on education level match
         if required_level:
@@ -382,20 +916,8 @@ class ResumeAnalyzer:
             total_score += level_score * 0.6  # Weight: 60%
         
         # Look for field of study match
-        fields_of_study = [
-            'computer science', 'software engineering', 'information technology',
-            'engineering', 'mathematics', 'physics', 'business', 'data science',
-            'artificial intelligence', 'machine learning', 'cybersecurity'
-        ]
-        
-        required_fields = []
-        candidate_fields = []
-        
-        for field in fields_of_study:
-            if field in self.job_description.lower():
-                required_fields.append(field)
-            if field in resume_education.lower():
-                candidate_fields.append(field)
+        required_fields = self.job_profile.required_fields
+        candidate_fields = education_fields(resume_education)
         
         if required_fields:
             field_matches = set(required_fields).intersection(set(candidate_fields))
@@ -423,30 +945,35 @@ class ResumeAnalyzer:
             'details': details
         }
     
-    def _calculate_semantic_similarity(self):
+    def _calculate_lexical_similarity(self):
+        """TF-IDF cosine similarity between this resume and the job description"""
+        return float(self.lexical_similarities([self.resume_data], self.job_description)[0])
+    
+    def _calculate_semantic_similarity(self, similarity=None, lexical_similarity=None):
         """
         Calculate overall semantic similarity between resume and job description
+        
+        Args:
+            similarity (float): Precomputed similarity, if available
+            lexical_similarity (float): TF-IDF similarity, used instead when
+                no embedding model is available
         """
-        if not self.bert_model:
-            return {'score': 0.0, 'details': {}}
+        if not self.bert_model or not self.job_profile.has_embeddings:
+            if lexical_similarity is None:
+                return {'score': 0.0, 'details': {}}
+            return {
+                'score': min(lexical_similarity, 1.0),
+                'details': {
+                    'similarity_score': lexical_similarity,
+                    'method': 'TF-IDF lexical similarity'
+                }
+            }
         
         try:
-            # Combine all resume text
-            resume_text = ' '.join([
-                self.resume_data.get('name', ''),
-                self.resume_data.get('email', ''),
-                self.resume_data.get('phone', ''),
-                ' '.join(self.resume_data.get('skills', [])),
-                self.resume_data.get('education', ''),
-                self.resume_data.get('experience', '')
-            ])
-            
-            # Get embeddings
-            resume_embedding = self.bert_model.encode([resume_text])
-            job_embedding = self.bert_model.encode([self.job_description])
-            
-            # Calculate similarity
-            similarity = cosine_similarity(resume_embedding, job_embedding)[0][0]
+            if similarity is None:
+                # Embed the combined resume text; the job text is embedded in the profile
+                resume_embedding = embedding_cache.encode(self.bert_model, [self._resume_text()], self.model_name)
+                similarity = float(resume_embedding[0] @ self.job_profile.text_embedding)
             
             return {
                 'score': min(similarity, 1.0),
@@ -470,66 +997,12 @@ class ResumeAnalyzer:
         Returns:
             list: List of skills found in the text
         """
-        # Same list of common skills used in ResumeParser
-        common_skills = [
-            # Programming languages
-            'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'typescript',
-            'scala', 'rust', 'go', 'perl', 'r', 'matlab', 'objective-c', 'dart', 'shell', 'powershell',
-            
-            # Web development
-            'html', 'css', 'jquery', 'bootstrap', 'sass', 'less', 'angular', 'react', 'vue', 'node',
-            'django', 'flask', 'spring', 'asp.net', 'laravel', 'symfony', 'wordpress', 'shopify',
-            
-            # Databases
-            'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'cassandra', 'redis', 'sqlite',
-            'dynamodb', 'firestore', 'couchdb', 'mariadb', 'mssql', 'neo4j',
-            
-            # Cloud platforms
-            'aws', 'azure', 'gcp', 'google cloud', 'heroku', 'digital ocean', 'firebase',
-            'cloudflare', 'vercel', 'netlify',
-            
-            # DevOps
-            'docker', 'kubernetes', 'jenkins', 'gitlab', 'github actions', 'terraform', 'ansible',
-            'chef', 'puppet', 'circleci', 'travis', 'prometheus', 'grafana',
-            
-            # Data science
-            'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'keras', 'scikit-learn',
-            'pandas', 'numpy', 'scipy', 'data analysis', 'data visualization', 'jupyter',
-            'tableau', 'power bi', 'hadoop', 'spark', 'kafka',
-            
-            # Mobile
-            'android', 'ios', 'react native', 'flutter', 'xamarin', 'ionic', 'cordova',
-            'mobile development',
-            
-            # Other technical skills
-            'git', 'agile', 'scrum', 'jira', 'rest api', 'graphql', 'microservices',
-            'unit testing', 'ci/cd', 'serverless', 'blockchain', 'ai', 'nlp',
-            
-            # Soft skills
-            'leadership', 'communication', 'teamwork', 'problem solving', 'time management',
-            'project management', 'critical thinking', 'creativity', 'collaboration'
-        ]
-        
-        found_skills = set()
-        
-        # Convert text to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        
-        # Look for skill keywords in the text
-        for skill in common_skills:
-            # Use word boundary to avoid partial matches
-            pattern = r'\b' + re.escape(skill) + r'\b'
-            if re.search(pattern, text_lower):
-                found_skills.add(skill)
-                
-        return list(found_skills)
+        return extract_skills_from_text(text)
     
     def _preprocess_text(self, text):
         """
-        Preprocess text for NLP analysis:
-        - Tokenize
-        - Remove stopwords
-        - Lemmatize
+        Preprocess text for NLP analysis: tokenize, remove stopwords and
+        lemmatize.
         
         Args:
             text (str): Text to preprocess
@@ -537,13 +1010,4 @@ class ResumeAnalyzer:
         Returns:
             str: Preprocessed text
         """
-        # Tokenize
-        tokens = word_tokenize(text.lower())
-        
-        # Remove stopwords and non-alphabetic tokens
-        filtered_tokens = [token for token in tokens if token.isalpha() and token not in self.stop_words]
-        
-        # Lemmatize
-        lemmatized_tokens = [self.lemmatizer.lemmatize(token) for token in filtered_tokens]
-        
-        return ' '.join(lemmatized_tokens)
\ No newline at end of file
+        return preprocess_text(text)
\ No newline at end of file
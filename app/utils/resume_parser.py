@@ -1,12 +1,21 @@
 import os
-import re
+import time
+import hashlib
+import atexit
 import logging
+import threading
+import multiprocessing
 import PyPDF2
 import nltk
-import spacy
 from docx import Document
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.chunk import ne_chunk
+from app.utils.skills import skill_matcher, taxonomy
+from app.utils.nlp_pipeline import get_nlp
+from app.utils.patterns import (split_sections, find_contacts, EXPERIENCE_KEYWORDS,
+                                EXPERIENCE_PARAGRAPH_PATTERN)
+from config import (PARSER_N_PROCESS, PARSER_POOL_MIN_FILES, PARSER_BATCH_SIZE, PARSER_MAX_PAGES,
+                    PARSER_MAX_CHARS, SPACY_MODEL, SPACY_PIPELINE_PROFILE)
 
 # Download necessary NLTK data
 nltk.download('punkt', quiet=True)
@@ -14,30 +23,47 @@ nltk.download('averaged_perceptron_tagger', quiet=True)
 nltk.download('maxent_ne_chunker', quiet=True)
 nltk.download('words', quiet=True)
 
-# Load spaCy model
-try:
-    nlp = spacy.load('en_core_web_sm')
-except OSError:
-    import subprocess
-    subprocess.run(['python', '-m', 'spacy', 'download', 'en_core_web_sm'])
-    nlp = spacy.load('en_core_web_sm')
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change to the parser changes its output, to invalidate cached results
+PARSER_VERSION = 2
+
+
+def parser_cache_version():
+    """
+    Version key for cached parse results. Besides PARSER_VERSION it covers the
+    settings and skills taxonomy that affect the output.
+    """
+    settings = f"{SPACY_MODEL}:{SPACY_PIPELINE_PROFILE}:{PARSER_MAX_PAGES}:{PARSER_MAX_CHARS}"
+    skills = hashlib.sha256(repr(taxonomy.terms).encode('utf-8')).hexdigest()[:12]
+    return f"{PARSER_VERSION}:{hashlib.sha256(settings.encode('utf-8')).hexdigest()[:12]}:{skills}"
+
 class ResumeParser:
     """
     Parse resume files (PDF, DOCX, TXT) and extract relevant information
     using improved NLP techniques including spaCy for better entity recognition.
     """
     
-    def __init__(self, file_path):
-        """Initialize with the path to the resume file"""
+    def __init__(self, file_path, max_pages=PARSER_MAX_PAGES, max_chars=PARSER_MAX_CHARS):
+        """
+        Initialize with the path to the resume file
+        
+        Args:
+            file_path (str): Path to a PDF, DOCX or TXT resume
+            max_pages (int): Stop reading PDFs after this many pages
+            max_chars (int): Stop reading any file after this many characters
+        """
         self.file_path = file_path
         self.text = ""
         self.extension = os.path.splitext(file_path)[1].lower()
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.truncated = False  # Whether extraction stopped at a budget
+        self.timings = {}  # Stage name -> seconds spent
         self.doc = None  # Will store spaCy doc
+        self.section_spans = {}  # Section name -> (start, end) offsets in self.text
         
     def parse(self):
         """
@@ -46,97 +72,240 @@ class ResumeParser:
         """
         try:
             # Extract text from file
-            self.extract_text()
-            
-            # Process with spaCy
-            self.doc = nlp(self.text)
+            if not self.extract_text().strip():
+                raise ValueError("No text could be extracted")
             
-            # Parse sections
-            sections = self._split_into_sections()
+            # Process with spaCy once; entity lookups below use span offsets
+            start = time.perf_counter()
+            self.doc = get_nlp()(self.text)
+            self.timings['nlp'] = time.perf_counter() - start
             
-            # Parse the text to extract information
-            parsed_data = {
-                'name': self.extract_name(),
-                'email': self.extract_email(),
-                'phone': self.extract_phone(),
-                'skills': self.extract_skills(),
-                'education': self.extract_education(sections.get('education', '')),
-                'experience': self.extract_experience(sections.get('experience', '')),
-                'sections': sections  # Store all identified sections
-            }
-            
-            logger.info(f"Successfully parsed resume: {self.file_path}")
-            return parsed_data
+            return self._extract_fields()
             
         except Exception as e:
             logger.error(f"Error parsing resume {self.file_path}: {str(e)}")
-            return {
-                'name': '',
-                'email': '',
-                'phone': '',
-                'skills': [],
-                'education': '',
-                'experience': '',
-                'sections': {}
-            }
+            return self._empty_result(str(e))
 
-    def _split_into_sections(self):
-        """Split resume into sections based on headers"""
-        sections = {}
+    @classmethod
+    def parse_text(cls, text, name='text', max_chars=PARSER_MAX_CHARS):
+        """
+        Parse resume text that was already extracted from its file, e.g. by
+        an applicant tracking system.
+
+        Args:
+            text (str): Resume text
+            name (str): Label for the resume in log messages
+            max_chars (int): Only the first max_chars characters are parsed
+
+        Returns:
+            dict: Parsed data, as returned by parse
+        """
+        parser = cls(name, max_chars=max_chars)
+        try:
+            parser.text = (text or '')[:max_chars]
+            parser.truncated = len(text or '') > max_chars
+            if not parser.text.strip():
+                raise ValueError("No text to parse")
+
+            start = time.perf_counter()
+            parser.doc = get_nlp()(parser.text)
+            parser.timings['nlp'] = time.perf_counter() - start
+
+            return parser._extract_fields()
+        except Exception as e:
+            logger.error(f"Error parsing resume {name}: {str(e)}")
+            return parser._empty_result(str(e))
+
+    @classmethod
+    def parse_many(cls, paths, n_process=PARSER_N_PROCESS, batch_size=PARSER_BATCH_SIZE):
+        """
+        Parse many resumes.
         
-        # Common section headers
-        section_patterns = {
-            'education': r'(?i)(education|academic|qualifications|academic background)',
-            'experience': r'(?i)(experience|work|employment|job history|professional background)',
-            'skills': r'(?i)(skills|technical skills|core competencies|expertise)',
-            'projects': r'(?i)(projects|personal projects|academic projects)',
-            'certifications': r'(?i)(certifications|certificates|accreditations)',
-            'awards': r'(?i)(awards|achievements|honors)',
-            'publications': r'(?i)(publications|research|papers)',
-        }
+        With n_process > 1 and at least PARSER_POOL_MIN_FILES files, each
+        resume is parsed in full (text extraction, spaCy and field
+        extraction) by a shared pool of n_process worker processes, each of
+        which loads spaCy once. The pool uses the spawn start method, since
+        forking a threaded process that holds a loaded model can deadlock.
+        Otherwise texts are extracted in the calling process and streamed
+        through spaCy's nlp.pipe.
         
-        lines = self.text.split('\n')
-        current_section = None
-        section_content = []
+        Args:
+            paths (list): Paths of the resume files
+            n_process (int): Number of processes to use
+            batch_size (int): Number of texts spaCy processes per batch
+            
+        Yields:
+            dict: Parsed data for each resume, in the order of paths
+        """
+        paths = list(paths)
+        n_process = max(1, min(n_process, len(paths)))
         
-        for line in lines:
-            line = line.strip()
-            if not line:
+        if n_process > 1 and len(paths) >= PARSER_POOL_MIN_FILES:
+            chunksize = max(1, min(batch_size, len(paths) // (n_process * 4)))
+            yield from _get_pool(n_process).imap(_parse_worker, paths, chunksize=chunksize)
+            return
+        
+        def text_stream():
+            for path in paths:
+                text, error, timings = _extract_text_worker(path)
+                parser = cls(path)
+                parser.text = text
+                parser.timings.update(timings)
+                if not error and not text.strip():
+                    error = "No text could be extracted"
+                if error:
+                    logger.error(f"Error parsing resume {path}: {error}")
+                yield text, (parser, error)
+        
+        for doc, (parser, error) in get_nlp().pipe(text_stream(), as_tuples=True, batch_size=batch_size):
+            if error:
+                yield parser._empty_result(error)
                 continue
-                
-            # Check if line is a section header
-            found_section = None
-            for section, pattern in section_patterns.items():
-                if re.match(pattern, line, re.IGNORECASE):
-                    found_section = section
+            try:
+                parser.doc = doc
+                yield parser._extract_fields()
+            except Exception as e:
+                logger.error(f"Error parsing resume {parser.file_path}: {str(e)}")
+                yield parser._empty_result(str(e))
+
+    def extract_text(self):
+        """
+        Extract the text of the resume file, dispatching on its extension.
+        
+        PDFs are read page by page and DOCX files paragraph by paragraph, and
+        reading stops once max_pages pages or max_chars characters have been
+        extracted, so very long or scanned documents cannot stall a worker.
+        
+        Returns:
+            str: The extracted text, also stored in self.text
+        """
+        start = time.perf_counter()
+        extractors = {
+            '.pdf': self._iter_pdf_text,
+            '.docx': self._iter_docx_text,
+            '.txt': self._iter_txt_text
+        }
+        extractor = extractors.get(self.extension)
+        if extractor is None:
+            raise ValueError(f"Unsupported file type: {self.extension}")
+        
+        parts = []
+        remaining = self.max_chars
+        for part in extractor():
+            if not part:
+                continue
+            if len(part) >= remaining:
+                parts.append(part[:remaining])
+                self.truncated = True
+                break
+            parts.append(part)
+            remaining -= len(part) + 1  # Account for the joining newline
+        
+        self.text = '\n'.join(parts)
+        self.timings['extract_text'] = time.perf_counter() - start
+        
+        if self.truncated:
+            logger.warning(f"Text extraction stopped at the size limit for {self.file_path}")
+        return self.text
+
+    def _iter_pdf_text(self):
+        """Yield the text of each PDF page, up to max_pages pages"""
+        with open(self.file_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page_number, page in enumerate(reader.pages):
+                if page_number >= self.max_pages:
+                    self.truncated = True
                     break
-            
-            if found_section:
-                # Save previous section
-                if current_section:
-                    sections[current_section] = '\n'.join(section_content)
-                # Start new section
-                current_section = found_section
-                section_content = []
-            elif current_section:
-                section_content.append(line)
+                yield page.extract_text() or ''
+
+    def _iter_docx_text(self):
+        """Yield the text of each DOCX paragraph, then of each table cell"""
+        document = Document(self.file_path)
+        for paragraph in document.paragraphs:
+            yield paragraph.text
+        for table in document.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    yield cell.text
+
+    def _iter_txt_text(self):
+        """Yield a plain text file line by line"""
+        with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    def _extract_fields(self):
+        """Extract all fields from the text and spaCy doc of the resume"""
+        start = time.perf_counter()
         
-        # Save last section
-        if current_section and section_content:
-            sections[current_section] = '\n'.join(section_content)
-            
+        # Parse sections
+        sections = self._split_into_sections()
+        
+        email, phone = self.extract_contacts()
+        
+        # Parse the text to extract information
+        parsed_data = {
+            'name': self.extract_name(),
+            'email': email,
+            'phone': phone,
+            'skills': self.extract_skills(),
+            'education': self.extract_education(sections.get('education', '')),
+            'experience': self.extract_experience(sections.get('experience', '')),
+            'sections': sections  # Store all identified sections
+        }
+        self.timings['extract_fields'] = time.perf_counter() - start
+        parsed_data['timings'] = dict(self.timings)
+        
+        logger.info(f"Successfully parsed resume: {self.file_path}")
+        return parsed_data
+
+    @staticmethod
+    def _empty_result(error=''):
+        """
+        Parsed data returned when a resume cannot be parsed, or has no text.
+        'parse_error' says why, so callers can tell it from a real parse.
+        """
+        return {
+            'name': '',
+            'email': '',
+            'phone': '',
+            'skills': [],
+            'education': '',
+            'experience': '',
+            'sections': {},
+            'parse_error': error or "Resume could not be parsed"
+        }
+
+    def _split_into_sections(self):
+        """
+        Split resume into sections based on headers, in a single pass. The
+        character span of each section in self.text is recorded in
+        self.section_spans.
+        """
+        sections, self.section_spans = split_sections(self.text)
         return sections
 
+    def _entities(self, start, end, text):
+        """
+        Get the named entities between two offsets of self.text, taken from
+        the document-wide spaCy pass when available so spaCy runs only once
+        per resume. Falls back to processing text on its own otherwise.
+        """
+        if self.doc is not None:
+            return [ent for ent in self.doc.ents if ent.start_char >= start and ent.end_char <= end]
+        return list(get_nlp()(text).ents)
+
     def extract_name(self):
         """Extract candidate's name using spaCy NER"""
         try:
-            # Look for PERSON entities in the first few sentences
-            first_para = ' '.join(self.text.split('\n')[:5])
-            doc = nlp(first_para)
+            # Look for PERSON entities in the first few lines
+            first_lines = self.text.split('\n')[:5]
+            first_para = ' '.join(first_lines)
+            first_para_end = sum(len(line) + 1 for line in first_lines)
             
             # Filter PERSON entities and validate
             person_names = []
-            for ent in doc.ents:
+            for ent in self._entities(0, first_para_end, first_para):
                 if ent.label_ == 'PERSON':
                     name = ent.text.strip()
                     # Basic validation
@@ -164,101 +333,31 @@ class ResumeParser:
             logger.error(f"Error extracting name: {str(e)}")
             return ""
 
-    def extract_email(self):
-        """Extract email addresses using improved regex pattern"""
+    def extract_contacts(self):
+        """
+        Extract the email address and phone number in one pass over the text
+
+        Returns:
+            tuple: (email, phone), empty strings when not found
+        """
         try:
-            email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            emails = re.findall(email_pattern, self.text)
-            
-            # Validate and clean emails
-            valid_emails = []
-            for email in emails:
-                # Basic validation
-                if (email.count('@') == 1 and
-                    len(email) > 5 and
-                    '.' in email.split('@')[1] and
-                    not any(c.isspace() for c in email)):
-                    valid_emails.append(email.lower())
-            
-            return valid_emails[0] if valid_emails else ""
-            
+            return find_contacts(self.text)
         except Exception as e:
-            logger.error(f"Error extracting email: {str(e)}")
-            return ""
+            logger.error(f"Error extracting contact details: {str(e)}")
+            return "", ""
+
+    def extract_email(self):
+        """Extract the first valid email address"""
+        return self.extract_contacts()[0]
 
     def extract_phone(self):
-        """Extract phone numbers using improved regex patterns"""
-        try:
-            # Multiple phone number patterns
-            phone_patterns = [
-                r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # International
-                r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # US/Canada
-                r'\d{10}',  # Simple 10-digit
-                r'\+\d{10,}',  # International without formatting
-                r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}'  # Simple with separators
-            ]
-            
-            found_numbers = set()
-            for pattern in phone_patterns:
-                matches = re.finditer(pattern, self.text)
-                for match in matches:
-                    number = match.group()
-                    # Clean the number
-                    cleaned = re.sub(r'[^\d+]', '', number)
-                    if len(cleaned) >= 10:  # Must have at least 10 digits
-                        found_numbers.add(cleaned)
-            
-            # Format the first found number nicely
-            if found_numbers:
-                number = list(found_numbers)[0]
-                # Format as (XXX) XXX-XXXX for 10-digit numbers
-                if len(number) == 10:
-                    return f"({number[:3]}) {number[3:6]}-{number[6:]}"
-                return number
-            
-            return ""
-            
-        except Exception as e:
-            logger.error(f"Error extracting phone: {str(e)}")
-            return ""
+        """Extract the first phone number, formatted as (XXX) XXX-XXXX for 10 digits"""
+        return self.extract_contacts()[1]
 
     def extract_skills(self):
         """Extract skills from the resume"""
         try:
-            # Common technical skills and keywords
-            common_skills = [
-                'python', 'java', 'javascript', 'c\\+\\+', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'typescript',
-                'scala', 'rust', 'go', 'perl', 'r', 'matlab', 'objective-c', 'dart', 'shell', 'powershell',
-                'html', 'css', 'jquery', 'bootstrap', 'sass', 'less', 'angular', 'react', 'vue', 'node',
-                'django', 'flask', 'spring', 'asp\\.net', 'laravel', 'symfony', 'wordpress', 'shopify',
-                'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'cassandra', 'redis', 'sqlite',
-                'dynamodb', 'firestore', 'couchdb', 'mariadb', 'mssql', 'neo4j',
-                'aws', 'azure', 'gcp', 'google cloud', 'heroku', 'digital ocean', 'firebase',
-                'cloudflare', 'vercel', 'netlify',
-                'docker', 'kubernetes', 'jenkins', 'gitlab', 'github actions', 'terraform', 'ansible',
-                'chef', 'puppet', 'circleci', 'travis', 'prometheus', 'grafana',
-                'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'keras', 'scikit-learn',
-                'pandas', 'numpy', 'scipy', 'data analysis', 'data visualization', 'jupyter',
-                'tableau', 'power bi', 'hadoop', 'spark', 'kafka',
-                'android', 'ios', 'react native', 'flutter', 'xamarin', 'ionic', 'cordova',
-                'mobile development',
-                'git', 'agile', 'scrum', 'jira', 'rest api', 'graphql', 'microservices',
-                'unit testing', 'ci/cd', 'serverless', 'blockchain', 'ai', 'nlp',
-                'leadership', 'communication', 'teamwork', 'problem solving', 'time management',
-                'project management', 'critical thinking', 'creativity', 'collaboration'
-            ]
-            
-            # Create a regex pattern to find skills
-            skill_pattern = r'\b(' + '|'.join(common_skills) + r')\b'
-            found_skills = set()
-            
-            # Find all matches, case insensitive
-            matches = re.finditer(skill_pattern, self.text.lower())
-            for match in matches:
-                skill = match.group(0)
-                found_skills.add(skill)
-                
-            return list(found_skills)
+            return skill_matcher.extract(self.text)
         except Exception as e:
             logger.error(f"Error extracting skills: {str(e)}")
             return []
@@ -281,13 +380,14 @@ class ResumeParser:
             
             education_info = []
             
-            # Process with spaCy for organization detection
-            doc = nlp(text_to_analyze)
+            # Entities of the education section from the document-wide spaCy pass
+            start, end = self.section_spans.get('education', (0, len(self.text))) if education_text else (0, len(self.text))
+            entities = self._entities(start, end, text_to_analyze)
             
             # Find organizations (potential universities) and dates
             universities = set()
             dates = set()
-            for ent in doc.ents:
+            for ent in entities:
                 if ent.label_ == 'ORG':
                     universities.add(ent.text)
                 elif ent.label_ == 'DATE':
@@ -322,13 +422,7 @@ class ResumeParser:
             text_to_analyze = experience_text or self.text
             
             # Look for sections that might contain experience info
-            experience_keywords = [
-                'experience', 'work history', 'employment', 'job history', 
-                'professional experience', 'work experience', 'career'
-            ]
-            experience_pattern = r'(?i)(' + '|'.join(experience_keywords) + r').*?(?:\n\n|\Z)'
-            
-            exp_sections = re.findall(experience_pattern, text_to_analyze, re.DOTALL)
+            exp_sections = EXPERIENCE_PARAGRAPH_PATTERN.findall(text_to_analyze)
             if exp_sections:
                 return exp_sections[0][:500]  # Return first 500 chars
                 
@@ -336,10 +430,56 @@ class ResumeParser:
             sentences = sent_tokenize(text_to_analyze)
             experience_info = []
             for sentence in sentences:
-                if any(keyword in sentence.lower() for keyword in experience_keywords):
+                if any(keyword in sentence.lower() for keyword in EXPERIENCE_KEYWORDS):
                     experience_info.append(sentence)
                     
             return ' '.join(experience_info[:5]) if experience_info else ""
         except Exception as e:
             logger.error(f"Error extracting experience: {str(e)}")
-            return ""
\ No newline at end of file
+            return ""
+
+
+def _extract_text_worker(file_path):
+    """
+    Extract the text of one resume file, for parse_many's nlp.pipe stream.
+    
+    Returns:
+        tuple: (text, error message or None, stage timings)
+    """
+    try:
+        parser = ResumeParser(file_path)
+        parser.extract_text()
+        return parser.text, None, parser.timings
+    except Exception as e:
+        return "", str(e), {}
+
+
+def _parse_worker(file_path):
+    """Parse one resume file; runs in the parse_many pool, which loads spaCy on first use"""
+    return ResumeParser(file_path).parse()
+
+
+# Parse pool shared by every parse_many call, so workers load spaCy once
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(n_process):
+    """Get the shared spawn pool, replacing it if a different size is asked for"""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != n_process:
+            if _pool is not None:
+                _pool.terminate()
+            _pool = multiprocessing.get_context('spawn').Pool(n_process)
+            _pool_size = n_process
+            logger.info(f"Started a pool of {n_process} resume parser processes")
+        return _pool
+
+
+@atexit.register
+def _close_pool():
+    """Stop the parse pool's workers on exit"""
+    if _pool is not None:
+        _pool.terminate()
@@ -0,0 +1,118 @@
+import re
+
+# Marks the end of a skill in the trie; maps to the skill's canonical name
+_END = ''
+
+_WORD_CHAR = re.compile(r'\w')
+
+
+def _is_word_char(char):
+    """Check whether a character counts as a word character for \\b"""
+    return bool(char) and _WORD_CHAR.match(char) is not None
+
+
+class SkillMatcher:
+    """
+    Find every known skill in a text in a single pass.
+
+    The skills are stored in a trie, which is compiled into one regular
+    expression whose alternations follow the trie's branches. Scanning a text
+    is then one linear regex pass, and the cost per position grows with the
+    depth of the trie rather than with the number of skills, so taxonomies of
+    tens of thousands of entries match as fast as a hundred.
+
+    Skills match on word boundaries at their ends that are word characters,
+    so 'go' does not match inside 'google' while 'c++' and 'c#' still match
+    before a space or punctuation.
+    """
+
+    def __init__(self, skills):
+        """
+        Compile a matcher.
+
+        Args:
+            skills: Iterable of skill names, or a dict mapping each term
+                (skill name or alias) to the canonical skill it stands for
+        """
+        if not isinstance(skills, dict):
+            skills = {skill: skill for skill in skills}
+
+        self._trie = {}
+        for term, name in skills.items():
+            term = term.lower().strip()
+            if not term:
+                continue
+            node = self._trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[_END] = name
+
+        self.pattern = re.compile('(?=(' + self._node_regex(self._trie, None) + '))') if self._trie else None
+
+    def _node_regex(self, node, prev_char):
+        """Build the regex for the subtree below a trie node"""
+        alternatives = []
+        for char in sorted(key for key in node if key != _END):
+            prefix = ''
+            if prev_char is None and _is_word_char(char):
+                # Start of a skill: require a word boundary before it
+                prefix = r'(?<!\w)'
+            alternatives.append(prefix + re.escape(char) + self._node_regex(node[char], char))
+
+        if _END in node:
+            # End of a skill: require a word boundary after it. This comes last
+            # so the longest skill at a position is preferred.
+            alternatives.append(r'(?!\w)' if _is_word_char(prev_char) else '')
+
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    def find_iter(self, text):
+        """
+        Find all skill mentions, including overlapping ones such as 'react'
+        inside 'react native'.
+
+        Args:
+            text (str): Text to search
+
+        Yields:
+            tuple: (start, end, skill) with offsets into text.lower()
+        """
+        if not text or self.pattern is None:
+            return
+        text_lower = text.lower()
+        for match in self.pattern.finditer(text_lower):
+            start = match.start()
+            span = match.group(1)
+
+            # The regex returns the longest skill at this position; walk the
+            # trie along it to report shorter skills that also end on a boundary
+            node = self._trie
+            for offset, char in enumerate(span, 1):
+                node = node[char]
+                if _END not in node:
+                    continue
+                end = start + offset
+                if (offset == len(span) or not _is_word_char(char) or
+                        not _is_word_char(text_lower[end:end + 1])):
+                    yield start, end, node[_END]
+
+    def find_all(self, text):
+        """Return all skill mentions as a list of (start, end, skill)"""
+        return list(self.find_iter(text))
+
+    def extract(self, text):
+        """
+        Extract the distinct skills in a text.
+
+        Args:
+            text (str): Text to extract skills from
+
+        Returns:
+            list: Skills found, in order of first mention
+        """
+        found = {}
+        for _, _, skill in self.find_iter(text):
+            found.setdefault(skill, None)
+        return list(found)
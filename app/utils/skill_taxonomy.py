@@ -0,0 +1,132 @@
+import csv
+import logging
+from app.utils.skill_matcher import SkillMatcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = 'technical'
+
+
+def normalize_term(term):
+    """Normalize a skill name or alias for lookup"""
+    return ' '.join((term or '').lower().split())
+
+
+class SkillTaxonomy:
+    """
+    Skills taxonomy loaded from a CSV file with the columns
+    ``skill,category,aliases`` where aliases are separated by ``|``, e.g.::
+
+        kubernetes,technical,k8s
+        postgresql,technical,postgres|postgresql db
+        leadership,soft,
+
+    Every name and alias is looked up in a dict. The skill matcher needs all
+    terms at startup anyway, so the file is simply read once per process.
+    """
+
+    def __init__(self, skills, categories, terms):
+        """
+        Args:
+            skills (list): Canonical skill names
+            categories (list): Category of each skill, by position
+            terms (list): (term, skill position) pairs for every name and alias
+        """
+        self.skills = skills
+        self.categories = categories
+        self.terms = terms
+        self._positions = dict(terms)
+        self._matcher = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a taxonomy from (skill, category, aliases) rows.
+
+        Returns:
+            SkillTaxonomy: The taxonomy
+        """
+        skills = []
+        categories = []
+        positions = {}
+        terms = {}
+        for skill, category, aliases in rows:
+            skill = normalize_term(skill)
+            if not skill:
+                continue
+            if skill not in positions:
+                positions[skill] = len(skills)
+                skills.append(skill)
+                categories.append(normalize_term(category) or DEFAULT_CATEGORY)
+            position = positions[skill]
+            for term in [skill] + list(aliases):
+                term = normalize_term(term)
+                if not term:
+                    continue
+                if terms.get(term, position) != position:
+                    logger.warning(f"Skill alias '{term}' is ambiguous; using '{skill}'")
+                terms[term] = position
+        return cls(skills, categories, list(terms.items()))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a taxonomy CSV.
+
+        Args:
+            path (str): Path to the taxonomy CSV file
+
+        Returns:
+            SkillTaxonomy: The loaded taxonomy
+        """
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            return cls.from_rows(
+                (row.get('skill', ''), row.get('category', ''), (row.get('aliases') or '').split('|'))
+                for row in reader
+            )
+
+    def _position(self, term):
+        """Find the position of the skill a term stands for, or None"""
+        return self._positions.get(normalize_term(term))
+
+    def canonicalize(self, term):
+        """Map a skill name or alias to its canonical name, or None if unknown"""
+        position = self._position(term)
+        return self.skills[position] if position is not None else None
+
+    def category(self, term):
+        """Get the category of a skill or alias, or None if unknown"""
+        position = self._position(term)
+        return self.categories[position] if position is not None else None
+
+    def split_by_category(self, skills):
+        """
+        Group skills by category, canonicalizing aliases.
+
+        Args:
+            skills (list): Skill names or aliases
+
+        Returns:
+            dict: category -> list of skills, in input order without duplicates
+        """
+        grouped = {}
+        for skill in skills:
+            position = self._position(skill)
+            if position is None:
+                name, category = skill, DEFAULT_CATEGORY
+            else:
+                name, category = self.skills[position], self.categories[position]
+            names = grouped.setdefault(category, [])
+            if name not in names:
+                names.append(name)
+        return grouped
+
+    @property
+    def matcher(self):
+        """SkillMatcher over every skill name and alias, compiled on first use"""
+        if self._matcher is None:
+            self._matcher = SkillMatcher({term: self.skills[position] for term, position in self.terms})
+        return self._matcher
@@ -0,0 +1,26 @@
+from app.utils.skill_taxonomy import SkillTaxonomy
+from config import SKILLS_TAXONOMY_PATH
+
+# Skills taxonomy shared by the parser, analyzer, job profile and exports
+taxonomy = SkillTaxonomy.load(SKILLS_TAXONOMY_PATH)
+
+# Canonical skill names
+COMMON_SKILLS = taxonomy.skills
+
+# Compiled once at import and shared by the parser and the analyzer
+skill_matcher = taxonomy.matcher
+
+
+def extract_skills_from_text(text):
+    """
+    Extract skills from text in a single pass of the shared skill matcher.
+
+    Aliases are reported under their canonical name ('k8s' -> 'kubernetes').
+
+    Args:
+        text (str): Text to extract skills from
+
+    Returns:
+        list: List of skills found in the text
+    """
+    return skill_matcher.extract(text)
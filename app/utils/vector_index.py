@@ -0,0 +1,424 @@
+import os
+import re
+import sys
+import json
+import threading
+import logging
+import numpy as np
+from app.utils.file_lock import file_lock
+from config import (EMBEDDING_MODEL_NAME, VECTOR_INDEX_DIR, VECTOR_INDEX_BACKEND,
+                    VECTOR_INDEX_ANN_MIN_ROWS, VECTOR_INDEX_COMPACT_FRACTION)
+
+try:
+    import faiss
+except ImportError:  # Approximate search is optional
+    faiss = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def safe_model_dir(directory, model_name):
+    """Directory for one embedding model's vectors"""
+    return os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+
+
+class VectorFile:
+    """
+    Append-only float32 vectors on disk: rows in a vectors file, read
+    through a memory map, and a keys file of ``<key> <row>`` lines appended
+    after the rows they point to. When a key is written again the latest
+    row wins. Writers hold an exclusive ``lock`` and readers a shared one,
+    so several processes can share the directory; readers pick up rows
+    added by others on refresh.
+
+    ``meta.json`` records the vector size and the current generation of
+    the files. Compaction writes a new generation holding only the live
+    rows and switches to it by replacing ``meta.json``, so a crash leaves
+    either the old files or the new ones.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.lock_path = os.path.join(directory, 'lock')
+        self.dim = None
+        self.generation = None
+        self.vectors_path, self.keys_path = self._paths(0)
+        self.rows = {}
+        self.version = 0  # Incremented whenever new keys are read
+        self._keys_offset = 0
+        self._vectors = None
+
+    def _paths(self, generation):
+        """Vectors and keys file paths of a generation"""
+        if generation == 0:
+            return os.path.join(self.directory, 'vectors.f32'), os.path.join(self.directory, 'keys.txt')
+        return (os.path.join(self.directory, f'vectors.{generation}.f32'),
+                os.path.join(self.directory, f'keys.{generation}.txt'))
+
+    def _write_meta(self, dim, generation):
+        """Replace meta.json atomically"""
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'generation': generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def refresh(self):
+        """Read key lines appended since the last refresh"""
+        try:
+            with file_lock(self.lock_path, shared=True):
+                self._refresh_locked()
+        except OSError as e:
+            logger.error(f"Error reading vectors in {self.directory}: {str(e)}")
+
+    def _refresh_locked(self):
+        """Refresh with the lock held"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            self.dim = meta['dim']
+            generation = meta.get('generation', 0)
+        except (OSError, ValueError, KeyError):
+            generation = 0
+
+        if generation != self.generation:
+            # Compacted by any process: start over from the new files
+            self.generation = generation
+            self.vectors_path, self.keys_path = self._paths(generation)
+            self.rows = {}
+            self._keys_offset = 0
+            self._vectors = None
+            self.version += 1
+
+        try:
+            if os.path.getsize(self.keys_path) == self._keys_offset:
+                return
+            with open(self.keys_path, 'rb') as f:
+                f.seek(self._keys_offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Line still being written
+                    key, row = line.decode('utf-8').rsplit(' ', 1)
+                    self.rows[key] = int(row)
+                    self._keys_offset += len(line)
+            self.version += 1
+            # Map the rows while the lock keeps the files of this generation in place
+            self._map()
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading vector keys {self.keys_path}: {str(e)}")
+
+    def _map(self):
+        """Memory-map the complete rows of the vectors file"""
+        row_count = os.path.getsize(self.vectors_path) // (self.dim * 4) if self.dim else 0
+        if row_count == 0:
+            self._vectors = None
+        elif self._vectors is None or len(self._vectors) != row_count:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                      shape=(row_count, self.dim))
+
+    def matrix(self):
+        """Memory-mapped matrix of the stored rows, as of the last refresh"""
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors
+
+    @property
+    def stale_rows(self):
+        """Rows no key points at any more, as of the last refresh"""
+        return max(0, len(self.matrix()) - len(self.rows))
+
+    def get(self, keys):
+        """Get the stored vectors for keys, as a dict of key to vector"""
+        vectors = self.matrix()
+        found = [(key, self.rows[key]) for key in keys if key in self.rows and self.rows[key] < len(vectors)]
+        return {key: np.array(vectors[row]) for key, row in found}
+
+    def put(self, items, replace=False):
+        """
+        Append (key, vector) pairs.
+
+        Args:
+            items (list): (key, vector) pairs; keys must not contain newlines
+            replace (bool): Write keys that are already stored again if
+                their vector changed, so the new vector wins. Otherwise
+                stored keys are skipped.
+        """
+        if not items:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with file_lock(self.lock_path):
+                self._refresh_locked()
+                if replace:
+                    stored = self.get([key for key, _ in items])
+                    items = [(key, vector) for key, vector in items
+                             if key not in stored or
+                             not np.array_equal(stored[key], np.asarray(vector, dtype=np.float32))]
+                else:
+                    items = [(key, vector) for key, vector in items if key not in self.rows]
+                if not items:
+                    return
+
+                if self.dim is None:
+                    self.dim = len(items[0][1])
+                    self._write_meta(self.dim, self.generation)
+
+                # Drop the tail of a write torn by a crash, as the JSON log does:
+                # a partial row would shift every later row, a partial key line
+                # would swallow the next one
+                row_size = self.dim * 4
+                with open(self.vectors_path, 'ab') as f:
+                    first_row = os.fstat(f.fileno()).st_size // row_size
+                    f.truncate(first_row * row_size)
+                with open(self.keys_path, 'ab') as f:
+                    f.truncate(self._keys_offset)
+
+                # Rows first, then the keys pointing at them
+                with open(self.vectors_path, 'ab') as f:
+                    f.write(np.stack([vector for _, vector in items]).astype(np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self.keys_path, 'ab') as f:
+                    f.write(''.join(
+                        f"{key} {first_row + i}\n" for i, (key, _) in enumerate(items)
+                    ).encode('utf-8'))
+                self._refresh_locked()
+        except OSError as e:
+            logger.error(f"Error writing vectors to {self.directory}: {str(e)}")
+
+    def compact(self, keep=None):
+        """
+        Rewrite the files with only the latest row of each key, as a new
+        generation, and remove the old files.
+
+        Args:
+            keep (callable): Called with the stored keys, oldest first, under
+                the write lock; returns the keys to keep. All keys if None.
+
+        Returns:
+            int: Number of rows dropped
+        """
+        try:
+            with file_lock(self.lock_path):
+                self._refresh_locked()
+                keys = list(self.rows)
+                if keep is not None:
+                    keys = [key for key in keep(sorted(keys, key=self.rows.get)) if key in self.rows]
+                stale = len(self.matrix()) - len(keys)
+                if not stale:
+                    return 0
+                old_paths = (self.vectors_path, self.keys_path)
+                generation = self.generation + 1
+                vectors_path, keys_path = self._paths(generation)
+
+                vectors = self.matrix()
+                with open(vectors_path, 'wb') as f:
+                    for start in range(0, len(keys), 4096):
+                        rows = [self.rows[key] for key in keys[start:start + 4096]]
+                        f.write(np.asarray(vectors[rows], dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(keys_path, 'wb') as f:
+                    f.write(''.join(f"{key} {row}\n" for row, key in enumerate(keys)).encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                # Switching meta.json commits the new generation
+                self._write_meta(self.dim, generation)
+                self._vectors = None
+                self._refresh_locked()
+                for path in old_paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass  # Still mapped by another process on Windows; left in place
+            logger.info(f"Compacted {self.directory}: dropped {stale} rows, kept {len(keys)}")
+            return stale
+        except OSError as e:
+            logger.error(f"Error compacting vectors in {self.directory}: {str(e)}")
+            return 0
+
+
+class ResumeIndex:
+    """
+    Top-K search over the embeddings of every analyzed resume.
+
+    The index keeps its own vector files, keyed by resume ID, separate from
+    the embedding cache (which is keyed by text hash). Re-adding a resume
+    with an unchanged embedding writes nothing; replaced rows are dropped
+    by compaction once they exceed compact_fraction of the file.
+
+    Embeddings are normalized, so cosine similarity is a dot product: exact
+    search is one matrix-vector product over the memory-mapped matrix.
+    When faiss is installed and the corpus is large, an HNSW index over
+    the same matrix answers queries approximately instead.
+    """
+
+    def __init__(self, directory, backend=VECTOR_INDEX_BACKEND, ann_min_rows=VECTOR_INDEX_ANN_MIN_ROWS,
+                 compact_fraction=VECTOR_INDEX_COMPACT_FRACTION):
+        """
+        Args:
+            directory (str): Where this model's resume vectors are stored
+            backend (str): 'exact', 'faiss', or 'auto' to use faiss only
+                when installed and the index has at least ann_min_rows rows
+            ann_min_rows (int): Corpus size from which 'auto' uses faiss
+            compact_fraction (float): Share of stale rows from which adding
+                compacts the vector files
+        """
+        self.vectors = VectorFile(directory)
+        self.backend = backend
+        self.ann_min_rows = ann_min_rows
+        self.compact_fraction = compact_fraction
+        self._lock = threading.Lock()
+        self._row_ids = np.zeros(0, dtype=object)
+        self._live = np.zeros(0, dtype=bool)
+        self._synced_version = None
+        self._ann = None
+        self._ann_rows = 0
+        self._ann_generation = None
+
+    def add(self, ids, embeddings):
+        """
+        Store resume embeddings, replacing earlier ones for the same IDs.
+
+        Args:
+            ids (list): Resume IDs
+            embeddings (np.ndarray): Normalized embeddings, one row per ID
+        """
+        self.vectors.put(list(zip(ids, np.asarray(embeddings, dtype=np.float32))), replace=True)
+        if self.vectors.stale_rows > self.compact_fraction * max(len(self.vectors.matrix()), 1):
+            self.compact()
+
+    def compact(self):
+        """Drop replaced rows from the vector files; returns how many were dropped"""
+        return self.vectors.compact()
+
+    def __len__(self):
+        self.vectors.refresh()
+        return len(self.vectors.rows)
+
+    def _sync(self):
+        """Rebuild the row to ID map after new rows were added"""
+        self.vectors.refresh()
+        matrix = self.vectors.matrix()
+        if self._ann_generation != self.vectors.generation:
+            # Rows were renumbered by compaction
+            self._ann = None
+            self._ann_generation = self.vectors.generation
+        if self._synced_version != self.vectors.version or len(self._row_ids) != len(matrix):
+            row_ids = np.empty(len(matrix), dtype=object)
+            for id, row in self.vectors.rows.items():
+                if row < len(matrix):
+                    row_ids[row] = id
+            self._row_ids = row_ids
+            self._live = np.array([id is not None for id in row_ids], dtype=bool)
+            self._synced_version = self.vectors.version
+        return matrix
+
+    def _use_ann(self, rows):
+        """Whether to answer queries with the approximate index"""
+        if faiss is None or self.backend == 'exact':
+            return False
+        return self.backend == 'faiss' or rows >= self.ann_min_rows
+
+    def _ann_search(self, matrix, query, k):
+        """Approximate top-k rows, adding new rows to the HNSW index first"""
+        if self._ann is None:
+            self._ann = faiss.IndexHNSWFlat(matrix.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            self._ann_rows = 0
+        if self._ann_rows < len(matrix):
+            self._ann.add(np.ascontiguousarray(matrix[self._ann_rows:]))
+            self._ann_rows = len(matrix)
+
+        # Ask for extra rows, as rows replaced by later ones are skipped
+        stale = len(matrix) - int(self._live.sum())
+        scores, rows = self._ann.search(query.reshape(1, -1), min(len(matrix), k + stale))
+        hits = [(int(row), float(score)) for row, score in zip(rows[0], scores[0])
+                if row >= 0 and self._live[row]]
+        return hits[:k]
+
+    def search(self, query, k=10):
+        """
+        Find the resumes most similar to a query embedding.
+
+        Args:
+            query (np.ndarray): Normalized query embedding
+            k (int): Number of resumes to return
+
+        Returns:
+            list: (resume ID, similarity) pairs, most similar first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            matrix = self._sync()
+            if len(matrix) == 0 or k <= 0:
+                return []
+
+            if self._use_ann(len(matrix)):
+                try:
+                    hits = self._ann_search(matrix, query, k)
+                    return [(self._row_ids[row], score) for row, score in hits]
+                except Exception as e:
+                    logger.error(f"Approximate search failed, falling back to exact search: {str(e)}")
+                    self._ann = None
+
+            scores = np.asarray(matrix @ query, dtype=np.float32)
+            scores[~self._live] = -np.inf
+            k = min(k, int(self._live.sum()))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(self._row_ids[row], float(scores[row])) for row in top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_resume_index(model_name=EMBEDDING_MODEL_NAME):
+    """Get the shared resume index for an embedding model"""
+    with _indexes_lock:
+        if model_name not in _indexes:
+            _indexes[model_name] = ResumeIndex(safe_model_dir(VECTOR_INDEX_DIR, model_name))
+        return _indexes[model_name]
+
+
+def rebuild_resume_index(model_name=EMBEDDING_MODEL_NAME, batch_size=256):
+    """
+    Embed every stored resume into the index, e.g. for resumes analyzed
+    before it existed, then compact the index files.
+    """
+    from app.models.resume import Resume
+    from app.utils.model_registry import get_embedding_model
+    from app.utils.resume_analyzer import ResumeAnalyzer
+
+    bert_model = get_embedding_model(model_name)
+    if bert_model is None:
+        logger.error(f"Cannot rebuild resume index: model {model_name} is unavailable")
+        return 0
+
+    records = Resume.get_all()
+    index = get_resume_index(model_name)
+    for start in range(0, len(records), batch_size):
+        batch = [Resume(**record) for record in records[start:start + batch_size]]
+        embeddings = ResumeAnalyzer.embed_resumes(
+            [resume.to_resume_data() for resume in batch], bert_model, model_name)
+        index.add([resume.id for resume in batch], embeddings)
+    index.compact()
+    logger.info(f"Indexed {len(records)} resumes for {model_name}")
+    return len(records)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['rebuild']:
+        rebuild_resume_index()
+    else:
+        print("Usage: python -m app.utils.vector_index rebuild")
+        sys.exit(1)
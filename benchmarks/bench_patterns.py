@@ -0,0 +1,135 @@
+"""
+Micro-benchmark of resume sectioning and contact extraction: the per-line,
+per-pattern approach the parser used to take against the precompiled
+single-pass patterns in app.utils.patterns.
+
+Usage: python benchmarks/bench_patterns.py [--resumes N] [--repeat N]
+"""
+import os
+import re
+import sys
+import random
+import argparse
+import timeit
+
+# Add parent directory to path so imports work correctly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.utils.patterns import split_sections, find_contacts
+
+
+def legacy_split_sections(text):
+    """Sectioning as the parser did it: seven re.match calls per line"""
+    sections = {}
+    spans = {}
+    section_patterns = {
+        'education': r'(?i)(education|academic|qualifications|academic background)',
+        'experience': r'(?i)(experience|work|employment|job history|professional background)',
+        'skills': r'(?i)(skills|technical skills|core competencies|expertise)',
+        'projects': r'(?i)(projects|personal projects|academic projects)',
+        'certifications': r'(?i)(certifications|certificates|accreditations)',
+        'awards': r'(?i)(awards|achievements|honors)',
+        'publications': r'(?i)(publications|research|papers)',
+    }
+    current_section = None
+    section_content = []
+    section_start = section_end = 0
+    offset = 0
+    for raw_line in text.split('\n'):
+        line_start = offset
+        offset += len(raw_line) + 1
+        line = raw_line.strip()
+        if not line:
+            continue
+        found_section = None
+        for section, pattern in section_patterns.items():
+            if re.match(pattern, line, re.IGNORECASE):
+                found_section = section
+                break
+        if found_section:
+            if current_section:
+                sections[current_section] = '\n'.join(section_content)
+                spans[current_section] = (section_start, section_end)
+            current_section = found_section
+            section_content = []
+            section_start = section_end = offset
+        elif current_section:
+            section_content.append(line)
+            section_end = line_start + len(raw_line)
+    if current_section and section_content:
+        sections[current_section] = '\n'.join(section_content)
+        spans[current_section] = (section_start, section_end)
+    return sections, spans
+
+
+def legacy_find_contacts(text):
+    """Contact extraction as the parser did it: one email and five phone scans"""
+    emails = [email.lower() for email in re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)
+              if email.count('@') == 1 and len(email) > 5 and '.' in email.split('@')[1]]
+    phone_patterns = [
+        r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
+        r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
+        r'\d{10}',
+        r'\+\d{10,}',
+        r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}'
+    ]
+    found_numbers = set()
+    for pattern in phone_patterns:
+        for match in re.finditer(pattern, text):
+            cleaned = re.sub(r'[^\d+]', '', match.group())
+            if len(cleaned) >= 10:
+                found_numbers.add(cleaned)
+    phone = ''
+    if found_numbers:
+        number = list(found_numbers)[0]
+        phone = f"({number[:3]}) {number[3:6]}-{number[6:]}" if len(number) == 10 else number
+    return (emails[0] if emails else ''), phone
+
+
+WORDS = ('developed designed led built maintained improved services pipelines teams customers '
+         'python java sql cloud data platform reliability latency migration analytics').split()
+
+
+def synthetic_resume(rng):
+    """A plain-text resume of typical length with the usual sections"""
+    lines = ['Jane Q. Candidate', f'jane.candidate{rng.randint(1, 999)}@example.com',
+             f'({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}', '']
+    for header in ('Summary', 'Experience', 'Education', 'Skills', 'Projects', 'Certifications', 'Awards'):
+        lines.append(header)
+        for _ in range(rng.randint(5, 25)):
+            lines.append('  ' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def bench(label, func, texts, repeat):
+    """Time func over every text and print documents per second"""
+    seconds = min(timeit.repeat(lambda: [func(text) for text in texts], number=1, repeat=repeat))
+    print(f"  {label:<28} {seconds * 1000:9.1f} ms  {len(texts) / seconds:10.0f} docs/s")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=500, help='Number of synthetic resumes')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [synthetic_resume(rng) for _ in range(args.resumes)]
+
+    mismatches = sum(legacy_split_sections(text) != split_sections(text) for text in texts)
+    print(f"Sectioning results differ for {mismatches} of {len(texts)} resumes")
+
+    print("Sectioning")
+    legacy = bench('per-line re.match', legacy_split_sections, texts, args.repeat)
+    current = bench('single-pass alternation', split_sections, texts, args.repeat)
+    print(f"  speedup: {legacy / current:.1f}x")
+
+    print("Contact extraction")
+    legacy = bench('email + five phone scans', legacy_find_contacts, texts, args.repeat)
+    current = bench('single-pass contact pattern', find_contacts, texts, args.repeat)
+    print(f"  speedup: {legacy / current:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,79 @@ JSON_STORAGE_PATH = os.path.join(BASE_DIR, 'app', 'data')
 RESUMES_JSON = os.path.join(JSON_STORAGE_PATH, 'resumes.json')
 JOB_DESCRIPTIONS_JSON = os.path.join(JSON_STORAGE_PATH, 'job_descriptions.json')
 
+# Storage backend: 'sqlite' (indexed, transactional) or 'json' (the JSON files above).
+# Existing JSON data is copied into an empty database on first start, or at any
+# time with: python -m app.models.storage migrate
+STORAGE_BACKEND = 'sqlite'
+SQLITE_DB_PATH = os.path.join(JSON_STORAGE_PATH, 'resume_score.db')
+JSON_LOG_COMPACT_BYTES = 4 * 1024 * 1024  # Fold the JSON append log into its file past this size
+
+# Skills taxonomy (CSV of skill,category,aliases)
+SKILLS_TAXONOMY_PATH = os.path.join(JSON_STORAGE_PATH, 'skills_taxonomy.csv')
+
+# Embedding model settings
+EMBEDDING_MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+PRELOAD_MODELS = True  # Load the embedding model at startup instead of on first request
+JOB_PROFILE_CACHE_SIZE = 256  # Job description profiles kept in memory per process (least recently used evicted)
+
+# spaCy settings
+SPACY_MODEL = 'en_core_web_sm'
+SPACY_PIPELINE_PROFILE = 'ner'  # 'ner' disables components the parser does not use; 'full' keeps all
+
+# Batch parsing settings
+PARSER_N_PROCESS = max(1, (os.cpu_count() or 1) - 1)  # Parser processes of ResumeParser.parse_many (spawned)
+PARSER_POOL_MIN_FILES = 8  # Smaller batches are parsed in the calling process
+PARSER_BATCH_SIZE = 16  # Texts per spaCy nlp.pipe batch
+PARSER_MAX_PAGES = 20  # Pages read from a PDF before extraction stops
+PARSER_MAX_CHARS = 100000  # Characters read from any resume before extraction stops
+
+# Cache of parsed resumes keyed by file content hash and parser version
+PARSE_CACHE_PATH = os.path.join(JSON_STORAGE_PATH, 'parse_cache.db')
+PARSE_CACHE_MAX_ENTRIES = 20000  # Least recently used entries are evicted past this
+PARSE_CACHE_TOUCH_INTERVAL = 3600  # Seconds before a cache hit refreshes an entry's access time
+
+# Embedding cache keyed by model name and text hash: an in-memory LRU in front of
+# memory-mapped float32 vectors on disk
+EMBEDDING_CACHE_DIR = os.path.join(JSON_STORAGE_PATH, 'embedding_cache')
+EMBEDDING_CACHE_MEMORY_ITEMS = 50000  # Vectors kept in memory per process
+EMBEDDING_CACHE_DISK_ITEMS = 500000  # Vectors kept on disk per model; least recently used are compacted away past this
+
+# Top-K candidate search over the embeddings of every analyzed resume
+VECTOR_INDEX_DIR = os.path.join(JSON_STORAGE_PATH, 'resume_index')
+VECTOR_INDEX_BACKEND = 'auto'  # 'exact' (NumPy), 'faiss' (HNSW), or 'auto': faiss for large corpora if installed
+VECTOR_INDEX_ANN_MIN_ROWS = 20000  # Corpus size from which 'auto' switches to approximate search
+VECTOR_INDEX_SHORTLIST = 200  # Candidates fully scored after retrieval
+VECTOR_INDEX_COMPACT_FRACTION = 0.25  # Share of replaced rows from which the index files are compacted
+
+# TF-IDF vocabulary and IDF weights fitted on the stored corpus (python -m app.utils.lexical fit)
+TFIDF_VECTORIZER_PATH = os.path.join(JSON_STORAGE_PATH, 'tfidf_vectorizer.joblib')
+TFIDF_MIN_CORPUS_DOCS = 10  # Corpus size from which a vectorizer is fitted in the background
+TFIDF_FIT_CHECK_INTERVAL = 600  # Seconds between background checks of the corpus size
+TFIDF_REFIT_AGE = 24 * 3600  # Seconds after which a changed corpus is refitted; it is also refitted when it doubles
+LEMMA_CACHE_SIZE = 100000  # Distinct tokens whose lemma is memoized
+
+# Cascade scoring: rank each batch lexically (skill overlap + TF-IDF) and embed only the best
+CASCADE_SCORING = False
+CASCADE_TOP_FRACTION = 0.2  # Share of each batch always passed on to embedding scoring
+CASCADE_MIN_SCORE = 0.5  # Prefilter score (0-1) from which a resume is passed on regardless of rank
+
+# Results pages fetched by the results page and /results/<job_id>/page
+RESULTS_PAGE_SIZE = 50
+RESULTS_PAGE_MAX = 200  # Largest page a client may ask for
+
+# Background upload processing
+UPLOAD_WORKERS = 2  # Batches processed concurrently
+UPLOAD_JOB_HISTORY = 1000  # Finished batch statuses kept for progress polling
+UPLOAD_CHUNK_SIZE = 100  # Resumes scored and written to storage together
+SCORE_STREAM_MAX_BATCH = 32  # Most already received resumes /api/score scores in one call
+
+# Offline batch scoring (python -m app.cli score)
+CLI_WORKERS = max(1, (os.cpu_count() or 1) - 1)  # Worker processes, each loading the models once
+CLI_CHUNK_SIZE = 32  # Resumes parsed and scored per worker task
+
+# Many-to-many matching (/match and ResumeAnalyzer.score_matrix)
+MATCH_BLOCK_SIZE = 512  # Resumes embedded and matched against every job at once
+
 # Debug settings
 DEBUG = True
 
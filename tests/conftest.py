@@ -0,0 +1,41 @@
+"""
+Shared fixtures: every test gets its own storage and cache locations, so
+running the tests never writes into app/data or sees an earlier run's state.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app.models.storage as storage
+import app.utils.job_profile as job_profile
+import app.utils.vector_index as vector_index
+from app.utils.embedding_cache import embedding_cache
+from app.utils.parse_cache import parse_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """Point the stores and caches at tmp_path and start them empty"""
+    data = tmp_path / 'data'
+    data.mkdir()
+
+    monkeypatch.setattr(storage, 'SQLITE_DB_PATH', str(data / 'resume_score.db'))
+    monkeypatch.setattr(storage, 'COLLECTIONS', {'resumes': str(data / 'resumes.json'),
+                                                 'job_descriptions': str(data / 'job_descriptions.json')})
+    monkeypatch.setattr(storage, '_stores', {})
+
+    monkeypatch.setattr(embedding_cache, 'directory', str(data / 'embedding_cache'))
+    monkeypatch.setattr(embedding_cache, '_memory', OrderedDict())
+    monkeypatch.setattr(embedding_cache, '_disk', {})
+
+    monkeypatch.setattr(parse_cache, 'db_path', str(data / 'parse_cache.db'))
+    monkeypatch.setattr(parse_cache, '_local', threading.local())
+    monkeypatch.setattr(parse_cache, '_rows', None)
+
+    monkeypatch.setattr(job_profile, '_profile_cache', OrderedDict())
+    monkeypatch.setattr(vector_index, 'VECTOR_INDEX_DIR', str(data / 'resume_index'))
+    monkeypatch.setattr(vector_index, '_indexes', {})
+    return data
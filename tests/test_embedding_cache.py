@@ -0,0 +1,43 @@
+"""
+The on-disk tier of the embedding cache stays under its size cap.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.utils.embedding_cache import EmbeddingCache, normalize_text, text_key
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def stored_keys(cache):
+    tier = cache._disk_tier('m')
+    tier.refresh()
+    return set(tier.rows)
+
+
+def test_disk_tier_is_compacted_past_cap(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), memory_items=3, disk_items=10)
+    encoder = CountingEncoder()
+    texts = [f'text {i}' for i in range(12)]
+    for text in texts[:10]:
+        cache.encode(encoder, [text], 'm')
+    cache.encode(encoder, [texts[0]], 'm')  # Read back from disk: recently used again
+    cache.encode(encoder, texts[10:], 'm')  # 12 stored: compacted to 9
+
+    keys = stored_keys(cache)
+    kept = [texts[0]] + texts[4:]
+    assert keys == {text_key(normalize_text(text)) for text in kept}
+
+    # A fresh process finds the kept vectors without encoding them
+    encoder = CountingEncoder()
+    EmbeddingCache(str(tmp_path), disk_items=10).encode(encoder, kept, 'm')
+    assert encoder.encoded == []
@@ -0,0 +1,45 @@
+"""
+CSV and columnar exports of a job's results.
+"""
+import io
+import os
+import sys
+import csv
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.models.resume import Resume
+from app.utils.export import iter_csv, export_to_columnar, select_columns
+
+COLUMNS = ['candidate_name', 'overall_score', 'skills_match']
+
+
+def resumes():
+    good = Resume(id='r1', candidate_name='Ada', score=81.25, skills=['python'],
+                  detailed_analysis={'component_scores': {'skills_match': 50}})
+    broken = Resume(id='r2', candidate_name='Bob', score='not a number')
+    return [good, broken]
+
+
+def test_csv_rows_and_fallback():
+    rows = list(csv.reader(io.StringIO(''.join(iter_csv(resumes(), COLUMNS)))))
+    assert rows == [
+        ['Candidate Name', 'Overall Score (%)', 'Skills Match Score (%)'],
+        ['Ada', '81.2', '50.0'],
+        ['Bob', '', '']
+    ]
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        select_columns(['candidate_name', 'shoe_size'])
+
+
+def test_parquet_keeps_scores_numeric():
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    frame = pd.read_parquet(io.BytesIO(export_to_columnar(resumes(), COLUMNS, 'parquet')))
+    assert list(frame.columns) == COLUMNS
+    assert frame['overall_score'].dtype == 'float64'
+    assert frame['overall_score'][0] == 81.25
+    assert frame['overall_score'].isna()[1]
@@ -0,0 +1,41 @@
+"""
+Job profiles are cached per process, except when their embedding failed.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.utils.job_profile import get_job_profile
+
+JOB_TEXT = 'Python developer\nRequired: python, sql\n3+ years of experience'
+
+
+class FlakyEncoder:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError('model unavailable')
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+
+def test_failed_embedding_is_retried():
+    encoder = FlakyEncoder(failures=1)
+    profile, _ = get_job_profile(JOB_TEXT, encoder, 'm')
+    assert not profile.has_embeddings
+
+    profile, _ = get_job_profile(JOB_TEXT, encoder, 'm')
+    assert profile.has_embeddings
+    assert encoder.calls == 2
+
+
+def test_embedded_profile_is_cached():
+    encoder = FlakyEncoder(failures=0)
+    first, _ = get_job_profile(JOB_TEXT, encoder, 'm')
+    second, _ = get_job_profile(JOB_TEXT, encoder, 'm')
+    assert second is first
+    assert encoder.calls == 1
@@ -0,0 +1,27 @@
+"""
+When the corpus TF-IDF vectorizer is fitted and refitted.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.utils.lexical import _needs_fit
+from config import TFIDF_MIN_CORPUS_DOCS
+
+
+def test_first_fit_waits_for_minimum_corpus():
+    assert not _needs_fit(TFIDF_MIN_CORPUS_DOCS - 1)
+    assert _needs_fit(TFIDF_MIN_CORPUS_DOCS)
+
+
+def test_refit_when_corpus_doubles():
+    fitted_at = datetime.now().isoformat()
+    assert not _needs_fit(150, 100, fitted_at)
+    assert _needs_fit(200, 100, fitted_at)
+
+
+def test_refit_old_fit_only_if_corpus_changed():
+    fitted_at = (datetime.now() - timedelta(days=2)).isoformat()
+    assert _needs_fit(101, 100, fitted_at, refit_age=3600)
+    assert not _needs_fit(100, 100, fitted_at, refit_age=3600)
@@ -0,0 +1,76 @@
+"""
+Keyset pages of a job's results: walking the cursors visits every matching
+resume once, in order, on both storage backends.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app.models.storage as storage
+from app.models.resume import Resume, decode_cursor, encode_cursor
+
+
+def resume_record(i, job='j1'):
+    return {
+        'id': f'r{i:02d}',
+        'job_description_id': job,
+        'score': float(i % 7 * 10),  # Ties, broken by ID
+        'skills': ['python'] if i % 2 else ['java'],
+        'detailed_analysis': {'component_scores': {'skills_match': float(i)}}
+    }
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def store(request):
+    store = storage.get_store('resumes', request.param)
+    store.upsert_many([resume_record(i) for i in range(30)] + [resume_record(99, job='j2')])
+    return store
+
+
+def walk(store, sort='score', descending=True, conditions=(), limit=4):
+    seen = []
+    after = None
+    while True:
+        page = store.page('job_description_id', 'j1', sort, descending, conditions, after, limit)
+        seen.extend(page)
+        if len(page) < limit:
+            return seen
+        after = (page[-1][1], page[-1][0]['id'])
+
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_pages_cover_every_record_in_order(store, descending):
+    seen = walk(store, descending=descending)
+    keys = [(value, record['id']) for record, value in seen]
+    assert keys == sorted(keys, reverse=descending)
+    assert len({key[1] for key in keys}) == 30
+
+
+def test_pages_sort_by_component_and_filter(store):
+    conditions = [('gte', 'score', 20.0), ('has', 'skills', 'python')]
+    seen = walk(store, sort='detailed_analysis.component_scores.skills_match', conditions=conditions)
+    expected = [resume_record(i) for i in range(30) if i % 2 and i % 7 * 10 >= 20]
+    assert [record['id'] for record, _ in seen] == \
+        [r['id'] for r in sorted(expected, key=lambda r: r['detailed_analysis']['component_scores']['skills_match'],
+                                 reverse=True)]
+    assert store.count('job_description_id', 'j1', conditions) == len(expected)
+
+
+def test_resume_pages_follow_cursor():
+    storage.get_store('resumes').upsert_many([resume_record(i) for i in range(30)])
+    ids = []
+    cursor = None
+    while True:
+        page = Resume.page_by_job_id('j1', cursor=cursor, limit=7)
+        ids.extend(resume.id for resume in page['resumes'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert len(ids) == len(set(ids)) == 30
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(42.5, 'r01')) == (42.5, 'r01')
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
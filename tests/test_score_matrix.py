@@ -0,0 +1,120 @@
+"""
+ResumeAnalyzer.score_matrix must give every (resume, job) pair the scores
+score_batch gives it when the job is scored on its own.
+"""
+import os
+import sys
+import hashlib
+import random
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app.utils.resume_analyzer as resume_analyzer
+from app.utils.resume_analyzer import ResumeAnalyzer
+from app.utils.job_profile import JobProfile
+
+JOBS = [
+    "Python developer\nRequired skills: python, sql, docker\n5 years of experience\n"
+    "bachelors in computer science",
+    "Data scientist with machine learning and python\nmasters degree\n3 years experience",
+    "Frontend engineer building javascript and react apps",
+]
+
+SKILLS = ['python', 'sql', 'docker', 'javascript', 'react', 'machine learning', 'java', 'aws']
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder standing in for a SentenceTransformer"""
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        vectors = np.full((len(texts), 32), 0.1, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16) % 32] += 1
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_resumes(count=30, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f'Candidate {i}',
+            'email': '',
+            'phone': '',
+            'skills': rng.sample(SKILLS, rng.randint(0, 5)),
+            'education': rng.choice(['', 'bachelors in computer science', 'masters of data science',
+                                     'phd physics', 'high school']),
+            'experience': rng.choice(['', 'Developer 2015 - 2020 python services\nbuilt sql pipelines',
+                                      '7 years of experience in javascript', 'engineer\n\nreact apps built']),
+            'sections': {'skills': 'python and sql'}
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def no_corpus_vectorizer(monkeypatch):
+    # Pairwise IDF, used until a corpus vectorizer is fitted
+    monkeypatch.setattr(resume_analyzer, 'get_corpus_vectorizer', lambda *args, **kwargs: None)
+
+
+def assert_same_scores(matrix, batches):
+    for j, batch in enumerate(batches):
+        for i, expected in enumerate(batch):
+            actual = ResumeAnalyzer.matrix_analysis(matrix, i, j)
+            assert actual['overall_score'] == pytest.approx(expected['overall_score'], abs=0.011)
+            for name, score in expected['component_scores'].items():
+                assert actual['component_scores'][name] == pytest.approx(score, abs=0.011), (i, j, name)
+            assert sorted(actual['skills_analysis']['matched_skills']) == \
+                sorted(expected['skills_analysis']['matched_skills'])
+            assert actual['education_analysis'] == expected['education_analysis']
+
+
+def test_matches_score_batch_with_encoder():
+    encoder = HashingEncoder()
+    resumes = make_resumes()
+    profiles = [JobProfile.build(text, encoder, 'hashing') for text in JOBS]
+    profiles[2] = JobProfile.build(JOBS[2], None)  # A job without embeddings
+
+    matrix = ResumeAnalyzer.score_matrix(resumes, JOBS, job_profiles=profiles, bert_model=encoder, block_size=7)
+    batches = [
+        ResumeAnalyzer.score_batch(resumes, text, job_profile=profile,
+                                   bert_model=encoder if profile.has_embeddings else None)
+        for text, profile in zip(JOBS, profiles)
+    ]
+    assert_same_scores(matrix, batches)
+
+
+def test_matches_score_batch_without_encoder(monkeypatch):
+    monkeypatch.setattr(resume_analyzer, 'get_embedding_model', lambda *args, **kwargs: None)
+    resumes = make_resumes(seed=1)
+    profiles = [JobProfile.build(text) for text in JOBS]
+
+    matrix = ResumeAnalyzer.score_matrix(resumes, JOBS, job_profiles=profiles)
+    batches = [ResumeAnalyzer.score_batch(resumes, text, job_profile=profile)
+               for text, profile in zip(JOBS, profiles)]
+    assert_same_scores(matrix, batches)
+
+
+def test_job_scores_do_not_depend_on_other_jobs(monkeypatch):
+    monkeypatch.setattr(resume_analyzer, 'get_embedding_model', lambda *args, **kwargs: None)
+    resumes = make_resumes(seed=2)
+    profiles = [JobProfile.build(text) for text in JOBS]
+
+    together = ResumeAnalyzer.score_matrix(resumes, JOBS, job_profiles=profiles)
+    alone = ResumeAnalyzer.score_matrix(resumes, JOBS[:1], job_profiles=profiles[:1])
+    np.testing.assert_allclose(together['overall_score'][:, 0], alone['overall_score'][:, 0])
+
+
+def test_lexical_score_does_not_depend_on_batch(monkeypatch):
+    monkeypatch.setattr(resume_analyzer, 'get_embedding_model', lambda *args, **kwargs: None)
+    resumes = make_resumes(seed=3)
+    near_duplicates = [dict(resumes[0], name=f'Copy {i}') for i in range(10)]
+    profile = JobProfile.build(JOBS[0])
+
+    alone = ResumeAnalyzer.score_batch(resumes[:1], JOBS[0], job_profile=profile)[0]
+    for batch in (resumes, resumes[:1] + near_duplicates):
+        together = ResumeAnalyzer.score_batch(batch, JOBS[0], job_profile=profile)[0]
+        assert together['component_scores'] == alone['component_scores']
+        assert together['overall_score'] == alone['overall_score']
@@ -0,0 +1,94 @@
+"""
+Behavior checks for the record stores.
+"""
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app.models.storage as storage
+from app.models.storage import JSONStore, load_json_file
+
+
+def record(i, job='j1', score=None):
+    return {'id': f'r{i}', 'job_description_id': job, 'score': float(i if score is None else score)}
+
+
+@pytest.mark.parametrize('content', ['', '  \n'])
+def test_blank_snapshot_is_empty(tmp_path, content):
+    path = tmp_path / 'resumes.json'
+    path.write_text(content)
+    assert load_json_file(str(path)) == []
+
+
+def test_corrupt_snapshot_is_unreadable(tmp_path):
+    path = tmp_path / 'resumes.json'
+    path.write_text('[{"id": ')
+    with pytest.raises(ValueError):
+        load_json_file(str(path))
+
+
+def test_blank_snapshot_is_compacted(tmp_path):
+    # The data files are shipped as 0-byte files
+    path = tmp_path / 'resumes.json'
+    path.write_text('')
+    store = JSONStore(str(path), compact_bytes=256)
+    for i in range(20):
+        store.upsert(record(i))
+
+    assert len(json.loads(path.read_text())) > 0
+    assert os.path.getsize(str(path) + '.log') < 20 * 64
+    assert [r['id'] for r in JSONStore(str(path)).all()] == [f'r{i}' for i in range(20)]
+
+
+def test_corrupt_snapshot_is_left_alone(tmp_path):
+    path = tmp_path / 'resumes.json'
+    path.write_text('[{"id": ')
+    store = JSONStore(str(path), compact_bytes=64)
+    for i in range(5):
+        store.upsert(record(i))
+
+    assert path.read_text() == '[{"id": '
+    assert len(store.all()) == 5
+
+
+@pytest.fixture
+def json_and_sqlite():
+    """JSON source files of the isolated stores (see conftest)"""
+    return storage.COLLECTIONS
+
+
+def test_startup_skips_blank_json_quietly(json_and_sqlite, caplog):
+    for path in json_and_sqlite.values():
+        open(path, 'w').close()
+
+    with caplog.at_level('INFO', logger='app.models.storage'):
+        assert storage.migrate_json_to_sqlite(only_empty=True) == {}
+        storage.recover_stores('sqlite')
+    assert not [r for r in caplog.records if r.levelname == 'ERROR']
+    assert storage.get_store('resumes', 'sqlite').is_empty()
+
+
+def test_startup_migrates_into_empty_database(json_and_sqlite):
+    with open(json_and_sqlite['resumes'], 'w') as f:
+        json.dump([record(1), record(2)], f)
+    open(json_and_sqlite['job_descriptions'], 'w').close()
+
+    assert storage.migrate_json_to_sqlite(only_empty=True) == {'resumes': 2}
+    assert sorted(r['id'] for r in storage.get_store('resumes', 'sqlite').all()) == ['r1', 'r2']
+
+    # Once the database holds records, later starts leave it alone
+    with open(json_and_sqlite['resumes'], 'w') as f:
+        json.dump([record(3)], f)
+    storage._stores.clear()
+    assert storage.migrate_json_to_sqlite(only_empty=True) == {}
+    assert len(storage.get_store('resumes', 'sqlite').all()) == 2
+
+
+def test_startup_does_not_migrate_corrupt_json(json_and_sqlite):
+    with open(json_and_sqlite['resumes'], 'w') as f:
+        f.write('[{"id": ')
+
+    assert storage.migrate_json_to_sqlite(only_empty=True) == {}
+    assert storage.get_store('resumes', 'sqlite').is_empty()